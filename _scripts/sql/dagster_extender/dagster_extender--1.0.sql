@@ -48,6 +48,8 @@ begin
     values (in_key, in_value)
     on conflict (cid) do update
         set cnf = excluded.cnf;
+    -- Invalidates cached copies of the configuration (delivered on commit)
+    perform pg_notify('user_conf_changed', trim(in_key));
     return in_value;
 end;
 $func$;
@@ -148,6 +148,37 @@ comment on column "IceCatProductsData"."prdData" is 'Product data';
 comment on column "IceCatProductsData"."prdDataVersion" is 'Version identifier';
 comment on column "IceCatProductsData"."isDataEmpty" is 'TRUE if data is empty';
 
+-- Version of the metadata the data was fetched for (added to tables created without it)
+alter table "IceCatProductsData"
+    add column if not exists "prdMetaUpdated" text;
+comment on column "IceCatProductsData"."prdMetaUpdated" is 'Metadata version (IceCat updated) the data was fetched for';
+
+-- One record per product and language (added to tables created without it)
+do
+$$
+    begin
+        alter table "IceCatProductsData"
+            add constraint "uxIceCatProductData" unique ("prdUUID", "prdLang");
+    exception
+        when duplicate_table or duplicate_object then null;
+    end
+$$;
+
+/* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
+/**
+    Version dates of IceCat Products Meta and Data.
+    Stored at write time and indexed, so staleness is answered by an index range scan.
+ */
+alter table "IceCatProductsMeta"
+    add column if not exists "prdMetaDate" date generated always as ("uuidExtractDate"("prdMetaVersion")) stored;
+comment on column "IceCatProductsMeta"."prdMetaDate" is 'Date of the version';
+create index if not exists "ixIceCatProductsMetaDate" on "IceCatProductsMeta" ("prdMetaDate");
+
+alter table "IceCatProductsData"
+    add column if not exists "prdDataDate" date generated always as ("uuidExtractDate"("prdDataVersion")) stored;
+comment on column "IceCatProductsData"."prdDataDate" is 'Date of the version';
+create index if not exists "ixIceCatProductsDataDate" on "IceCatProductsData" ("prdDataDate");
+
 /* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
 /**
     Saves IceCat Product Meta (single record).
@@ -181,7 +212,132 @@ comment on function "saveIceCatProductMeta"(bigint, jsonb) is 'Stores IceCat Pro
 
 /* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
 /**
-    Saves IceCat Product Meta (single record).
+    Saves IceCat Product Meta (batch, set-based).
+    "inMetas" is a jsonb array of objects aligned with "inProductIds"; the last row wins per product.
+    Unchanged products keep their version. Returns one row per product with the saved status:
+    'inserted', 'updated' or 'unchanged'.
+ */
+create or replace function "saveIceCatProductMetaBatch"(in "inProductIds" bigint[], in "inMetas" jsonb)
+    returns table
+            (
+                "outProductId"   bigint,
+                "outProductUUID" uuid,
+                "outStatus"      text
+            )
+    language plpgsql
+    volatile
+    security definer
+as
+$fun$
+begin
+    if jsonb_typeof("inMetas") is distinct from 'array' then
+        raise exception 'Product Meta must be a json array';
+    end if;
+    if cardinality("inProductIds") is distinct from jsonb_array_length("inMetas") then
+        raise exception 'Number of Product IDs and Product Meta differ';
+    end if;
+    if array_position("inProductIds", null) is not null then
+        raise exception 'Product ID cannot be null';
+    end if;
+    return query
+        with "input" as (
+            select distinct on ("rowID")
+                "rowID",
+                jsonb_strip_nulls(coalesce(nullif("rowMeta", 'null'::jsonb), '{}'::jsonb)) as "sanData"
+            from rows from (unnest("inProductIds"), jsonb_array_elements("inMetas"))
+                with ordinality as "rows"("rowID", "rowMeta", "rowNo")
+            order by "rowID", "rowNo" desc
+        ),
+             "saved" as (
+                 insert into "IceCatProductsMeta" ("prdID", "prdMeta")
+                     select "rowID", "sanData" from "input"
+                     on conflict ("prdID") do update
+                         set "prdMeta" = excluded."prdMeta", "prdMetaVersion" = uuidv7()
+                         where "IceCatProductsMeta"."prdMeta" is distinct from excluded."prdMeta"
+                     returning "IceCatProductsMeta"."prdID" as "savedID",
+                         "IceCatProductsMeta"."prdUUID" as "savedUUID",
+                         "IceCatProductsMeta".xmax = 0 as "isNew"
+             )
+        select
+            "input"."rowID",
+            coalesce("saved"."savedUUID", "current"."prdUUID"),
+            case
+                when "saved"."savedID" is null then 'unchanged'
+                when "saved"."isNew" then 'inserted'
+                else 'updated'
+            end
+        from "input"
+            left join "saved" on "saved"."savedID" = "input"."rowID"
+            left join "IceCatProductsMeta" as "current" on "current"."prdID" = "input"."rowID"
+        order by "input"."rowID";
+end;
+$fun$;
+grant execute on function "saveIceCatProductMetaBatch"(bigint[], jsonb) to dbu_storage;
+comment on function "saveIceCatProductMetaBatch"(bigint[], jsonb) is 'Stores IceCat Product Meta (batch, set-based)';
+
+/* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
+/**
+    IceCat Products Meta staging area.
+    Unlogged table filled by bulk loaders (COPY) before merging.
+ */
+create unlogged table if not exists "IceCatProductsMetaStage"
+(
+    "stgLoadID" uuid   not null,
+    "stgRowNo"  bigint generated always as identity,
+    "prdID"     bigint not null,
+    "prdMeta"   jsonb
+);
+create index if not exists "ixIceCatProductsMetaStageLoad" on "IceCatProductsMetaStage" ("stgLoadID");
+grant insert on table "IceCatProductsMetaStage" to dbu_storage;
+comment on table "IceCatProductsMetaStage" is 'Icecat Products Meta staging area (bulk loads)';
+comment on column "IceCatProductsMetaStage"."stgLoadID" is 'Identifier of the load that staged the row';
+comment on column "IceCatProductsMetaStage"."stgRowNo" is 'Order of staged rows';
+comment on column "IceCatProductsMetaStage"."prdID" is 'Product ID';
+comment on column "IceCatProductsMetaStage"."prdMeta" is 'IceCata product metadata';
+
+/* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
+/**
+    Merges staged IceCat Product Meta (set-based).
+    Consumes the rows of given load; the last staged row wins per product.
+ */
+create or replace function "mergeIceCatProductMetaStage"(in "inLoadID" uuid)
+    returns bigint
+    language plpgsql
+    volatile
+    security definer
+as
+$fun$
+declare
+    "outCount" bigint;
+begin
+    if "inLoadID" is null then
+        raise exception 'Load ID cannot be null';
+    end if;
+    with "staged" as (
+        delete
+        from "IceCatProductsMetaStage"
+        where
+            "stgLoadID" = "inLoadID"
+        returning "stgRowNo", "prdID", jsonb_strip_nulls(coalesce("prdMeta", '{}'::jsonb)) as "sanData"
+    )
+    insert into "IceCatProductsMeta" ("prdID", "prdMeta")
+    select distinct on ("prdID")
+        "prdID",
+        "sanData"
+    from "staged"
+    order by "prdID", "stgRowNo" desc
+    on conflict ("prdID") do update
+        set "prdMeta" = excluded."prdMeta", "prdMetaVersion" = uuidv7();
+    get diagnostics "outCount" = row_count;
+    return "outCount";
+end;
+$fun$;
+grant execute on function "mergeIceCatProductMetaStage"(uuid) to dbu_storage;
+comment on function "mergeIceCatProductMetaStage"(uuid) is 'Merges staged IceCat Product Meta (set-based)';
+
+/* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
+/**
+    Saves IceCat Product Data (single record, EN).
  */
 create or replace function "saveIceCatProductData"(in "inProductUUID" uuid, in "inData" jsonb)
     returns uuid
@@ -201,16 +357,307 @@ begin
     if "isJsonObjectEmpty"("sanData") then
         "sanData" = '{}'::jsonb;
     end if;
-    "langCode" = 'EN'::"IceCatLang";
-    insert into "IceCatProductsData" ("prdUUID", "prdData")
-    values ("IceCatProductsData"."prdUUID", "sanData")
-    on conflict ("prdUUID") do update
+    insert into "IceCatProductsData" ("prdUUID", "prdLang", "prdData")
+    values ("inProductUUID", "langCode", "sanData")
+    on conflict ("prdUUID", "prdLang") do update
         set "prdData" = excluded."prdData", "prdDataVersion" = uuidv7()
     returning "prdUUID" into "outPrdUUUID";
     return "outPrdUUUID";
 end;
 $fun$;
-comment on function "saveIceCatProductData"(uuid, jsonb) is 'Stores IceCat Product Meta (single record)';
+comment on function "saveIceCatProductData"(uuid, jsonb) is 'Stores IceCat Product Data (single record, EN)';
+
+/* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
+/**
+    Saves IceCat Product Data of one language (batch, set-based).
+    "inData" is a jsonb array of objects aligned with "inProductUUIDs" and "inMetaUpdated" (metadata version
+    the documents were fetched for); the last row wins per product. Unchanged products keep their version,
+    only the metadata version is recorded, so they are not listed to fetch again (see listIceCatDataToFetch).
+    Returns one row per product with the saved status: 'inserted', 'updated' or 'unchanged'.
+ */
+drop function if exists "saveIceCatProductDataBatch"(uuid[], varchar, jsonb);
+create or replace function "saveIceCatProductDataBatch"(in "inProductUUIDs" uuid[], in "inLangCode" varchar(5),
+                                                        in "inData" jsonb, in "inMetaUpdated" text[])
+    returns table
+            (
+                "outProductUUID" uuid,
+                "outStatus"      text
+            )
+    language plpgsql
+    volatile
+    security definer
+as
+$fun$
+declare
+    "langCode" "IceCatLang" := "resolveLangCode"("inLangCode");
+begin
+    if "langCode" is null then
+        raise exception 'Unknown language code: %', "inLangCode";
+    end if;
+    if jsonb_typeof("inData") is distinct from 'array' then
+        raise exception 'Product Data must be a json array';
+    end if;
+    if cardinality("inProductUUIDs") is distinct from jsonb_array_length("inData")
+        or cardinality("inProductUUIDs") is distinct from cardinality("inMetaUpdated") then
+        raise exception 'Number of Product UUIDs, Product Data and Metadata versions differ';
+    end if;
+    if array_position("inProductUUIDs", null) is not null then
+        raise exception 'Product UUID cannot be null';
+    end if;
+    return query
+        with "input" as (
+            select distinct on ("rowUUID")
+                "rowUUID",
+                jsonb_strip_nulls(coalesce(nullif("rowData", 'null'::jsonb), '{}'::jsonb)) as "sanData",
+                "rowMetaUpdated"
+            from rows from (unnest("inProductUUIDs"), jsonb_array_elements("inData"), unnest("inMetaUpdated"))
+                with ordinality as "rows"("rowUUID", "rowData", "rowMetaUpdated", "rowNo")
+            order by "rowUUID", "rowNo" desc
+        ),
+             -- Records before the save (the statement snapshot does not see its own changes)
+             "current" as (
+                 select "data"."prdUUID", "data"."prdData"
+                 from "IceCatProductsData" as "data"
+                     join "input" on "input"."rowUUID" = "data"."prdUUID"
+                 where
+                     "data"."prdLang" = "langCode"
+             ),
+             "saved" as (
+                 insert into "IceCatProductsData" ("prdUUID", "prdLang", "prdData", "prdMetaUpdated")
+                     select "rowUUID", "langCode", "sanData", "rowMetaUpdated" from "input"
+                     on conflict ("prdUUID", "prdLang") do update
+                         set "prdData" = excluded."prdData",
+                             "prdMetaUpdated" = excluded."prdMetaUpdated",
+                             "prdDataVersion" = case
+                                                    when "IceCatProductsData"."prdData" is distinct from excluded."prdData"
+                                                        then uuidv7()
+                                                    else "IceCatProductsData"."prdDataVersion"
+                                                end
+                         where "IceCatProductsData"."prdData" is distinct from excluded."prdData"
+                             or "IceCatProductsData"."prdMetaUpdated" is distinct from excluded."prdMetaUpdated"
+                     returning "IceCatProductsData"."prdUUID"
+             )
+        select
+            "input"."rowUUID",
+            case
+                when "current"."prdUUID" is null then 'inserted'
+                when "current"."prdData" is distinct from "input"."sanData" then 'updated'
+                else 'unchanged'
+            end
+        from "input"
+            left join "current" on "current"."prdUUID" = "input"."rowUUID";
+end;
+$fun$;
+grant execute on function "saveIceCatProductDataBatch"(uuid[], varchar, jsonb, text[]) to dbu_storage;
+comment on function "saveIceCatProductDataBatch"(uuid[], varchar, jsonb, text[]) is 'Stores IceCat Product Data (batch, set-based)';
+
+/* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
+/**
+    IceCat products whose data of the language is missing or was fetched for another metadata version.
+    The version is the IceCat 'updated' stamp of the metadata (stable across metadata loads), the record
+    version for metadata without it.
+ */
+create or replace function "listIceCatDataToFetch"(in "inLangCode" varchar(5), in "inLimit" bigint default null)
+    returns table
+            (
+                "outProductId"   bigint,
+                "outProductUUID" uuid,
+                "outPath"        text,
+                "outVersion"     text
+            )
+    language sql
+    stable
+    security definer
+as
+$fun$
+select
+    "meta"."prdID",
+    "meta"."prdUUID",
+    "meta"."prdMeta" ->> 'path',
+    "meta"."metaUpdated"
+from (
+    select
+        *,
+        coalesce("prdMeta" ->> 'updated', "prdMetaVersion"::text) as "metaUpdated"
+    from "IceCatProductsMeta"
+) as "meta"
+    left join "IceCatProductsData" as "data"
+        on "data"."prdUUID" = "meta"."prdUUID" and "data"."prdLang" = "resolveLangCode"("inLangCode")
+where
+    "data"."prdUUID" is null or "data"."prdMetaUpdated" is distinct from "meta"."metaUpdated"
+order by "meta"."prdID"
+limit "inLimit";
+$fun$;
+grant execute on function "listIceCatDataToFetch"(varchar, bigint) to dbu_storage;
+comment on function "listIceCatDataToFetch"(varchar, bigint) is 'IceCat products whose data is missing or outdated';
+
+/* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
+/**
+    IceCat record counters.
+    Maintained by statement-level triggers (transition tables), rows per table and language
+    ('' for IceCat Products Meta), so counting does not scan the tables. Each table and language has
+    up to 16 rows (slots), a writer updates the slot of its backend and readers sum the slots,
+    so concurrent writers do not queue on a single row lock.
+ */
+create table if not exists "IceCatCounters"
+(
+    "cntTable" text     not null,
+    "cntLang"  text     not null default '',
+    "cntSlot"  smallint not null default 0,
+    "cntRows"  bigint   not null default 0,
+    constraint "pkIceCatCounters" primary key ("cntTable", "cntLang", "cntSlot")
+);
+-- Installed before the counters were striped
+alter table "IceCatCounters" add column if not exists "cntSlot" smallint not null default 0;
+alter table "IceCatCounters"
+    drop constraint if exists "pkIceCatCounters",
+    add constraint "pkIceCatCounters" primary key ("cntTable", "cntLang", "cntSlot");
+comment on table "IceCatCounters" is 'IceCat record counters (maintained by triggers)';
+comment on column "IceCatCounters"."cntTable" is 'Counted table';
+comment on column "IceCatCounters"."cntLang" is 'Language of counted records, empty if not by language';
+comment on column "IceCatCounters"."cntSlot" is 'Counter slot of the writing backends (pg_backend_pid() % 16)';
+comment on column "IceCatCounters"."cntRows" is 'Number of records counted in the slot (may be negative)';
+
+/**
+    Adds record count deltas of a statement to the counter slot of the backend
+    (in key order, so writers do not deadlock).
+ */
+create or replace function "addIceCatCounters"(in "inTable" text, in "inLangs" text[], in "inDeltas" bigint[])
+    returns void
+    language sql
+    volatile
+    security definer
+as
+$fun$
+insert into "IceCatCounters" ("cntTable", "cntLang", "cntSlot", "cntRows")
+select
+    "inTable",
+    "delta"."lang",
+    pg_backend_pid() % 16,
+    sum("delta"."rows")
+from unnest("inLangs", "inDeltas") as "delta"("lang", "rows")
+group by "delta"."lang"
+having sum("delta"."rows") <> 0
+order by "delta"."lang"
+on conflict ("cntTable", "cntLang", "cntSlot") do update
+    set "cntRows" = "IceCatCounters"."cntRows" + excluded."cntRows";
+$fun$;
+comment on function "addIceCatCounters"(text, text[], bigint[]) is 'Adds record count deltas to IceCat counters';
+
+/**
+    Counts inserted and deleted IceCat Products Meta records.
+ */
+create or replace function "countIceCatMetaRows"()
+    returns trigger
+    language plpgsql
+    security definer
+as
+$fun$
+declare
+    "delta" bigint := 0;
+begin
+    if TG_OP = 'INSERT' then
+        select count(*) into "delta" from "newRows";
+    elsif TG_OP = 'DELETE' then
+        select -count(*) into "delta" from "oldRows";
+    elsif TG_OP = 'TRUNCATE' then
+        delete from "IceCatCounters" where "cntTable" = TG_TABLE_NAME;
+    end if;
+    -- Upserts of existing products insert nothing
+    if "delta" <> 0 then
+        perform "addIceCatCounters"(TG_TABLE_NAME, array [''], array ["delta"]);
+    end if;
+    return null;
+end;
+$fun$;
+comment on function "countIceCatMetaRows"() is 'Counts IceCat Product Meta records (trigger)';
+
+/**
+    Counts inserted, deleted and moved (other language) IceCat Products Data records by language.
+ */
+create or replace function "countIceCatDataRows"()
+    returns trigger
+    language plpgsql
+    security definer
+as
+$fun$
+begin
+    if TG_OP = 'INSERT' then
+        perform "addIceCatCounters"(TG_TABLE_NAME, array_agg("prdLang"::text), array_agg(1::bigint))
+        from "newRows";
+    elsif TG_OP = 'DELETE' then
+        perform "addIceCatCounters"(TG_TABLE_NAME, array_agg("prdLang"::text), array_agg(-1::bigint))
+        from "oldRows";
+    elsif TG_OP = 'UPDATE' then
+        perform "addIceCatCounters"(TG_TABLE_NAME, array_agg("lang"), array_agg("rows"))
+        from (
+            select "prdLang"::text as "lang", -1::bigint as "rows" from "oldRows"
+            union all
+            select "prdLang"::text, 1::bigint from "newRows"
+        ) as "moved";
+    elsif TG_OP = 'TRUNCATE' then
+        delete from "IceCatCounters" where "cntTable" = TG_TABLE_NAME;
+    end if;
+    return null;
+end;
+$fun$;
+comment on function "countIceCatDataRows"() is 'Counts IceCat Product Data records by language (trigger)';
+
+-- Transition tables need one trigger per event (and no column list, updates keeping the language add nothing)
+create or replace trigger "trgIceCatProductsMetaInsert"
+    after insert
+    on "IceCatProductsMeta"
+    referencing new table as "newRows"
+    for each statement
+execute function "countIceCatMetaRows"();
+create or replace trigger "trgIceCatProductsMetaDelete"
+    after delete
+    on "IceCatProductsMeta"
+    referencing old table as "oldRows"
+    for each statement
+execute function "countIceCatMetaRows"();
+create or replace trigger "trgIceCatProductsMetaTruncate"
+    after truncate
+    on "IceCatProductsMeta"
+    for each statement
+execute function "countIceCatMetaRows"();
+
+create or replace trigger "trgIceCatProductsDataInsert"
+    after insert
+    on "IceCatProductsData"
+    referencing new table as "newRows"
+    for each statement
+execute function "countIceCatDataRows"();
+create or replace trigger "trgIceCatProductsDataUpdate"
+    after update
+    on "IceCatProductsData"
+    referencing old table as "oldRows" new table as "newRows"
+    for each statement
+execute function "countIceCatDataRows"();
+create or replace trigger "trgIceCatProductsDataDelete"
+    after delete
+    on "IceCatProductsData"
+    referencing old table as "oldRows"
+    for each statement
+execute function "countIceCatDataRows"();
+create or replace trigger "trgIceCatProductsDataTruncate"
+    after truncate
+    on "IceCatProductsData"
+    for each statement
+execute function "countIceCatDataRows"();
+
+-- (Re)initializes the counters from the tables, e.g. when installed over existing data
+do
+$$
+    begin
+        lock table "IceCatProductsMeta", "IceCatProductsData" in share mode;
+        delete from "IceCatCounters" where "cntTable" in ('IceCatProductsMeta', 'IceCatProductsData');
+        insert into "IceCatCounters" ("cntTable", "cntLang", "cntRows")
+        select 'IceCatProductsMeta', '', count(*) from "IceCatProductsMeta";
+        insert into "IceCatCounters" ("cntTable", "cntLang", "cntRows")
+        select 'IceCatProductsData', "prdLang"::text, count(*) from "IceCatProductsData" group by "prdLang";
+    end
+$$;
 
 /* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
 /**
@@ -225,8 +672,10 @@ create or replace function "countIceCatMeta"()
 as
 $fun$
 select
-    count(*)
-from "IceCatProductsMeta";
+    coalesce(sum("cntRows"), 0)::bigint
+from "IceCatCounters"
+where
+    "cntTable" = 'IceCatProductsMeta';
 $fun$;
 comment on function "countIceCatMeta"() is 'Number of IceCat Product Meta records';
 
@@ -242,8 +691,10 @@ create or replace function "countIceCatData"()
 as
 $fun$
 select
-    count(*)
-from "IceCatProductsData";
+    coalesce(sum("cntRows"), 0)::bigint
+from "IceCatCounters"
+where
+    "cntTable" = 'IceCatProductsData';
 $fun$;
 alter function "countIceCatData"() owner to postgres;
 grant execute on function "countIceCatData"() to dbu_storage;
@@ -261,10 +712,11 @@ create or replace function "countIceCatDataByLang"(in "inLangCode" varchar(5))
 as
 $fun$
 select
-    count(*)
-from "IceCatProductsData"
+    coalesce(sum("cntRows"), 0)::bigint
+from "IceCatCounters"
 where
-    "prdLang" = "resolveLangCode"("inLangCode");
+    "cntTable" = 'IceCatProductsData'
+    and "cntLang" = "resolveLangCode"("inLangCode")::text;
 $fun$;
 alter function "countIceCatDataByLang"(varchar) owner to postgres;
 grant execute on function "countIceCatDataByLang"(varchar) to dbu_storage;
@@ -274,6 +726,7 @@ comment on function "countIceCatDataByLang"(varchar) is 'Number of IceCat Produc
 /* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
 /**
     Number of outdated IceCat Product Meta records.
+    Range scan of the version date index (older than "expireDays" days).
  */
 create or replace function "countIceCatMetaOutdated"(in "expireDays" bigint default 30)
     returns bigint
@@ -287,13 +740,14 @@ select
     count(*)
 from "IceCatProductsMeta"
 where
-    "extractDaysAgo"("prdMetaVersion") > abs(coalesce("expireDays", 0)) ;
+    "prdMetaDate" < current_date - abs(coalesce("expireDays", 0))::integer;
 $fun$;
 comment on function "countIceCatMetaOutdated"(bigint) is 'Number of outdated IceCat Product Meta records';
 
 /* -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  */
 /**
     Number of outdated IceCat Product Data records.
+    Range scan of the version date index (older than "expireDays" days).
  */
 create or replace function "countIceCatDataOutdated"(in "expireDays" bigint default 30)
     returns bigint
@@ -307,7 +761,6 @@ select
     count(*)
 from "IceCatProductsData"
 where
-    "extractDaysAgo"("prdDataVersion") > abs(coalesce("expireDays", 0)) ;
+    "prdDataDate" < current_date - abs(coalesce("expireDays", 0))::integer;
 $fun$;
 comment on function "countIceCatDataOutdated"(bigint) is 'Number of outdated IceCat Product Data records';
-
@@ -1,5 +1,6 @@
 # app/assets/defs.py
-from dagster import load_assets_from_package_module
-import assets
+from dagster import load_assets_from_modules
 
-ALL_ASSETS = load_assets_from_package_module(assets)
+from auto_load.DefsManifest import DefsManifest
+
+ALL_ASSETS = load_assets_from_modules(DefsManifest.load("assets", "asset"))
@@ -2,12 +2,14 @@
 from dagster import get_dagster_logger
 from datetime import datetime, timedelta
 from pathlib import Path
-import gzip
+import json
 import os
+import time
 import requests
-import shutil
-from shutil import copyfile
-import tempfile
+
+from .IceCatCsvReader import IceCatCsvReader
+from .IceCatGunzip import IceCatGunzip
+from .file_lock import file_lock
 
 
 class IceCatCsv:
@@ -20,6 +22,7 @@ class IceCatCsv:
     zip = "icecat.data.csv.gz"
     csv = "icecat.data.csv"
     out = 24
+    chunk = 1024 * 1024
 
     def __init__(self, usr: str, psw: str):
         self.usr = usr
@@ -37,29 +40,109 @@ class IceCatCsv:
         return IceCatCsv(usr=username, psw=password)
 
     def download(self) -> str:
-        """Downloads the CSV file from IceCat."""
+        """
+        Downloads the CSV file from IceCat.
+        The request is conditional (ETag / Last-Modified): unchanged upstream file is not transferred again.
+        An interrupted transfer is resumed with a Range request, the result is renamed in place atomically.
+        """
         self.logger.info(f"Starting IceCat download (user: {self.usr[:8]}...)")  # ← improved
 
         self.mkdir_target()
-        with requests.get(self.url, auth=(self.usr, self.psw), stream=True, timeout=90) as r:
+        path_persistent = self.path_zip()
+        path_part = self.path_part()
+        headers = {}
+
+        # Conditional request, based on validators of the persistent file
+        known = self.read_validators(self.path_validators()) if path_persistent.exists() else {}
+        if known.get("etag"):
+            headers["If-None-Match"] = known["etag"]
+        if known.get("last_modified"):
+            headers["If-Modified-Since"] = known["last_modified"]
+
+        # Resume interrupted transfer, only if partial file is still the same version
+        partial = self.read_validators(self.path_part_validators()) if path_part.exists() else {}
+        offset = path_part.stat().st_size if partial.get("etag") or partial.get("last_modified") else 0
+        if offset > 0:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = partial.get("etag") or partial.get("last_modified")
+
+        r = self.request(headers)
+        if r.status_code == 416 and "Range" in headers:
+            # Partial file can't be resumed, start over with the whole file
+            r.close()
+            self.logger.info("Partial download can't be resumed, downloading the whole file")
+            path_part.unlink(missing_ok=True)
+            self.path_part_validators().unlink(missing_ok=True)
+            headers.pop("Range")
+            headers.pop("If-Range")
+            r = self.request(headers)
+        with r:
+            if r.status_code == 304:
+                # The file keeps its modification time (extracted CSV stays valid), the check is recorded
+                self.mark_checked(self.path_validators())
+                path_part.unlink(missing_ok=True)
+                self.logger.info(f"IceCat file not modified, download skipped: {path_persistent}")
+                return str(path_persistent)
             r.raise_for_status()
+            if r.status_code == 206:
+                self.logger.info(f"Resuming download at {offset / (1024 * 1024):.1f} MB")
+                mode = "ab"
+            else:
+                mode = "wb"
+                offset = 0
+            self.write_validators(self.path_part_validators(), r.headers)
             downloaded = 0
-            temp_file_obj = tempfile.NamedTemporaryFile(delete=False, suffix=".gz", mode="wb")
-            temp_file = temp_file_obj.name
-            temp_file_obj.close()
-            with open(temp_file, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
+            with open(path_part, mode) as f:
+                for chunk in r.iter_content(chunk_size=self.chunk):
                     f.write(chunk)
                     downloaded += len(chunk)
             mb = downloaded / (1024 * 1024)
             self.logger.info(f"Downloaded: {mb:.1f} MB")
-        path_temp_file = Path(temp_file)
-        path_persistent = self.path_zip()
-        copyfile(path_temp_file, path_persistent)
-        os.remove(temp_file)
+        os.replace(path_part, path_persistent)
+        os.replace(self.path_part_validators(), self.path_validators())
         self.logger.info(f"Persistent file: {path_persistent}")
         return str(path_persistent)
 
+    def request(self, headers: dict) -> requests.Response:
+        return requests.get(self.url, auth=(self.usr, self.psw), headers=headers, stream=True, timeout=90)
+
+    @staticmethod
+    def read_validators(path: Path) -> dict:
+        """Reads stored HTTP validators (ETag / Last-Modified)."""
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def write_validators(path: Path, headers) -> None:
+        """Stores HTTP validators (ETag / Last-Modified) of the response and time of the check."""
+        validators = {"etag": headers.get("ETag"), "last_modified": headers.get("Last-Modified"),
+                      "checked": time.time()}
+        path.write_text(json.dumps(validators), encoding="utf-8")
+
+    @staticmethod
+    def mark_checked(path: Path) -> None:
+        """Records time of the check of the unchanged upstream file into its stored validators."""
+        validators = IceCatCsv.read_validators(path)
+        validators["checked"] = time.time()
+        path.write_text(json.dumps(validators), encoding="utf-8")
+
+    @staticmethod
+    def path_part():
+        """Returns the path to the partially downloaded zipped CSV file."""
+        return Path(f"{IceCatCsv.dir}/{IceCatCsv.zip}.part")
+
+    @staticmethod
+    def path_validators():
+        """Returns the path to HTTP validators of the zipped CSV file."""
+        return Path(f"{IceCatCsv.dir}/{IceCatCsv.zip}.json")
+
+    @staticmethod
+    def path_part_validators():
+        """Returns the path to HTTP validators of the partially downloaded file."""
+        return Path(f"{IceCatCsv.dir}/{IceCatCsv.zip}.part.json")
+
     @staticmethod
     def path_zip():
         """Returns the path to the zipped CSV file."""
@@ -93,12 +176,15 @@ class IceCatCsv:
 
     @staticmethod
     def is_zip_outdated() -> bool:
-        """Checks if the zipped CSV file is outdated."""
+        """
+        Checks if the zipped CSV file is outdated (upstream last checked before the period).
+        The file is kept for conditional download.
+        """
         path = IceCatCsv.path_zip()
-        is_outdated = IceCatCsv.is_file_outdated(path)
-        if is_outdated and path.exists():
-            os.remove(path)
-        return is_outdated
+        checked = IceCatCsv.read_validators(IceCatCsv.path_validators()).get("checked")
+        if checked is None or not path.exists():
+            return IceCatCsv.is_file_outdated(path)
+        return datetime.fromtimestamp(checked) < datetime.now() - timedelta(hours=IceCatCsv.out)
 
     @staticmethod
     def is_csv_outdated() -> bool:
@@ -117,28 +203,89 @@ class IceCatCsv:
             return file_path
         return self.download()
 
+    @staticmethod
+    def reader(path: str = None) -> IceCatCsvReader:
+        """Returns single-pass row reader of the CSV file. Defaults to the zipped file, decoded on the fly."""
+        return IceCatCsvReader(path or str(IceCatCsv.path_zip()))
+
+    def get_reader(self) -> IceCatCsvReader:
+        """Returns row reader of the zipped CSV file. If the file is outdated or missing, downloads it first."""
+        return self.reader(self.get_zipped())
+
     def download_and_unzip(self) -> str:
         """Downloads and extracts the IceCat CSV file."""
         self.mkdir_target()
         zipped_path = self.get_zipped()
-        temp_file_obj = tempfile.NamedTemporaryFile(delete=False, suffix=".csv")
-        csv_file = temp_file_obj.name
-        temp_file_obj.close()
-        try:
-            with gzip.open(zipped_path, "rb") as f_in:
-                with open(csv_file, "wb") as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-            self.logger.info("Extraction complete.")
-            size_mb = os.path.getsize(csv_file) / (1024 * 1024)
-            self.logger.info(f"Path: {csv_file}")
-            self.logger.info(f"Size ({size_mb:.1f} MB):")
-            csv_path = self.path_csv()
-            copyfile(csv_file, csv_path)
-        finally:
-            if os.path.exists(csv_file):
-                os.unlink(csv_file)
+        return self.unzip(zipped_path)
+
+    @staticmethod
+    def unzip(zipped_path: str) -> str:
+        """
+        Extracts zipped CSV file next to it and returns the path of the uncompressed file.
+        Extraction is skipped if the uncompressed file is newer than the zipped one. Concurrent callers
+        (e.g. partitions of icecat_products) wait for the first one and reuse its result.
+        """
+        logger = get_dagster_logger()
+        zipped = Path(zipped_path)
+        if zipped.suffix != ".gz":
+            return str(zipped)
+        csv_path = zipped.with_suffix("")
+        with file_lock(csv_path):
+            if csv_path.exists() and csv_path.stat().st_mtime >= zipped.stat().st_mtime:
+                logger.info(f"Uncompressed file exists: {csv_path}")
+                return str(csv_path)
+            part_path = csv_path.with_name(f"{csv_path.name}.part")
+            gz = IceCatGunzip()
+            try:
+                gz.gunzip(str(zipped), str(part_path))
+                os.replace(part_path, csv_path)
+            finally:
+                part_path.unlink(missing_ok=True)
+        logger.info(f"Extraction complete in {gz.elapsed:.1f}s: {gz.mb_per_sec():.1f} MB/s "
+                    f"({gz.bytes_in / (1024 * 1024) / max(gz.elapsed, 1e-9):.1f} MB/s compressed, engine: {gz.engine})")
+        size_mb = os.path.getsize(csv_path) / (1024 * 1024)
+        logger.info(f"Path: {csv_path}")
+        logger.info(f"Size ({size_mb:.1f} MB):")
         return str(csv_path)
 
+    @staticmethod
+    def path_fingerprint(path: str) -> Path:
+        """Returns the path to the cached fingerprint of the file."""
+        return Path(f"{path}.fingerprint.json")
+
+    @staticmethod
+    def fingerprint(path: str) -> dict:
+        """
+        Returns content fingerprint of the (zipped) CSV file: hash and size of the uncompressed content
+        and number of data rows. Unlike the file itself, it does not change when the same content is
+        compressed or downloaded again. Hashing reads the whole content, so the fingerprint is cached next
+        to the file, keyed by size, modification time and HTTP validators of the file (ETag / Last-Modified).
+        """
+        logger = get_dagster_logger()
+        stat = Path(path).stat()
+        validators = IceCatCsv.read_validators(Path(f"{path}.json"))
+        key = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+               "etag": validators.get("etag"), "last_modified": validators.get("last_modified")}
+        path_cached = IceCatCsv.path_fingerprint(path)
+        cached = IceCatCsv.read_validators(path_cached)
+        if cached.get("key") == key and cached.get("fingerprint"):
+            logger.info(f"File not changed, fingerprint reused: {path_cached}")
+            return {**cached["fingerprint"], "path": str(path)}
+
+        gz = IceCatGunzip()
+        content_hash, lines = gz.digest(path)
+        fingerprint = {
+            "path": str(path),
+            "size_bytes": stat.st_size,
+            "content_hash": content_hash,
+            "content_bytes": gz.bytes_out,
+            "rows": max(lines - 1, 0),
+        }
+        tmp_path = path_cached.with_name(f"{path_cached.name}.tmp")
+        tmp_path.write_text(json.dumps({"key": key, "fingerprint": fingerprint}), encoding="utf-8")
+        os.replace(tmp_path, path_cached)
+        return fingerprint
+
     def get(self) -> str:
         self.logger.info("Checking for CSV file...")
         if not self.is_csv_outdated():
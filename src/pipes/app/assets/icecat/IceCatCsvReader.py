@@ -0,0 +1,167 @@
+# app/assets/icecat/IceCatCsvReader.py
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+import csv
+import gzip
+import io
+import mmap
+import re
+
+from .IceCatPartitionIndex import IceCatPartitionIndex
+from .IceCatRowIndex import IceCatRowIndex
+
+
+class IceCatCsvReader:
+    """
+    Single-pass reader of IceCat CSV file, plain or gzip-compressed (*.gz).
+    Compressed files are decoded on the fly, no intermediate CSV is written to disk.
+    Progress is derived from bytes consumed versus file size, so the file is read only once.
+    Rows end where the csv reader ends them: at '\n', '\r\n' and a bare '\r' (text stream with newline='').
+    """
+
+    line_end = re.compile(rb"\r\n?|\n")
+    scan_block = 1024 * 1024
+    locate_block = 16 * 1024
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.size = self.path.stat().st_size
+        self.headers: Optional[List[str]] = None
+        self.raw = None
+        self.text = None
+        self.reader = None
+        self.scanned: Tuple[int, int] = (0, 0)
+
+    def __enter__(self) -> 'IceCatCsvReader':
+        self.raw = open(self.path, "rb")
+        stream = gzip.GzipFile(fileobj=self.raw, mode="rb") if self.is_gzip() else self.raw
+        self.text = io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline="")
+        self.reader = csv.reader(self.text, delimiter="\t", quoting=csv.QUOTE_NONE)
+        self.headers = next(self.reader, None)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.text is not None:
+            self.text.close()
+        if self.raw is not None:
+            self.raw.close()
+
+    def __iter__(self):
+        return self.reader
+
+    def skip(self, rows: int, offset: Optional[int] = None) -> int:
+        """
+        Skips data rows without parsing them (resuming a load). Uncompressed file seeks to the byte offset
+        of the next row if known, compressed file is decompressed up to it. Returns number of rows skipped.
+        """
+        if rows <= 0:
+            return 0
+        if offset is not None and not self.is_gzip():
+            self.text.seek(offset)  # Offset of a line start is a valid position of the utf-8 text stream
+            return rows
+        skipped = 0
+        while skipped < rows and self.text.readline():
+            skipped += 1
+        return skipped
+
+    def offset_of(self, rows: int) -> Optional[int]:
+        """
+        Returns byte offset of the data row following 'rows' rows (uncompressed file only). Line ends are
+        counted block by block the way the csv reader splits rows, continuing from the previous call,
+        so repeated checkpoints scan each part of the file once.
+        """
+        if self.is_gzip():
+            return None
+        lines = rows + 1  # With the header
+        counted, offset = self.scanned if self.scanned[0] <= lines else (0, 0)
+        if counted < lines and offset < self.size:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                step = self.scan_block
+                while counted < lines and offset < self.size:
+                    end = min(offset + step, self.size)
+                    if mm[end - 1:end] == b"\r" and mm[end:end + 1] == b"\n":
+                        end += 1  # Keeps '\r\n' in one block
+                    block = mm[offset:end]
+                    returns = block.count(b"\r")
+                    found = block.count(b"\n") + (returns - block.count(b"\r\n") if returns else 0)
+                    if counted + found < lines:
+                        counted, offset = counted + found, end
+                        continue
+                    if step > self.locate_block:
+                        step = self.locate_block  # The row ends in this block, narrow it down
+                        continue
+                    for match in self.line_end.finditer(block):
+                        counted += 1
+                        if counted == lines:
+                            offset += match.end()
+                            break
+        self.scanned = (counted, offset)
+        return offset if counted >= lines else self.size
+
+    def is_gzip(self) -> bool:
+        """Checks whether the file is gzip-compressed."""
+        return self.path.suffix == ".gz"
+
+    def consumed(self) -> int:
+        """Returns number of (compressed) bytes consumed from the file, ahead of parsed rows by one read chunk."""
+        return self.raw.tell()
+
+    @staticmethod
+    def split(path: str, parts: int) -> List[Tuple[int, int]]:
+        """Splits uncompressed CSV file (without its header) into newline-aligned byte ranges."""
+        index = IceCatRowIndex(path)
+        if index.load():
+            return index.split(parts)  # Up-to-date newline index, no reads needed
+        size = Path(path).stat().st_size
+        with open(path, "rb") as f:
+            f.readline()
+            first = f.tell()
+            bounds = [first]
+            step = max((size - first) // max(parts, 1), 1)
+            for pos in range(first + step, size, step):
+                if pos <= bounds[-1]:
+                    continue
+                f.seek(pos - 1)
+                f.readline()
+                if f.tell() >= size:
+                    break
+                if f.tell() > bounds[-1]:
+                    bounds.append(f.tell())
+        bounds.append(size)
+        return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+    @staticmethod
+    def read_range(path: str, start: int, end: int) -> Iterator[List[str]]:
+        """Yields rows of uncompressed CSV file starting at byte 'start' (line start) up to byte 'end'."""
+        def lines():
+            with open(path, "rb") as f:
+                f.seek(start)
+                pos = start
+
+                def readline() -> str:
+                    nonlocal pos
+                    if pos >= end:
+                        return ""
+                    line = f.readline()
+                    pos += len(line)
+                    return line.decode("utf-8", errors="replace")
+
+                yield from iter(readline, "")
+
+        return csv.reader(lines(), delimiter="\t", quoting=csv.QUOTE_NONE)
+
+    @staticmethod
+    def read_partition(path: str, part: int, parts: int, id_pos: int) -> Iterator[List[str]]:
+        """
+        Yields rows of uncompressed CSV file whose integer ID (field id_pos) modulo 'parts' equals 'part'.
+        Lines of the partition are read at their offsets (see IceCatPartitionIndex), rows of other
+        partitions are neither read nor parsed. Rows without an integer ID belong to partition 0.
+        """
+        offsets = IceCatPartitionIndex.offsets_of(path, part, parts, id_pos)
+        return csv.reader(IceCatPartitionIndex.lines(path, offsets), delimiter="\t", quoting=csv.QUOTE_NONE)
+
+    def percent(self) -> float:
+        """Returns progress of reading in percent."""
+        if self.size <= 0:
+            return 100.0
+        return min(self.consumed() / self.size * 100, 100.0)
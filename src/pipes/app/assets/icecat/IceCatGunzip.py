@@ -0,0 +1,165 @@
+# app/assets/icecat/IceCatGunzip.py
+from typing import Callable, Optional, Tuple
+import hashlib
+import importlib
+import os
+import queue
+import threading
+import time
+import zlib
+
+
+class IceCatGunzip:
+    """
+    Pipelined gzip decompression: a reader thread reads large compressed blocks, the calling thread
+    inflates them and a writer thread writes the output, so disk reads, inflating and disk writes overlap
+    (the zlib implementations release the GIL while inflating). Uses the fastest available implementation
+    of zlib: isal (ISA-L), zlib-ng, or zlib of the standard library as fallback. Engine is selected by
+    DGS_GUNZIP_ENGINE ('auto', 'isal', 'zlib-ng' or 'zlib').
+    """
+
+    engines = {"isal": "isal.isal_zlib", "zlib-ng": "zlib_ng.zlib_ng", "zlib": "zlib"}
+    engine_default = os.getenv("DGS_GUNZIP_ENGINE", "auto")
+    block_mb_default = 4
+
+    def __init__(self, engine: str = engine_default, block_mb: int = block_mb_default, queue_size: int = 4):
+        self.engine, self.zlib = self.resolve(engine)
+        self.block = max(int(block_mb), 1) * 1024 * 1024
+        self.queue_size = max(int(queue_size), 1)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.elapsed = 0.0
+
+    @staticmethod
+    def resolve(engine: str):
+        """Returns name and module of the engine, the first available one for 'auto' (zlib if none)."""
+        if engine != "auto" and engine not in IceCatGunzip.engines:
+            raise ValueError(f"Unknown gzip engine: {engine}")
+        names = list(IceCatGunzip.engines) if engine == "auto" else [engine, "zlib"]
+        for name in names:
+            try:
+                return name, importlib.import_module(IceCatGunzip.engines[name])
+            except ImportError:
+                continue
+        return "zlib", zlib
+
+    def mb_per_sec(self) -> float:
+        """Throughput of the last decompression (uncompressed MB per second)."""
+        return self.bytes_out / (1024 * 1024) / self.elapsed if self.elapsed > 0 else 0.0
+
+    def gunzip(self, path_in: str, path_out: str) -> int:
+        """Decompresses gzip file (also multi-member) into the output file, returns number of bytes written."""
+        started = time.perf_counter()
+        self.bytes_in = self.bytes_out = 0
+        blocks: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        chunks: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        errors: list = []
+        stop = threading.Event()
+
+        # Queue operations give up once a stage failed (stop), so no thread waits forever
+        def put(q: queue.Queue, item: Optional[bytes]):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def get(q: queue.Queue) -> Optional[bytes]:
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return None
+
+        def run(stage: Callable):
+            try:
+                stage()
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        def read():
+            with open(path_in, "rb") as f:
+                while not stop.is_set():
+                    block = f.read(self.block)
+                    put(blocks, block or None)
+                    if not block:
+                        break
+
+        def write():
+            with open(path_out, "wb") as f:
+                while (chunk := get(chunks)) is not None:
+                    f.write(chunk)
+
+        def inflate():
+            self.inflate(lambda: get(blocks), lambda chunk: put(chunks, chunk))
+            put(chunks, None)
+
+        threads = [threading.Thread(target=run, args=(read,), name="gunzip-read", daemon=True),
+                   threading.Thread(target=run, args=(write,), name="gunzip-write", daemon=True)]
+        for thread in threads:
+            thread.start()
+        run(inflate)
+        for thread in threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - started
+        if errors:
+            raise errors[0]
+        return self.bytes_out
+
+    def digest(self, path_in: str) -> Tuple[str, int]:
+        """
+        Returns hash (blake2b-128) and number of lines of the uncompressed content, nothing is written.
+        Plain files (not gzip) are hashed as they are.
+        """
+        started = time.perf_counter()
+        self.bytes_in = self.bytes_out = 0
+        content = hashlib.blake2b(digest_size=16)
+        lines = 0
+        last = b"\n"
+
+        def update(chunk: bytes):
+            nonlocal lines, last
+            content.update(chunk)
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+
+        with open(path_in, "rb") as f:
+            if f.read(2) == b"\x1f\x8b":
+                f.seek(0)
+                self.inflate(lambda: f.read(self.block) or None, update)
+            else:
+                f.seek(0)
+                while block := f.read(self.block):
+                    self.bytes_in += len(block)
+                    self.bytes_out += len(block)
+                    update(block)
+        self.elapsed = time.perf_counter() - started
+        # Last line without trailing newline is a line too
+        return content.hexdigest(), lines + (0 if last == b"\n" else 1)
+
+    def inflate(self, next_block: Callable[[], Optional[bytes]], emit: Callable[[bytes], None]):
+        """Inflates compressed blocks, output is emitted in pieces of at most one block (bounded memory)."""
+        dec = self.zlib.decompressobj(16 + self.zlib.MAX_WBITS)
+        fed = False
+        while (data := next_block()) is not None:
+            self.bytes_in += len(data)
+            while data or fed:
+                fed = True
+                out = dec.decompress(data, self.block)
+                if out:
+                    self.bytes_out += len(out)
+                    emit(out)
+                if dec.eof:
+                    # Next member of a multi-member file
+                    data = dec.unused_data
+                    dec = self.zlib.decompressobj(16 + self.zlib.MAX_WBITS)
+                    fed = False
+                    continue
+                data = dec.unconsumed_tail
+                if not data and len(out) < self.block:
+                    break
+        if fed:
+            raise EOFError("Compressed file ended before the end-of-stream marker was reached")
@@ -0,0 +1,186 @@
+# app/assets/icecat/IceCatParquet.py
+from pathlib import Path
+from typing import Optional
+import gzip
+import os
+import shutil
+import time
+
+from dagster import get_dagster_logger
+
+from .IceCatUtf8Stream import IceCatUtf8Stream
+
+
+class IceCatParquet:
+    """
+    Converts IceCat CSV file (plain or *.gz) into a typed, compressed Parquet dataset (hive-partitioned).
+    The file is streamed in record batches, so memory stays bounded by the block size, not the file size.
+    Requires the optional pyarrow package.
+    """
+
+    # Typed columns of the IceCat index, other columns are strings (not inferred: codes keep leading zeros)
+    column_types = {
+        "product_id": "int64",
+        "supplier_id": "int32",
+        "m_supplier_id": "int32",
+        "catid": "int32",
+        "on_market": "int8",
+        "product_view": "int64",
+        "high_pic_size": "int64",
+        "high_pic_width": "int32",
+        "high_pic_height": "int32",
+        "updated": "timestamp",
+        "quality": "dictionary",
+    }
+    timestamp_format = "%Y%m%d%H%M%S"
+    progress_interval = 10  # batches
+
+    def __init__(self, path_csv: str, path_output: str, partition_by: Optional[str] = None,
+                 partition_format: str = "%Y-%m", partition_buckets: int = 0, block_mb: int = 16,
+                 compression: str = "zstd", max_rows_per_file: int = 1_000_000, max_partitions: int = 4096):
+        self.path_csv = Path(path_csv)
+        self.path_output = Path(path_output)
+        self.partition_by = partition_by or None
+        self.partition_format = partition_format
+        self.partition_buckets = partition_buckets
+        self.block_mb = block_mb
+        self.compression = compression
+        self.max_rows_per_file = max_rows_per_file
+        self.max_partitions = max_partitions
+        self.logger = get_dagster_logger()
+        self.rows = 0
+        self.bad_rows = 0
+        self.batches_count = 0
+        self.partition_column: Optional[str] = None
+
+    @staticmethod
+    def require():
+        """Imports the optional dependency, with a readable error if it is not installed."""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("The icecat_parquet asset requires pyarrow (pip install pyarrow)") from e
+
+    @staticmethod
+    def arrow_type(name: str):
+        import pyarrow as pa
+        if name == "timestamp":
+            return pa.timestamp("s")
+        if name == "dictionary":
+            return pa.dictionary(pa.int32(), pa.string())
+        return getattr(pa, name)()
+
+    def header(self) -> list:
+        """Returns names of the columns (first line of the file)."""
+        opener = gzip.open if self.path_csv.suffix == ".gz" else open
+        with opener(self.path_csv, "rt", encoding="utf-8", errors="replace", newline="") as f:
+            return f.readline().rstrip("\r\n").split("\t")
+
+    def skip_row(self, row) -> str:
+        """Skips rows with incorrect number of fields (same rule as the other IceCat parsers)."""
+        self.bad_rows += 1
+        return "skip"
+
+    def with_partition(self, batch):
+        """Adds the derived partition column (formatted timestamp, or bucket of an ID) to the batch."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        column = batch.column(self.partition_by)
+        if pa.types.is_timestamp(column.type):
+            key = pc.fill_null(pc.strftime(column, format=self.partition_format), "unknown")
+        else:
+            # ID modulo number of buckets (integer division truncates)
+            value = pc.fill_null(pc.abs(pc.cast(column, pa.int64())), 0)
+            key = pc.cast(pc.subtract(value, pc.multiply(pc.divide(value, self.partition_buckets),
+                                                         self.partition_buckets)), pa.int32())
+        return pa.RecordBatch.from_arrays(batch.columns + [key], names=batch.schema.names + [self.partition_column])
+
+    def convert(self) -> dict:
+        """Writes the dataset into a temporary directory and replaces the output directory when complete."""
+        self.require()
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        import pyarrow.dataset as ds
+
+        started = time.perf_counter()
+        size = self.path_csv.stat().st_size or 1
+        stream = IceCatUtf8Stream(str(self.path_csv))
+        reader = pa_csv.open_csv(
+            stream,
+            read_options=pa_csv.ReadOptions(block_size=self.block_mb * 1024 * 1024),
+            parse_options=pa_csv.ParseOptions(delimiter="\t", quote_char=False, invalid_row_handler=self.skip_row),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={name: self.arrow_type(self.column_types.get(name, "string")) for name in self.header()},
+                timestamp_parsers=[self.timestamp_format],
+            ),
+        )
+        schema = reader.schema
+        partitioning = None
+        if self.partition_by:
+            if self.partition_by not in schema.names:
+                raise ValueError(f"Unknown partition column: {self.partition_by}")
+            field = schema.field(self.partition_by)
+            if pa.types.is_timestamp(field.type):
+                self.partition_column = f"{self.partition_by}_key"
+                schema = schema.append(pa.field(self.partition_column, pa.string()))
+            elif self.partition_buckets > 0:
+                if not pa.types.is_integer(field.type):
+                    raise ValueError(f"Buckets require integer partition column: {self.partition_by}")
+                self.partition_column = f"{self.partition_by}_bucket"
+                schema = schema.append(pa.field(self.partition_column, pa.int32()))
+            else:
+                self.partition_column = self.partition_by
+            partitioning = ds.partitioning(pa.schema([schema.field(self.partition_column)]), flavor="hive")
+
+        def batches():
+            for batch in reader:
+                self.rows += batch.num_rows
+                self.batches_count += 1
+                if self.batches_count % self.progress_interval == 0:
+                    percent = min(stream.consumed() / size * 100, 100.0)
+                    self.logger.info(f"Converted {percent:5.1f}%  |  {self.rows:,} rows")
+                yield self.with_partition(batch) if self.partition_column != self.partition_by else batch
+
+        path_tmp = self.path_output.with_name(f"{self.path_output.name}.part")
+        shutil.rmtree(path_tmp, ignore_errors=True)
+        try:
+            ds.write_dataset(
+                batches(),
+                schema=schema,
+                base_dir=str(path_tmp),
+                format="parquet",
+                partitioning=partitioning,
+                file_options=ds.ParquetFileFormat().make_write_options(compression=self.compression),
+                max_rows_per_file=self.max_rows_per_file,
+                max_rows_per_group=min(self.max_rows_per_file, 128 * 1024),
+                max_partitions=self.max_partitions,
+                basename_template="part-{i}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+        except Exception:
+            shutil.rmtree(path_tmp, ignore_errors=True)
+            raise
+        finally:
+            stream.close()
+        self.replace_output(path_tmp)
+
+        files = [p for p in self.path_output.rglob("*.parquet")]
+        return {
+            "output_dir": str(self.path_output),
+            "rows": self.rows,
+            "bad_rows": self.bad_rows,
+            "files": len(files),
+            "partitions": len({p.parent for p in files}),
+            "bytes": sum(p.stat().st_size for p in files),
+            "elapsed": time.perf_counter() - started,
+            "schema": schema.to_string(show_schema_metadata=False),
+        }
+
+    def replace_output(self, path_tmp: Path):
+        """Swaps the new dataset in place, readers see either the old or the new one."""
+        path_old = self.path_output.with_name(f"{self.path_output.name}.old")
+        shutil.rmtree(path_old, ignore_errors=True)
+        if self.path_output.exists():
+            os.replace(self.path_output, path_old)
+        os.replace(path_tmp, self.path_output)
+        shutil.rmtree(path_old, ignore_errors=True)
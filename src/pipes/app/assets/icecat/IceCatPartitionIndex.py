@@ -0,0 +1,103 @@
+# app/assets/icecat/IceCatPartitionIndex.py
+from array import array
+from pathlib import Path
+from typing import Iterator, List
+import json
+import mmap
+import os
+
+from .file_lock import file_lock
+
+
+class IceCatPartitionIndex:
+    """
+    Line offsets of uncompressed IceCat CSV file grouped by hash partition (integer ID modulo 'parts'),
+    persisted in a sidecar file (icecat.data.csv.p16.idx) next to the newline index (see IceCatRowIndex).
+    Built once by the first partition in one pass over the file (under a file lock), every partition
+    then reads only its own lines instead of scanning the whole file. Rows without an integer ID belong
+    to partition 0.
+    """
+
+    version = 1
+
+    def __init__(self, path: str, parts: int, id_pos: int):
+        self.path = Path(path)
+        self.path_index = self.path.with_name(f"{self.path.name}.p{parts}.idx")
+        self.parts = parts
+        self.id_pos = id_pos
+
+    @staticmethod
+    def offsets_of(path: str, part: int, parts: int, id_pos: int) -> array:
+        """Returns line offsets of the partition, the index is built (and stored) first if missing or outdated."""
+        index = IceCatPartitionIndex(path, parts, id_pos)
+        offsets = index.load(part)
+        if offsets is None:
+            with file_lock(index.path):
+                # Another partition may have built it meanwhile
+                offsets = index.load(part)
+                if offsets is None:
+                    offsets = index.build()[part]
+        return offsets
+
+    def header_matches(self, header: dict) -> bool:
+        stat = self.path.stat()
+        return (header.get("version") == self.version and header.get("parts") == self.parts
+                and header.get("id_pos") == self.id_pos and header.get("size") == stat.st_size
+                and header.get("mtime_ns") == stat.st_mtime_ns)
+
+    def load(self, part: int):
+        """Loads offsets of one partition from the sidecar file, None if missing, broken or outdated."""
+        try:
+            with open(self.path_index, "rb") as f:
+                header = json.loads(f.readline())
+                if not self.header_matches(header):
+                    return None
+                counts = header["counts"]
+                f.seek(sum(counts[:part]) * 8, os.SEEK_CUR)
+                offsets = array("q")
+                offsets.fromfile(f, counts[part])
+        except (OSError, ValueError, KeyError, IndexError, EOFError):
+            return None
+        return offsets
+
+    def build(self) -> List[array]:
+        """Reads the file once, records the offset of each line in its partition and stores the index."""
+        stat = self.path.stat()
+        parts = [array("q") for _ in range(self.parts)]
+        id_pos = self.id_pos
+        with open(self.path, "rb") as f:
+            pos = len(f.readline())  # Header
+            for line in f:
+                try:
+                    key = int(line.split(b"\t", id_pos + 1)[id_pos]) % self.parts
+                except (IndexError, ValueError):
+                    key = 0
+                parts[key].append(pos)
+                pos += len(line)
+        self.save(parts, stat)
+        return parts
+
+    def save(self, parts: List[array], stat: os.stat_result):
+        """Stores the index atomically next to the file, a read-only directory only disables the sidecar."""
+        try:
+            tmp_path = self.path_index.with_name(f"{self.path_index.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps({"version": self.version, "parts": self.parts, "id_pos": self.id_pos,
+                                    "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                    "counts": [len(offsets) for offsets in parts]}).encode("utf-8") + b"\n")
+                for offsets in parts:
+                    offsets.tofile(f)
+            os.replace(tmp_path, self.path_index)
+        except OSError:
+            pass
+
+    @staticmethod
+    def lines(path: str, offsets: array) -> Iterator[str]:
+        """Yields lines of the file starting at the offsets (memory-mapped, no scan of other lines)."""
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for offset in offsets:
+                    end = mm.find(b"\n", offset)
+                    yield mm[offset:end + 1 if end >= 0 else len(mm)].decode("utf-8", errors="replace")
@@ -0,0 +1,150 @@
+# app/assets/icecat/IceCatRowIndex.py
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Optional, Tuple
+import json
+import mmap
+import os
+import random
+
+
+class IceCatRowIndex:
+    """
+    Newline index of uncompressed IceCat CSV file, persisted in a sidecar file (icecat.data.csv.idx).
+    Built in one pass over the memory-mapped file: newlines are counted per block by bytes.count,
+    no Python object is created per line. Stores one entry per block (offset of the first line starting
+    in the block, number of lines before it), so row count is O(1) on repeat runs and row N is reached
+    by seeking to its block and skipping the remaining lines.
+    """
+
+    block_default = 1024 * 1024
+    version = 1
+
+    def __init__(self, path: str, block: int = block_default):
+        self.path = Path(path)
+        self.path_index = self.path.with_name(f"{self.path.name}.idx")
+        self.block = block
+        self.size = 0
+        self.mtime_ns = 0
+        self.lines = 0
+        self.offsets = array("q")
+        self.line_nos = array("q")
+
+    @staticmethod
+    def make(path: str, block: int = block_default) -> 'IceCatRowIndex':
+        """Returns index of the file, loaded from the sidecar file if up to date, built (and stored) otherwise."""
+        index = IceCatRowIndex(path, block=block)
+        if not index.load():
+            index.build()
+            index.save()
+        return index
+
+    @property
+    def rows(self) -> int:
+        """Number of rows without the header (-1 for an empty file, as count_rows_in_file)."""
+        return self.lines - 1
+
+    def load(self) -> bool:
+        """Loads the sidecar file. Missing, broken or outdated (file changed) index is not loaded."""
+        stat = self.path.stat()
+        try:
+            with open(self.path_index, "rb") as f:
+                header = json.loads(f.readline())
+                if (header.get("version") != self.version or header.get("block") != self.block
+                        or header.get("size") != stat.st_size or header.get("mtime_ns") != stat.st_mtime_ns):
+                    return False
+                count = int(header["count"])
+                offsets = array("q")
+                line_nos = array("q")
+                offsets.fromfile(f, count)
+                line_nos.fromfile(f, count)
+        except (OSError, ValueError, KeyError, EOFError):
+            return False
+        self.size, self.mtime_ns, self.lines = stat.st_size, stat.st_mtime_ns, int(header["lines"])
+        self.offsets, self.line_nos = offsets, line_nos
+        return True
+
+    def build(self):
+        """Counts lines of the memory-mapped file block by block, recording the first line start of each block."""
+        stat = self.path.stat()
+        self.size, self.mtime_ns = stat.st_size, stat.st_mtime_ns
+        self.offsets = array("q", [0])
+        self.line_nos = array("q", [0])
+        if self.size == 0:
+            self.lines = 0
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            count = 0
+            for boundary in range(self.block, self.size, self.block):
+                if boundary < start:
+                    continue  # Line longer than a block
+                found = mm.find(b"\n", boundary)
+                if found < 0 or found + 1 >= self.size:
+                    break
+                count += mm[start:found + 1].count(b"\n")
+                start = found + 1
+                self.offsets.append(start)
+                self.line_nos.append(count)
+            count += mm[start:].count(b"\n")
+            last = mm[self.size - 1:self.size]
+        # Last line without trailing newline is a line too
+        self.lines = count + (0 if last == b"\n" else 1)
+
+    def save(self):
+        """Stores the index atomically next to the file, a read-only directory only disables the sidecar."""
+        try:
+            tmp_path = self.path_index.with_name(f"{self.path_index.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps({"version": self.version, "block": self.block, "size": self.size,
+                                    "mtime_ns": self.mtime_ns, "lines": self.lines,
+                                    "count": len(self.offsets)}).encode("utf-8") + b"\n")
+                self.offsets.tofile(f)
+                self.line_nos.tofile(f)
+            os.replace(tmp_path, self.path_index)
+        except OSError:
+            pass
+
+    def line_offset(self, line_no: int, mm=None) -> int:
+        """Returns byte offset of the line (0 is the header)."""
+        if not 0 <= line_no < self.lines:
+            raise IndexError(f"Line out of range: {line_no}")
+        pos = bisect_right(self.line_nos, line_no) - 1
+        offset = self.offsets[pos]
+        skip = line_no - self.line_nos[pos]
+        if skip == 0:
+            return offset
+        if mm is None:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self.line_offset(line_no, mm)
+        for _ in range(skip):
+            offset = mm.find(b"\n", offset) + 1
+        return offset
+
+    def row(self, row_no: int) -> List[str]:
+        """Returns fields of the data row (0 is the first row after the header)."""
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offset = self.line_offset(row_no + 1, mm)
+            end = mm.find(b"\n", offset)
+            line = mm[offset:end if end >= 0 else self.size]
+        return line.decode("utf-8", errors="replace").rstrip("\r").split("\t")
+
+    def sample(self, count: int, seed: Optional[int] = None) -> List[List[str]]:
+        """Returns random data rows (e.g. for inspecting a large file without reading all of it)."""
+        rows = random.Random(seed).sample(range(max(self.rows, 0)), min(count, max(self.rows, 0)))
+        return [self.row(row_no) for row_no in sorted(rows)]
+
+    def split(self, parts: int) -> List[Tuple[int, int]]:
+        """Splits the file (without its header) into line-aligned byte ranges at block entries, without reading it."""
+        if self.lines <= 1:
+            return []
+        first = self.line_offset(1)
+        step = max((self.size - first) // max(parts, 1), 1)
+        bounds = [first]
+        for target in range(first + step, self.size, step):
+            offset = self.offsets[bisect_right(self.offsets, target) - 1]
+            if offset > bounds[-1]:
+                bounds.append(offset)
+        bounds.append(self.size)
+        return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
@@ -0,0 +1,44 @@
+# app/assets/icecat/IceCatUtf8Stream.py
+import codecs
+import gzip
+import io
+
+
+class IceCatUtf8Stream(io.RawIOBase):
+    """
+    Binary stream of IceCat CSV file (plain or *.gz) with invalid UTF-8 replaced (U+FFFD),
+    the same way as IceCatCsvReader decodes it. Lets byte-oriented parsers (Arrow) read broken rows.
+    """
+
+    def __init__(self, path: str, chunk: int = 1024 * 1024):
+        self.raw = open(path, "rb")
+        self.stream = gzip.GzipFile(fileobj=self.raw, mode="rb") if str(path).endswith(".gz") else self.raw
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self.chunk = chunk
+        self.pending = b""
+        self.pos = 0
+        self.eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self.pos >= len(self.pending) and not self.eof:
+            data = self.stream.read(self.chunk)
+            self.eof = not data
+            self.pending = self.decoder.decode(data, final=self.eof).encode("utf-8")
+            self.pos = 0
+        size = min(len(buffer), len(self.pending) - self.pos)
+        buffer[:size] = self.pending[self.pos:self.pos + size]
+        self.pos += size
+        return size
+
+    def consumed(self) -> int:
+        """Returns number of (compressed) bytes consumed from the file."""
+        return self.raw.tell()
+
+    def close(self):
+        if not self.closed:
+            self.stream.close()
+            self.raw.close()
+        super().close()
@@ -0,0 +1,18 @@
+# app/assets/icecat/file_lock.py
+from contextlib import contextmanager
+from pathlib import Path
+import fcntl
+
+
+@contextmanager
+def file_lock(path: Path):
+    """
+    Exclusive lock of the file across processes (lock file <path>.lock), e.g. partitions of an asset
+    extracting or indexing the same file: the first one does the work, the others wait and reuse it.
+    """
+    with open(f"{path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -7,7 +7,7 @@ from .icecat.IceCatCsv import IceCatCsv
 @asset(
     group_name="icecat",
     tags={"group": "icecat"},
-    description="Returns IceCat CSV file. If missing tries to download it.",
+    description="Returns IceCat CSV file (gzip-compressed, parsed as a stream). If missing tries to download it.",
     required_resource_keys={"icecat_creds"},
 )
 def icecat_csv(context):
@@ -18,7 +18,7 @@ def icecat_csv(context):
     if not usr or not psw:
         raise ValueError("icecat_user configuration is missing username and/or password")
     ice_cat = IceCatCsv.make(username=usr, password=psw)
-    gz_path = ice_cat.get()
+    gz_path = ice_cat.get_zipped()
     path = Path(gz_path)
     if not path.exists():
         logger.error(f"File was not found: {gz_path}")
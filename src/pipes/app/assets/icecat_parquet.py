@@ -0,0 +1,79 @@
+# app/assets/icecat_parquet.py
+from dagster import asset, get_dagster_logger, Output, Config
+from pydantic import Field
+
+from .icecat.IceCatParquet import IceCatParquet
+
+
+class ICParquetConf(Config):
+    """Configuration for the icecat_parquet asset."""
+    output_dir: str = Field(
+        default="/data/share/out/icecat/parquet",
+        description="Directory of the Parquet dataset (replaced when the conversion completes)"
+    )
+    partition_by: str = Field(
+        default="updated",
+        description="Column to partition the dataset by (hive layout), empty for no partitioning"
+    )
+    partition_format: str = Field(
+        default="%Y-%m",
+        description="Format of the partition key when partitioning by a timestamp column (strftime)"
+    )
+    partition_buckets: int = Field(
+        default=0,
+        description="Number of buckets (ID modulo N) when partitioning by an integer column, 0 uses the values"
+    )
+    block_mb: int = Field(
+        default=16,
+        description="Size of the CSV blocks converted into record batches (bounds memory use)"
+    )
+    max_rows_per_file: int = Field(
+        default=1_000_000,
+        description="Maximum number of rows in one Parquet file"
+    )
+    compression: str = Field(
+        default="zstd",
+        description="Parquet compression codec: zstd, snappy, gzip, lz4, brotli or none"
+    )
+
+
+@asset(
+    group_name="icecat",
+    tags={"group": "icecat"},
+    compute_kind="parquet",
+    description="Columnar export of the IceCat CSV file: typed, compressed, partitioned Parquet dataset.",
+)
+def icecat_parquet(config: ICParquetConf, icecat_csv: str) -> Output:
+    """Converts the IceCat CSV file into Parquet in record batches (requires pyarrow)."""
+    logger = get_dagster_logger()
+    converter = IceCatParquet(
+        icecat_csv,
+        config.output_dir,
+        partition_by=config.partition_by,
+        partition_format=config.partition_format,
+        partition_buckets=config.partition_buckets,
+        block_mb=config.block_mb,
+        compression=config.compression,
+        max_rows_per_file=config.max_rows_per_file,
+    )
+    stats = converter.convert()
+    elapsed = stats["elapsed"]
+    logger.info(f"Converted {stats['rows']:,} rows into {stats['files']} files ({stats['partitions']} partitions) "
+                f"in {elapsed:.2f} s, skipped {stats['bad_rows']:,} malformed rows")
+    return Output(
+        value=stats["output_dir"],
+        metadata={
+            "output_dir": stats["output_dir"],
+            "rows_written": stats["rows"],
+            "rows_skipped": stats["bad_rows"],
+            "files": stats["files"],
+            "partitions": stats["partitions"],
+            "size_mb": round(stats["bytes"] / (1024 ** 2), 2),
+            "elapsed_sec": round(elapsed, 3),
+            "rows_per_sec": round(stats["rows"] / elapsed, 2) if elapsed > 0 else 0,
+            "schema": stats["schema"],
+        },
+    )
+
+
+__all__ = ["icecat_parquet"]
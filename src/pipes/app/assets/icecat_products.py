@@ -0,0 +1,93 @@
+# app/assets/icecat_products.py
+import time
+
+from dagster import asset, get_dagster_logger, Output, Config, StaticPartitionsDefinition
+from pydantic import Field
+
+from jobs.icecat.ICMetaWriter import ICMetaWriter
+from jobs.icecat.ICRowBatches import ICRowBatches
+from resources.pg.PgStorageRs import PgStorageRs
+from .icecat.IceCatCsv import IceCatCsv
+from .icecat.IceCatCsvReader import IceCatCsvReader
+
+# Hash partitions of product_id (product_id % 16), a product always belongs to the same partition
+IC_PRODUCTS_PARTITIONS = StaticPartitionsDefinition([f"{part:02d}" for part in range(16)])
+
+
+class ICProductsConf(Config):
+    """Configuration for the icecat_products asset."""
+    mode: str = Field(
+        default="copy",
+        description="Loading mode: 'copy' (COPY into staging table + set-based merge), "
+                    "'batch' (saveIceCatProductMetaBatch per batch, unchanged products are skipped) "
+                    "or 'function' (saveIceCatProductMeta per row)"
+    )
+    copy_batch: int = Field(
+        default=50_000,
+        description="Number of rows streamed by one COPY before merging (mode 'copy')"
+    )
+    parse_batch: int = Field(
+        default=1_000,
+        description="Number of CSV rows parsed together as columns (field counts, IDs and JSON per block)"
+    )
+
+
+@asset(
+    partitions_def=IC_PRODUCTS_PARTITIONS,
+    group_name="icecat",
+    tags={"group": "icecat"},
+    compute_kind="postgresql",
+    required_resource_keys={"db_storage"},
+    description="IceCat product metadata in the database, hash-partitioned by product_id "
+                "(partitions are loaded, retried and backfilled independently).",
+)
+def icecat_products(context, config: ICProductsConf, icecat_csv: str) -> Output:
+    """Loads products of one partition from the IceCat CSV file into the database."""
+    logger = get_dagster_logger()
+    part = int(context.partition_key)
+    parts = len(IC_PRODUCTS_PARTITIONS.get_partition_keys())
+    if config.mode not in ("copy", "batch", "function"):
+        raise ValueError(f"Unknown loading mode: {config.mode}")
+    db: PgStorageRs = context.resources.db_storage
+
+    started = time.perf_counter()
+    plain_path = IceCatCsv.unzip(icecat_csv)
+    with IceCatCsv.reader(plain_path) as reader:
+        headers = reader.headers
+    if headers is None:
+        raise ValueError("No header found in CSV file.")
+    if "product_id" not in headers:
+        raise ValueError("Missing column: product_id")
+
+    logger.info(f"Loading partition {part + 1}/{parts} (product_id % {parts} = {part}) of {plain_path}...")
+    batches = ICRowBatches(headers, size=config.parse_batch)
+    rows = IceCatCsvReader.read_partition(plain_path, part, parts, headers.index("product_id"))
+    processed = bad_rows = 0
+    with db.conf() as cn:
+        writer = ICMetaWriter(cn, mode=config.mode, copy_batch=config.copy_batch)
+        for batch in batches.batches(rows):
+            processed += batch.processed
+            bad_rows += batch.bad_rows
+            if batch.rows:
+                writer.add_many(batches.int_ids(batch), batches.payloads(batch))
+        writer.flush()
+        writer.close()
+    elapsed = time.perf_counter() - started
+    logger.info(f"Partition {context.partition_key}: {writer.inserted:,} products loaded in {elapsed:.1f}s, "
+                f"{bad_rows:,} rows skipped")
+    return Output(
+        value=writer.inserted,
+        metadata={
+            "partition": context.partition_key,
+            "rows_processed": processed,
+            "rows_skipped": bad_rows,
+            "rows_inserted": writer.inserted,
+            "rows_unchanged": writer.unchanged,
+            "load_mode": config.mode,
+            "elapsed_sec": round(elapsed, 2),
+            "rows_per_sec": round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+        },
+    )
+
+
+__all__ = ["icecat_products"]
@@ -37,7 +37,7 @@ def save_storage_db_cnf(context):
         f"• Database: {temp_storage.database}\n"
         f"• User:     {temp_storage.user}\n"
         f"• Schema:   {temp_storage.db_schema}\n\n"
-        "→ **Restart the Dagster process** (or wait for new run in serverless) to use the new connection."
+        "→ Running processes pick up the new connection on their next run (cached configuration is invalidated)."
     )
     logger.info(summary)
     return summary
@@ -0,0 +1,164 @@
+# app/auto_load/DefsManifest.py
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, List, Optional
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+
+import dagster
+from dagster import (AssetsDefinition, AssetSpec, JobDefinition, ResourceDefinition, ScheduleDefinition,
+                     SensorDefinition, SourceAsset)
+
+from auto_load.StartupProfile import StartupProfile
+
+
+class DefsManifest:
+    """
+    Manifest of the modules of a package and the kinds of Dagster definitions they export (job, asset, ...).
+    Shared by the auto_load_* helpers: the package is scanned once per process, and only modules that export
+    definitions of the requested kind are imported. The manifest is cached on disk (DGS_DEFS_CACHE directory,
+    default: system temp) and a module is inspected again only when its size/mtime and content hash change.
+    """
+
+    kinds = {
+        "job": (JobDefinition,),
+        "schedule": (ScheduleDefinition,),
+        "sensor": (SensorDefinition,),
+        "resource": (ResourceDefinition,),
+        "asset": (AssetsDefinition, SourceAsset, AssetSpec),
+    }
+    cache_dir = os.getenv("DGS_DEFS_CACHE") or os.path.join(tempfile.gettempdir(), "dagster_defs")
+    version = f"1/{dagster.__version__}/{sys.version_info.major}.{sys.version_info.minor}"
+
+    _manifests: Dict[str, 'DefsManifest'] = {}
+
+    def __init__(self, package_name: str, skip_import_errors: bool = False):
+        spec = importlib.util.find_spec(package_name)
+        if spec is None or not spec.submodule_search_locations:
+            raise ValueError(f"Not a package: {package_name}")
+        self.package_name = package_name
+        self.path = Path(list(spec.submodule_search_locations)[0]).resolve()
+        self.skip_import_errors = skip_import_errors
+        digest = hashlib.sha1(str(self.path).encode("utf-8")).hexdigest()[:12]
+        self.cache_path = Path(self.cache_dir) / f"{package_name}.{digest}.json"
+        self.files: Dict[str, dict] = {}
+        self.dirty = False
+
+    @staticmethod
+    def get(package_name: str, skip_import_errors: bool = False) -> 'DefsManifest':
+        """Returns manifest of the package, scanned (or loaded from cache) once per process."""
+        manifest = DefsManifest._manifests.get(package_name)
+        if manifest is None:
+            manifest = DefsManifest(package_name, skip_import_errors=skip_import_errors)
+            with StartupProfile.section(f"scan {package_name}"):
+                manifest.scan()
+            DefsManifest._manifests[package_name] = manifest
+        return manifest
+
+    @staticmethod
+    def load(package_name: str, kind: str, skip_import_errors: bool = False) -> List[ModuleType]:
+        """Imports and returns modules of the package exporting definitions of given kind."""
+        manifest = DefsManifest.get(package_name, skip_import_errors=skip_import_errors)
+        modules = []
+        for module_name, names in manifest.modules(kind, names=True):
+            try:
+                with StartupProfile.section(f"load {kind} {module_name}", definitions=names, kind=kind):
+                    modules.append(importlib.import_module(module_name))
+            except ImportError:
+                if not skip_import_errors:
+                    raise
+        return modules
+
+    def modules(self, kind: str, names: bool = False) -> list:
+        """Returns names of modules exporting definitions of given kind (with the names of definitions)."""
+        if kind not in self.kinds:
+            raise ValueError(f"Unknown kind of definitions: {kind}")
+        found = [(entry["module"], entry["exports"][kind])
+                 for entry in self.files.values() if entry["exports"].get(kind)]
+        return found if names else [module_name for module_name, _ in found]
+
+    def walk(self, path: Path, prefix: str):
+        """Yields (file, module name) in the order of pkgutil.walk_packages, starting with the package itself."""
+        init = path / "__init__.py"
+        if init.exists():
+            yield init, prefix
+        for entry in sorted(os.listdir(path)):
+            child = path / entry
+            if child.is_dir():
+                if entry.isidentifier() and (child / "__init__.py").exists():
+                    yield from self.walk(child, f"{prefix}.{entry}")
+            elif entry.endswith(".py") and entry != "__init__.py" and entry[:-3].isidentifier():
+                yield child, f"{prefix}.{entry[:-3]}"
+
+    def scan(self):
+        """Builds the manifest, modules with unchanged files are taken from the cache without importing."""
+        cached = self.read_cache()
+        for file_path, module_name in self.walk(self.path, self.package_name):
+            key = str(file_path.relative_to(self.path))
+            stat = file_path.stat()
+            entry = cached.get(key)
+            if entry is not None and entry["module"] == module_name:
+                if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                    self.files[key] = entry
+                    continue
+                # Touched but identical content (checkout, copy into the image) keeps its exports
+                sha1 = hashlib.sha1(file_path.read_bytes()).hexdigest()
+                if entry["sha1"] == sha1:
+                    self.files[key] = {**entry, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+                    self.dirty = True
+                    continue
+            exports = self.inspect(module_name)
+            if exports is None:
+                continue  # Not cached, next start tries again
+            self.files[key] = {
+                "module": module_name,
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha1": hashlib.sha1(file_path.read_bytes()).hexdigest(),
+                "exports": exports,
+            }
+            self.dirty = True
+        if self.dirty or set(cached) != set(self.files):
+            self.write_cache()
+
+    def inspect(self, module_name: str) -> Optional[Dict[str, List[str]]]:
+        """Imports the module and returns names of its attributes by kind of definition."""
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            if not self.skip_import_errors:
+                raise
+            return None
+        exports: Dict[str, List[str]] = {}
+        for name in dir(module):
+            obj = getattr(module, name, None)
+            for kind, types in self.kinds.items():
+                if isinstance(obj, types):
+                    exports.setdefault(kind, []).append(name)
+        return exports
+
+    def read_cache(self) -> Dict[str, dict]:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != self.version or data.get("path") != str(self.path):
+            return {}
+        return data.get("files", {})
+
+    def write_cache(self):
+        """Stores the manifest atomically, a read-only or missing cache directory only disables caching."""
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps({"version": self.version, "path": str(self.path), "files": self.files}),
+                                encoding="utf-8")
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+        self.dirty = False
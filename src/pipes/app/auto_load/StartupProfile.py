@@ -0,0 +1,179 @@
+# app/auto_load/StartupProfile.py
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+import importlib.abc
+import json
+import os
+import sys
+import threading
+import time
+
+
+class _TimedLoader:
+    """Proxy of a module loader measuring execution of the module (the import itself)."""
+
+    def __init__(self, loader, profile: 'StartupProfile'):
+        self._loader = loader
+        self._profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self._profile.frame(module.__name__, "import"):
+            self._loader.exec_module(module)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Finder placed first on sys.meta_path, wraps loaders found by the other finders."""
+
+    def __init__(self, profile: 'StartupProfile'):
+        self.profile = profile
+
+    def find_spec(self, fullname, path, target=None):
+        if threading.get_ident() != self.profile.thread:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, self.profile)
+            return spec
+        return None
+
+
+class StartupProfile:
+    """
+    Opt-in profiling of the code location start: per-module import time and time spent in named sections
+    (package scans, loading of definitions, construction of resources and Definitions).
+    Enabled by DGS_PROFILE_STARTUP (output directory, or 1 for the default one). Writes JSON report and
+    folded stacks (flamegraph.pl, speedscope), compare two reports with:
+
+        python -m auto_load.StartupProfile old.json new.json
+    """
+
+    dir_default = "/data/share/out/startup_profile"
+
+    _active: Optional['StartupProfile'] = None
+
+    def __init__(self, path_output: str):
+        self.path_output = Path(path_output)
+        self.thread = threading.get_ident()
+        self.started = time.perf_counter()
+        self.stack: List[list] = []
+        self.frames: List[dict] = []
+        self.folded: Dict[str, float] = {}
+        self.definitions: List[dict] = []
+        self.finder = _ImportTimer(self)
+
+    @staticmethod
+    def start(root: str = "definitions"):
+        """Starts profiling if enabled by the environment (no-op otherwise)."""
+        value = os.getenv("DGS_PROFILE_STARTUP", "").strip()
+        if not value or value.lower() in ("0", "false", "no") or StartupProfile._active is not None:
+            return
+        path_output = StartupProfile.dir_default if value.lower() in ("1", "true", "yes") else value
+        profile = StartupProfile(path_output)
+        profile.push(root, "section")
+        sys.meta_path.insert(0, profile.finder)
+        StartupProfile._active = profile
+
+    @staticmethod
+    def finish() -> Optional[str]:
+        """Stops profiling and writes the report, returns its path."""
+        profile = StartupProfile._active
+        if profile is None:
+            return None
+        StartupProfile._active = None
+        if profile.finder in sys.meta_path:
+            sys.meta_path.remove(profile.finder)
+        while profile.stack:
+            profile.pop()
+        return profile.write()
+
+    @staticmethod
+    @contextmanager
+    def section(name: str, definitions: Optional[List[str]] = None, kind: Optional[str] = None):
+        """Measures named part of the start, optionally attributing its time to given definitions."""
+        profile = StartupProfile._active
+        if profile is None or threading.get_ident() != profile.thread:
+            yield
+            return
+        with profile.frame(name, "section") as frame:
+            yield
+        if definitions:
+            for definition in definitions:
+                profile.definitions.append({"kind": kind, "name": definition, "section": name,
+                                            "ms": frame["cumulative_ms"]})
+
+    @contextmanager
+    def frame(self, name: str, kind: str):
+        frame = self.push(name, kind)
+        try:
+            yield frame
+        finally:
+            self.pop()
+
+    def push(self, name: str, kind: str) -> dict:
+        frame = {"name": name, "kind": kind, "depth": len(self.stack),
+                 "parent": self.stack[-1][0]["name"] if self.stack else None}
+        self.stack.append([frame, time.perf_counter(), 0.0])
+        return frame
+
+    def pop(self):
+        frame, started, children = self.stack.pop()
+        elapsed = time.perf_counter() - started
+        frame["cumulative_ms"] = round(elapsed * 1000, 3)
+        frame["self_ms"] = round((elapsed - children) * 1000, 3)
+        if self.stack:
+            self.stack[-1][2] += elapsed
+        path = ";".join([f[0]["name"] for f in self.stack] + [frame["name"]])
+        self.folded[path] = self.folded.get(path, 0.0) + elapsed - children
+        self.frames.append(frame)
+
+    def write(self) -> str:
+        self.path_output.mkdir(parents=True, exist_ok=True)
+        name = f"startup_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pid": os.getpid(),
+            "python": sys.version.split()[0],
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "frames": sorted(self.frames, key=lambda f: -f["cumulative_ms"]),
+            "definitions": self.definitions,
+        }
+        json_path = self.path_output / f"{name}.json"
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        # Folded stacks, values in microseconds
+        with open(self.path_output / f"{name}.folded", "w", encoding="utf-8") as f:
+            for path, seconds in sorted(self.folded.items()):
+                f.write(f"{path} {max(int(seconds * 1_000_000), 0)}\n")
+        return str(json_path)
+
+    @staticmethod
+    def diff(old_path: str, new_path: str, top: int = 30) -> List[str]:
+        """Returns lines with the largest differences of cumulative time between two reports."""
+        old = json.loads(Path(old_path).read_text(encoding="utf-8"))
+        new = json.loads(Path(new_path).read_text(encoding="utf-8"))
+        before = {f["name"]: f["cumulative_ms"] for f in old["frames"]}
+        after = {f["name"]: f["cumulative_ms"] for f in new["frames"]}
+        deltas = sorted(((after.get(n, 0.0) - before.get(n, 0.0), n) for n in set(before) | set(after)),
+                        key=lambda d: -abs(d[0]))
+        lines = [f"total: {old['total_ms']:,.1f} ms -> {new['total_ms']:,.1f} ms "
+                 f"({new['total_ms'] - old['total_ms']:+,.1f} ms)"]
+        for delta, name in deltas[:top]:
+            lines.append(f"{delta:+10.1f} ms  {before.get(name, 0.0):10.1f} -> {after.get(name, 0.0):10.1f}  {name}")
+        return lines
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python -m auto_load.StartupProfile old.json new.json")
+    print("\n".join(StartupProfile.diff(sys.argv[1], sys.argv[2])))
@@ -0,0 +1 @@
+# app/auto_load/__init__.py
\ No newline at end of file
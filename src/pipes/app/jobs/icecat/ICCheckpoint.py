@@ -0,0 +1,81 @@
+# app/jobs/icecat/ICCheckpoint.py
+from pathlib import Path
+from typing import Optional
+import hashlib
+import json
+import os
+import time
+
+
+class ICCheckpoint:
+    """
+    Position of the last committed batch of a long-running load, so a retry or re-run on the same file
+    resumes after it instead of starting from the first row. Keyed by the input file and the target
+    database; valid only for the same file content (fingerprint: size, mtime, hash of its head and tail).
+    """
+
+    dir_default = "/data/share/store/icecat/checkpoints"
+    sample = 64 * 1024
+
+    def __init__(self, path_csv: str, scope: str, path_dir: str = dir_default):
+        self.path_csv = Path(path_csv)
+        self.scope = scope
+        key = hashlib.sha1(f"{scope}|{self.path_csv.resolve()}".encode("utf-8")).hexdigest()[:12]
+        self.path = Path(path_dir) / f"ic_meta_to_db.{key}.json"
+        self.fingerprint = self.make_fingerprint(self.path_csv)
+        self.rows = 0
+        self.offset: Optional[int] = None
+        self.counters: dict = {}
+
+    @staticmethod
+    def make(path_csv: str, scope: str, path_dir: str = dir_default) -> 'ICCheckpoint':
+        """Creates checkpoint of the file and loads the stored position (if it belongs to the same file)."""
+        checkpoint = ICCheckpoint(path_csv, scope=scope, path_dir=path_dir)
+        checkpoint.load()
+        return checkpoint
+
+    @staticmethod
+    def make_fingerprint(path: Path) -> dict:
+        """Returns fingerprint of the file: size, mtime and hash of its first and last bytes."""
+        stat = path.stat()
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            digest.update(f.read(ICCheckpoint.sample))
+            if stat.st_size > ICCheckpoint.sample:
+                f.seek(max(stat.st_size - ICCheckpoint.sample, ICCheckpoint.sample))
+                digest.update(f.read())
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest.hexdigest()}
+
+    def load(self):
+        """Loads stored position. Missing, broken or foreign (other file version) checkpoint is ignored."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("scope") != self.scope or data.get("fingerprint") != self.fingerprint:
+            return
+        self.rows = int(data.get("rows", 0))
+        self.offset = data.get("offset")
+        self.counters = data.get("counters", {})
+
+    def save(self, rows: int, offset: Optional[int] = None, **counters):
+        """Stores position after 'rows' data rows (all committed) and counters of the load, atomically."""
+        self.rows, self.offset, self.counters = rows, offset, counters
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text(json.dumps({
+            "scope": self.scope,
+            "file": str(self.path_csv),
+            "fingerprint": self.fingerprint,
+            "rows": rows,
+            "line": rows + 2,  # Next line of the file to process (1 is the header)
+            "offset": offset,
+            "counters": counters,
+            "saved": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Removes the checkpoint (load completed)."""
+        self.path.unlink(missing_ok=True)
+        self.rows, self.offset, self.counters = 0, None, {}
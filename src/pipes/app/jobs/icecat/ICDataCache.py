@@ -0,0 +1,43 @@
+# app/jobs/icecat/ICDataCache.py
+from pathlib import Path
+from typing import Optional
+import os
+
+
+class ICDataCache:
+    """
+    Disk cache of raw IceCat product documents, one file per product and language
+    (<dir>/<lang>/<id % 256>/<id / 256 % 256>/<id>), starting with the version line of the document.
+    A new version overwrites the file, so re-runs fetch only products changed upstream.
+    """
+
+    dir_default = "/data/share/store/icecat/products"
+
+    def __init__(self, path_dir: str = dir_default, lang: str = "EN"):
+        self.path = Path(path_dir) / lang.upper()
+
+    def path_of(self, prod_id: int) -> Path:
+        return self.path / f"{prod_id % 256:02x}" / f"{prod_id // 256 % 256:02x}" / str(prod_id)
+
+    @staticmethod
+    def version_line(version: Optional[str]) -> bytes:
+        return (version or "").replace("\n", " ").encode("utf-8") + b"\n"
+
+    def get(self, prod_id: int, version: Optional[str]) -> Optional[bytes]:
+        """Returns the cached document of the product version, None if not cached or other version."""
+        try:
+            data = self.path_of(prod_id).read_bytes()
+        except OSError:
+            return None
+        line = self.version_line(version)
+        return data[len(line):] if data.startswith(line) else None
+
+    def put(self, prod_id: int, version: Optional[str], body: bytes):
+        """Stores the document of the product version atomically (replaces the previous version)."""
+        path = self.path_of(prod_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(self.version_line(version))
+            f.write(body)
+        os.replace(tmp_path, path)
@@ -0,0 +1,167 @@
+# app/jobs/icecat/ICDataFetcher.py
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.adapters import HTTPAdapter
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import json
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+
+import requests
+
+from jobs.icecat.ICDataCache import ICDataCache
+from jobs.icecat.ICRateLimiter import ICRateLimiter
+
+
+class ICProductDoc(NamedTuple):
+    """
+    Fetched (or cached) product document of the metadata version: 'data' is None if the product has
+    no document or failed.
+    """
+    prod_id: int
+    prod_uuid: str
+    data: Optional[dict]
+    cached: bool = False
+    error: Optional[str] = None
+    version: Optional[str] = None
+
+
+class ICDataFetcher:
+    """
+    Fetches IceCat product documents by a bounded pool of threads. Each thread keeps its own keep-alive
+    session (one connection), all threads share the rate limiter, so the upstream sees at most 'rate'
+    requests per second whatever the number of workers. Raw responses are cached on disk by product ID
+    and version, cached products cost no request. Throttled (429), server (5xx) and connection errors
+    are retried.
+    """
+
+    url_default = "https://data.icecat.biz/export/freexml.int/{lang}/{product_id}.xml"
+    retry_status = (429, 500, 502, 503, 504)
+
+    def __init__(self, url: str = url_default, lang: str = "EN", auth: Optional[Tuple[str, str]] = None,
+                 workers: int = 16, rate: float = 50.0, cache: Optional[ICDataCache] = None,
+                 timeout: float = 30.0, retries: int = 3):
+        self.url = url
+        self.lang = lang.upper()
+        self.auth = auth
+        self.workers = max(int(workers), 1)
+        self.limiter = ICRateLimiter(rate, burst=self.workers)
+        self.cache = cache
+        self.timeout = timeout
+        self.retries = max(int(retries), 0)
+        self.local = threading.local()
+        self.sessions: List[requests.Session] = []
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.retried = 0
+
+    def session(self) -> requests.Session:
+        """Returns keep-alive session of the current thread."""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            if self.auth:
+                session.auth = self.auth
+            self.local.session = session
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+        self.sessions = []
+
+    def url_of(self, prod_id: int, path: Optional[str]) -> str:
+        return self.url.format(lang=self.lang, product_id=prod_id, path=path or "")
+
+    def download(self, prod_id: int, path: Optional[str]) -> Optional[bytes]:
+        """Returns body of the product document, None if it does not exist (404)."""
+        url = self.url_of(prod_id, path)
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            with self.lock:
+                self.requests += 1
+            try:
+                r = self.session().get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.retries:
+                    raise
+                self.backoff(2 ** attempt)
+                continue
+            if r.status_code == 404:
+                return None
+            if r.status_code in self.retry_status and attempt < self.retries:
+                retry_after = r.headers.get("Retry-After", "")
+                self.backoff(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+                continue
+            r.raise_for_status()
+            return r.content
+        return None
+
+    def backoff(self, delay: float):
+        with self.lock:
+            self.retried += 1
+        time.sleep(delay)
+
+    def fetch(self, prod_id: int, prod_uuid: str, path: Optional[str], version: Optional[str]) -> ICProductDoc:
+        """Returns document of the product, from the cache if the version is cached."""
+        try:
+            body = self.cache.get(prod_id, version) if self.cache is not None else None
+            if body is not None:
+                return ICProductDoc(prod_id, prod_uuid, self.parse(body), cached=True, version=version)
+            body = self.download(prod_id, path)
+            if body is None:
+                return ICProductDoc(prod_id, prod_uuid, None, error="Not found", version=version)
+            data = self.parse(body)
+            if self.cache is not None:
+                self.cache.put(prod_id, version, body)
+            return ICProductDoc(prod_id, prod_uuid, data, version=version)
+        except Exception as e:
+            return ICProductDoc(prod_id, prod_uuid, None, error=f"{type(e).__name__}: {e}", version=version)
+
+    def fetch_many(self, products: Iterable[Tuple[int, str, Optional[str], Optional[str]]]) -> Iterator[ICProductDoc]:
+        """
+        Fetches documents of (product ID, UUID, path, version), yields them in completion order.
+        At most 2 x workers requests are queued, so the product list is consumed lazily.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="icecat-fetch") as pool:
+            pending = set()
+            for product in products:
+                pending.add(pool.submit(self.fetch, *product))
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            for future in pending:
+                yield future.result()
+
+    @staticmethod
+    def parse(body: bytes) -> dict:
+        """Returns product document as a JSON object: JSON as is, XML converted (see xml_to_dict)."""
+        if body.lstrip()[:1] == b"{":
+            return json.loads(body)
+        root = ElementTree.fromstring(body)
+        return {root.tag: ICDataFetcher.xml_to_dict(root)}
+
+    @staticmethod
+    def xml_to_dict(element) -> dict:
+        """
+        Converts XML element: attributes become keys, child elements become keys (a list if repeated),
+        text content is stored under '#text'.
+        """
+        data = dict(element.attrib)
+        for child in element:
+            value = ICDataFetcher.xml_to_dict(child)
+            if child.tag not in data:
+                data[child.tag] = value
+            elif isinstance(data[child.tag], list):
+                data[child.tag].append(value)
+            else:
+                data[child.tag] = [data[child.tag], value]
+        text = (element.text or "").strip()
+        if text:
+            data["#text"] = text
+        return data
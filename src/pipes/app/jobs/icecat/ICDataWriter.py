@@ -0,0 +1,49 @@
+# app/jobs/icecat/ICDataWriter.py
+from collections import Counter
+from typing import List, Optional, Tuple
+import json
+
+
+class ICDataWriter:
+    """
+    Writes IceCat product documents of one language into the database, one set-based call per batch.
+    Each document is stored with the metadata version it was fetched for, so it is fetched again only
+    when the metadata changes.
+    """
+
+    def __init__(self, cn, lang: str = "EN", batch_size: int = 500):
+        self.cn = cn
+        self.cur = cn.cursor()
+        self.lang = lang
+        self.batch_size = batch_size
+        self.batch: List[Tuple[str, str, Optional[str]]] = []
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+
+    @property
+    def saved(self) -> int:
+        return self.inserted + self.updated
+
+    def add(self, prod_uuid: str, data: dict, version: Optional[str]):
+        """Adds a product document of the metadata version. Full batches are stored and committed."""
+        self.batch.append((prod_uuid, json.dumps(data, ensure_ascii=False, separators=(",", ":")), version))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Stores buffered documents and commits."""
+        if self.batch:
+            prod_uuids, payloads, versions = zip(*self.batch)
+            self.cur.execute('select "outStatus" from "saveIceCatProductDataBatch"(%s::uuid[], %s, %s::jsonb, '
+                             '%s::text[])',
+                             (list(prod_uuids), self.lang, "[" + ",".join(payloads) + "]", list(versions)))
+            statuses = Counter(status for status, in self.cur.fetchall())
+            self.inserted += statuses["inserted"]
+            self.updated += statuses["updated"]
+            self.unchanged += statuses["unchanged"]
+            self.batch = []
+        self.cn.commit()
+
+    def close(self):
+        self.cur.close()
@@ -0,0 +1,99 @@
+# app/jobs/icecat/ICDeltaIndex.py
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import List
+import hashlib
+import json
+import os
+
+
+class ICDeltaIndex:
+    """
+    Local index of content hashes of IceCat products stored in the database.
+    Kept as two sorted arrays (product IDs, 64-bit hashes) so millions of products fit in little memory.
+    """
+
+    path_default = "/data/share/store/icecat/icecat.meta.idx"
+
+    def __init__(self, path: str, scope: str):
+        self.path = Path(path)
+        self.scope = scope
+        self.ids = array("q")
+        self.hashes = array("Q")
+        self.seen = bytearray()
+        self.new_ids = array("q")
+        self.new_hashes = array("Q")
+        self.added = 0
+        self.changed = 0
+        self.unchanged = 0
+
+    @staticmethod
+    def make(path: str, scope: str) -> 'ICDeltaIndex':
+        """Creates index and loads previously stored hashes (if they belong to the same scope)."""
+        index = ICDeltaIndex(path=path, scope=scope)
+        index.load()
+        return index
+
+    def load(self):
+        """Loads stored hashes. Missing, broken or foreign (other database) index is treated as empty."""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                if header.get("scope") != self.scope:
+                    return
+                count = int(header["count"])
+                self.ids.fromfile(f, count)
+                self.hashes.fromfile(f, count)
+        except (OSError, ValueError, KeyError, EOFError):
+            self.ids = array("q")
+            self.hashes = array("Q")
+        self.seen = bytearray(len(self.ids))
+
+    @staticmethod
+    def digest(row_list: List[str]) -> int:
+        """Returns 64-bit content hash of the CSV row."""
+        data = "\x1f".join(row_list).encode("utf-8", errors="replace")
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+    def is_changed(self, prod_id: int, row_list: List[str]) -> bool:
+        """Records the row in the new index and checks whether it is new or changed since last load."""
+        row_hash = self.digest(row_list)
+        self.new_ids.append(prod_id)
+        self.new_hashes.append(row_hash)
+        pos = bisect_left(self.ids, prod_id)
+        if pos < len(self.ids) and self.ids[pos] == prod_id:
+            self.seen[pos] = 1
+            if self.hashes[pos] == row_hash:
+                self.unchanged += 1
+                return False
+            self.changed += 1
+            return True
+        self.added += 1
+        return True
+
+    def deleted(self) -> List[int]:
+        """Returns IDs of products present in the previous index but missing from the current file."""
+        return [self.ids[pos] for pos in range(len(self.ids)) if not self.seen[pos]]
+
+    def save(self):
+        """Stores hashes of the current load (sorted by product ID, last row wins), replacing the index atomically."""
+        ids = array("q")
+        hashes = array("Q")
+        # Packed keys (id, position) sort by product ID, then by order of appearance
+        for key in sorted((prod_id << 32) | pos for pos, prod_id in enumerate(self.new_ids)):
+            prod_id, pos = key >> 32, key & 0xFFFFFFFF
+            if ids and ids[-1] == prod_id:
+                hashes[-1] = self.new_hashes[pos]
+                continue
+            ids.append(prod_id)
+            hashes.append(self.new_hashes[pos])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(json.dumps({"scope": self.scope, "count": len(ids)}).encode("utf-8") + b"\n")
+            ids.tofile(f)
+            hashes.tofile(f)
+        os.replace(tmp_path, self.path)
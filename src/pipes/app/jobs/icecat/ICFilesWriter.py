@@ -0,0 +1,318 @@
+# app/jobs/icecat/ICFilesWriter.py
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from jobs.icecat.ICStageTimings import ICStageTimings
+
+
+class ICFilesWriter:
+    """
+    Writes parsed IceCat products into the output directory using one of the layouts:
+      - flat:   one JSON file per product in a single directory (icecat_<id>.json)
+      - hashed: one JSON file per product in hash-prefix subdirectories (ab/cd/icecat_<id>.json)
+      - ndjson: packed JSONL shards of N products + offset index (index.sqlite) for direct lookup
+    Files of a batch (layouts 'flat' and 'hashed') are written by a bounded pool of threads, so the parser
+    keeps encoding the next batches while the previous ones are written (open/write/close release the GIL).
+    Durability: 'none' (page cache only), 'batch' (files, shards and their directories are fsynced batch
+    by batch) or 'end' (the files, shards and index written and their directories are fsynced when the writer
+    is closed, by the writer threads).
+    """
+
+    layouts = ("flat", "hashed", "ndjson")
+    durabilities = ("none", "batch", "end")
+    index_name = "index.sqlite"
+    index_batch = 10_000
+
+    def __init__(self, path_output: Path, layout: str = "flat", compact: bool = False,
+                 shard_size: int = 100_000, tag: Optional[str] = None, timings: ICStageTimings = None,
+                 threads: int = 0, durability: str = "none"):
+        if layout not in self.layouts:
+            raise ValueError(f"Unknown output layout: {layout}")
+        if durability not in self.durabilities:
+            raise ValueError(f"Unknown durability: {durability}")
+        self.path_output = Path(path_output)
+        self.layout = layout
+        self.compact = compact
+        self.shard_size = shard_size
+        self.tag = tag
+        self.timings = timings or ICStageTimings(enabled=False)
+        self.files_count = 0
+        self.shards_count = 0
+        self.shard_file = None
+        self.shard_path: Optional[Path] = None
+        self.shard_rows = 0
+        self.shard_bytes = 0
+        self.index: Optional[sqlite3.Connection] = None
+        self.index_rows = []
+        self.threads = max(int(threads), 0)
+        self.durability = durability
+        self.pool: Optional[ThreadPoolExecutor] = None
+        self.pending: Set[Future] = set()
+        # Written but not synced yet (durability 'end'): product IDs batch by batch, shards and index
+        self.unsynced_ids: List[List[str]] = []
+        self.unsynced_paths: List[Path] = []
+
+    def json_options(self) -> dict:
+        """Returns options of the JSON serialization, compact or pretty-printed (JSONL shards are always compact)."""
+        if self.compact or self.layout == "ndjson":
+            return {"ensure_ascii": False, "separators": (",", ":")}
+        return {"ensure_ascii": False, "indent": 2}
+
+    def file_path(self, safe_id: str) -> Path:
+        """Returns path of the product file (layouts 'flat' and 'hashed')."""
+        if self.layout == "hashed":
+            digest = hashlib.md5(safe_id.encode("utf-8")).hexdigest()
+            return self.path_output / digest[:2] / digest[2:4] / f"icecat_{safe_id}.json"
+        return self.path_output / f"icecat_{safe_id}.json"
+
+    def write_many(self, safe_ids: List[str], payloads: List[str]) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+        """
+        Writes a batch of products with pre-encoded JSON (see ICRowBatches).
+        Returns location of the first product written and failures (product ID, error). With threads,
+        the batch is queued and the results are those of the batches completed meanwhile (see drain);
+        at most 2 x threads batches are in flight, the parser waits for the writers beyond that.
+        """
+        started = time.perf_counter_ns()
+        first: Optional[str] = None
+        failed = []
+        if self.layout == "ndjson":
+            first = self.write_packed_many(safe_ids, payloads)
+            if self.durability == "batch":
+                self.sync_file(self.shard_file)
+        elif self.threads > 0:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="icecat-files")
+            self.pending.add(self.pool.submit(self.write_files, safe_ids, payloads))
+            if len(self.pending) >= self.threads * 2:
+                done, self.pending = wait(self.pending, return_when=FIRST_COMPLETED)
+                first, failed = self.collect(done)
+        else:
+            first, failed = self.collect([self.write_files(safe_ids, payloads)])
+        if self.timings.enabled:
+            self.timings.add("write", started)
+        return first, failed
+
+    def write_files(self, safe_ids: List[str], payloads: List[str]) -> Tuple[Optional[str], List[Tuple[str, str]], int]:
+        """Writes one file per product (runs in a writer thread), returns first location, failures and count."""
+        first: Optional[str] = None
+        failed = []
+        written = 0
+        sync = self.durability == "batch"
+        done = [] if self.durability == "end" else None
+        for safe_id, data in zip(safe_ids, payloads):
+            try:
+                file_path = self.file_path(safe_id)
+                if self.layout == "hashed":
+                    file_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(file_path, "w", encoding="utf-8") as jf:
+                    jf.write(data)
+                    if sync:
+                        self.sync_file(jf)
+            except Exception as e:
+                failed.append((safe_id, str(e)))
+                continue
+            written += 1
+            if done is not None:
+                done.append(safe_id)
+            if first is None:
+                first = str(file_path)
+        if done:
+            self.unsynced_ids.append(done)
+        if sync and written:
+            # New directory entries are durable once their directories are synced
+            self.sync_dirs(self.file_path(safe_id).parent for safe_id in safe_ids)
+        return first, failed, written
+
+    def collect(self, results) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+        """Counts written files of completed batches (futures or results), returns first location and failures."""
+        first: Optional[str] = None
+        failed = []
+        for result in results:
+            batch_first, batch_failed, written = result.result() if isinstance(result, Future) else result
+            self.files_count += written
+            failed.extend(batch_failed)
+            if first is None:
+                first = batch_first
+        return first, failed
+
+    def drain(self) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+        """Waits for the batches in flight, returns first location and failures (as write_many)."""
+        started = time.perf_counter_ns()
+        pending, self.pending = self.pending, set()
+        result = self.collect(pending)
+        if self.timings.enabled:
+            self.timings.add("write", started)
+        return result
+
+    @staticmethod
+    def sync_file(f):
+        f.flush()
+        os.fsync(f.fileno())
+
+    @staticmethod
+    def sync_path(path: Path):
+        """Fsyncs file or directory by its path."""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def sync_dirs(self, dirs: Iterable[Path]):
+        """Fsyncs directories (and the hash-prefix levels above them up to the output directory)."""
+        todo = set(dirs)
+        if self.layout == "hashed":
+            todo |= {d.parent for d in todo} | {self.path_output}
+        for d in todo:
+            self.sync_path(d)
+
+    def sync_ids(self, safe_ids: List[str]) -> Set[Path]:
+        """Fsyncs files of a batch of products (runs in a writer thread), returns their directories."""
+        dirs = set()
+        for safe_id in safe_ids:
+            file_path = self.file_path(safe_id)
+            self.sync_path(file_path)
+            dirs.add(file_path.parent)
+        return dirs
+
+    def sync_written(self):
+        """Fsyncs the files, shards and index written by the writer, then their directories (durability 'end')."""
+        batches, self.unsynced_ids = self.unsynced_ids, []
+        paths, self.unsynced_paths = self.unsynced_paths, []
+        if self.pool is not None:
+            results = [future.result() for future in [self.pool.submit(self.sync_ids, ids) for ids in batches]]
+        else:
+            results = [self.sync_ids(ids) for ids in batches]
+        for path in paths:
+            self.sync_path(path)
+        self.sync_dirs(set().union(*results, (path.parent for path in paths)))
+
+    def write_packed_many(self, safe_ids: List[str], payloads: List[str]) -> Optional[str]:
+        """Appends a batch of products into JSONL shards (one write per shard) and records their offsets."""
+        first: Optional[str] = None
+        pos = 0
+        while pos < len(payloads):
+            if self.shard_file is None or self.shard_rows >= self.shard_size:
+                self.next_shard()
+            take = min(self.shard_size - self.shard_rows, len(payloads) - pos)
+            chunk = [data.encode("utf-8") + b"\n" for data in payloads[pos:pos + take]]
+            offset = self.shard_bytes
+            for safe_id, data in zip(safe_ids[pos:pos + take], chunk):
+                self.index_rows.append((safe_id, self.shard_path.name, offset, len(data)))
+                offset += len(data)
+            self.shard_file.write(b"".join(chunk))
+            if first is None:
+                first = str(self.shard_path)
+            self.shard_bytes = offset
+            self.shard_rows += take
+            self.files_count += take
+            if len(self.index_rows) >= self.index_batch:
+                self.flush_index()
+            pos += take
+        return first
+
+    def next_shard(self):
+        """Closes current shard and opens the next one."""
+        if self.shard_file is not None:
+            if self.durability == "batch":
+                self.sync_file(self.shard_file)
+            self.shard_file.close()
+        self.shards_count += 1
+        prefix = f"icecat_{self.tag}_" if self.tag else "icecat_"
+        self.shard_path = self.path_output / f"{prefix}{self.shards_count:05d}.jsonl"
+        self.shard_file = open(self.shard_path, "wb")
+        if self.durability == "batch":
+            self.sync_dirs([self.path_output])
+        elif self.durability == "end":
+            self.unsynced_paths.append(self.shard_path)
+        self.shard_rows = 0
+        self.shard_bytes = 0
+
+    def index_path(self) -> Path:
+        name = f"index_{self.tag}.sqlite" if self.tag else self.index_name
+        return self.path_output / name
+
+    @staticmethod
+    def open_index(path: Path) -> sqlite3.Connection:
+        cn = sqlite3.connect(path)
+        cn.execute("pragma journal_mode = off")
+        cn.execute("pragma synchronous = off")
+        cn.execute("create table if not exists products ("
+                   "product_id text primary key, shard text not null, "
+                   "offset integer not null, length integer not null) without rowid")
+        return cn
+
+    def flush_index(self):
+        """Stores buffered offsets into the index."""
+        if not self.index_rows:
+            return
+        if self.index is None:
+            self.index = self.open_index(self.index_path())
+        self.index.executemany("insert or replace into products values (?, ?, ?, ?)", self.index_rows)
+        self.index.commit()
+        self.index_rows = []
+
+    def close(self):
+        """
+        Waits for the writer threads (call drain before to get their failures), closes shard and index
+        and syncs what was written (durability 'end').
+        """
+        self.drain()
+        if self.shard_file is not None:
+            self.shard_file.close()
+            self.shard_file = None
+        self.flush_index()
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+            if self.durability == "batch":
+                self.sync_path(self.index_path())
+            elif self.durability == "end":
+                self.unsynced_paths.append(self.index_path())
+        if self.durability == "end":
+            self.sync_written()
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    @staticmethod
+    def merge_indexes(path_output: Path, durability: str = "none"):
+        """Merges partial indexes written by parallel workers into the single offset index (synced unless 'none')."""
+        path_output = Path(path_output)
+        parts = sorted(path_output.glob("index_*.sqlite"))
+        if not parts:
+            return
+        cn = ICFilesWriter.open_index(path_output / ICFilesWriter.index_name)
+        for part in parts:
+            cn.execute("attach database ? as part", (str(part),))
+            cn.execute("insert or replace into products select * from part.products")
+            cn.commit()
+            cn.execute("detach database part")
+            part.unlink()
+        cn.close()
+        if durability != "none":
+            ICFilesWriter.sync_path(path_output / ICFilesWriter.index_name)
+            ICFilesWriter.sync_path(path_output)
+
+    @staticmethod
+    def lookup(path_output: str, safe_id: str) -> Optional[dict]:
+        """Returns single product from packed JSONL shards using the offset index."""
+        path_output = Path(path_output)
+        cn = sqlite3.connect(path_output / ICFilesWriter.index_name)
+        try:
+            found = cn.execute("select shard, offset, length from products where product_id = ?",
+                               (safe_id,)).fetchone()
+        finally:
+            cn.close()
+        if found is None:
+            return None
+        shard, offset, length = found
+        with open(path_output / shard, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
@@ -0,0 +1,98 @@
+# app/jobs/icecat/ICMetaPipeline.py
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Iterable, List, Optional, Tuple
+import asyncio
+import time
+
+from jobs.icecat.ICMetaWriter import ICMetaWriter
+from jobs.icecat.ICStageTimings import ICStageTimings
+
+
+class ICMetaPipeline:
+    """
+    Pipelined loading of IceCat product metadata: the parser (event loop thread) feeds a bounded queue
+    of batches consumed by N concurrent writers, each with its own pooled connection. Blocking psycopg2
+    calls of the writers run in threads (the driver releases the GIL while waiting for the server),
+    so parsing and database round trips overlap. A full queue blocks the parser (backpressure), memory
+    is bounded by queue_size parse batches plus the COPY buffers of the writers.
+    """
+
+    def __init__(self, db, writers: int = 2, queue_size: int = 8, mode: str = "copy", copy_batch: int = 50_000,
+                 batch_size: int = 1000, timings: ICStageTimings = None):
+        self.db = db
+        self.writers = max(int(writers), 1)
+        self.queue_size = max(int(queue_size), 1)
+        self.mode = mode
+        self.copy_batch = copy_batch
+        self.batch_size = batch_size
+        self.timings = timings or ICStageTimings(enabled=False)
+        self.meta_writers: List[ICMetaWriter] = []
+        self.error: Optional[BaseException] = None
+        self.parser_wait = 0.0
+        self.writers_wait = 0.0
+
+    @property
+    def inserted(self) -> int:
+        return sum(writer.inserted for writer in self.meta_writers)
+
+    @property
+    def unchanged(self) -> int:
+        return sum(writer.unchanged for writer in self.meta_writers)
+
+    def run(self, batches: Iterable[Tuple[List[int], List[str]]]) -> int:
+        """Stores batches of (product IDs, JSON payloads), returns number of stored products."""
+        with ExitStack() as stack:
+            connections = [stack.enter_context(self.db.conf()) for _ in range(self.writers)]
+            # Writer timings are merged at the end, ICStageTimings is not shared between threads
+            self.meta_writers = [ICMetaWriter(cn, mode=self.mode, copy_batch=self.copy_batch,
+                                              batch_size=self.batch_size,
+                                              timings=ICStageTimings(enabled=self.timings.enabled))
+                                 for cn in connections]
+            try:
+                asyncio.run(self.pipeline(batches))
+            finally:
+                for writer in self.meta_writers:
+                    self.timings.merge(writer.timings.to_dict())
+                    writer.close()
+        if self.error is not None:
+            raise self.error
+        return self.inserted
+
+    async def pipeline(self, batches: Iterable[Tuple[List[int], List[str]]]):
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=self.writers))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        tasks = [asyncio.create_task(self.consume(queue, writer)) for writer in self.meta_writers]
+        try:
+            for item in batches:
+                if self.error is not None:
+                    break  # A writer failed, stop parsing
+                started = time.perf_counter()
+                await queue.put(item)
+                self.parser_wait += time.perf_counter() - started
+                await asyncio.sleep(0)  # Lets idle writers take the batch right away
+        except BaseException as e:
+            self.error = self.error or e
+        finally:
+            for _ in tasks:
+                await queue.put(None)
+            await asyncio.gather(*tasks)
+
+    async def consume(self, queue: asyncio.Queue, writer: ICMetaWriter):
+        """Stores batches from the queue until the end marker, failed writer only drains the queue."""
+        while True:
+            started = time.perf_counter()
+            item = await queue.get()
+            self.writers_wait += time.perf_counter() - started
+            if item is None:
+                break
+            if self.error is None:
+                try:
+                    await asyncio.to_thread(writer.add_many, *item)
+                except Exception as e:
+                    self.error = self.error or e
+        if self.error is None:
+            try:
+                await asyncio.to_thread(writer.flush)
+            except Exception as e:
+                self.error = self.error or e
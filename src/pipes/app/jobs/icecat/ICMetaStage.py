@@ -0,0 +1,43 @@
+# app/jobs/icecat/ICMetaStage.py
+from typing import List
+import io
+import time
+import uuid
+
+from jobs.icecat.ICStageTimings import ICStageTimings
+
+
+class ICMetaStage:
+    """Streams IceCat product metadata into the staging table using COPY and merges it set-based."""
+
+    table = '"IceCatProductsMetaStage"'
+    columns = '("stgLoadID", "prdID", "prdMeta")'
+
+    def __init__(self, cur, timings: ICStageTimings = None):
+        self.cur = cur
+        self.timings = timings or ICStageTimings(enabled=False)
+        self.load_id = str(uuid.uuid4())
+        self.buffer = io.StringIO()
+        self.size = 0
+
+    def add_many(self, prod_ids: List[int], payloads: List[str]):
+        """Adds a batch of pre-encoded JSON payloads to the COPY buffer, escaped once for the whole batch."""
+        started = time.perf_counter_ns()
+        prefix = f"{self.load_id}\t"
+        self.buffer.write("".join([f"{prefix}{prod_id}\t{data}\n" for prod_id, data in zip(prod_ids, payloads)])
+                          .replace("\\", "\\\\"))
+        self.size += len(payloads)
+        if self.timings.enabled:
+            self.timings.add("write", started)
+
+    def flush(self) -> int:
+        """Copies buffered rows into the staging table and merges them. Returns number of merged products."""
+        if self.size == 0:
+            return 0
+        self.buffer.seek(0)
+        self.cur.copy_expert(f"copy {self.table} {self.columns} from stdin", self.buffer)
+        self.cur.execute('select "mergeIceCatProductMetaStage"(%s)', (self.load_id,))
+        merged = self.cur.fetchone()[0]
+        self.buffer = io.StringIO()
+        self.size = 0
+        return merged
@@ -0,0 +1,69 @@
+# app/jobs/icecat/ICMetaWriter.py
+from collections import Counter
+from typing import List
+import time
+
+from jobs.icecat.ICMetaStage import ICMetaStage
+from jobs.icecat.ICStageTimings import ICStageTimings
+
+
+class ICMetaWriter:
+    """Writes IceCat product metadata into the database batch by batch, using the configured loading mode."""
+
+    def __init__(self, cn, mode: str = "copy", copy_batch: int = 50_000, batch_size: int = 1000,
+                 timings: ICStageTimings = None):
+        self.cn = cn
+        self.cur = cn.cursor()
+        self.mode = mode
+        self.copy_batch = copy_batch
+        self.batch_size = batch_size
+        self.timings = timings or ICStageTimings(enabled=False)
+        self.stage = ICMetaStage(self.cur, timings=self.timings)
+        self.batch = []
+        self.inserted = 0
+        self.unchanged = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of rows added but not committed yet."""
+        return self.stage.size + len(self.batch)
+
+    def add_many(self, prod_ids: List[int], payloads: List[str]):
+        """Adds a batch of products with pre-encoded JSON payloads. Full batches are stored and committed."""
+        if self.mode == "copy":
+            self.stage.add_many(prod_ids, payloads)
+            if self.stage.size >= self.copy_batch:
+                self.flush()
+            return
+        for pos in range(0, len(payloads), self.batch_size):
+            self.batch.extend(zip(prod_ids[pos:pos + self.batch_size], payloads[pos:pos + self.batch_size]))
+            if len(self.batch) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """Stores buffered rows and commits."""
+        started = time.perf_counter_ns()
+        self.inserted += self.stage.flush()
+        if self.batch and self.mode == "batch":
+            self.save_batch()
+        elif self.batch:
+            self.cur.executemany('select "saveIceCatProductMeta"(%s, %s::jsonb)', self.batch)
+            self.inserted += len(self.batch)
+            self.batch = []
+        self.cn.commit()
+        self.timings.add("db", started)
+
+    def save_batch(self) -> Counter:
+        """Stores buffered rows by one set-based call, returns number of products by saved status."""
+        prod_ids, payloads = zip(*self.batch)
+        self.cur.execute('select "outProductId", "outStatus" '
+                         'from "saveIceCatProductMetaBatch"(%s::bigint[], %s::jsonb)',
+                         (list(prod_ids), "[" + ",".join(payloads) + "]"))
+        statuses = Counter(status for _, status in self.cur.fetchall())
+        self.inserted += statuses["inserted"] + statuses["updated"]
+        self.unchanged += statuses["unchanged"]
+        self.batch = []
+        return statuses
+
+    def close(self):
+        self.cur.close()
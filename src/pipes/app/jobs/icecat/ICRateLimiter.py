@@ -0,0 +1,34 @@
+# app/jobs/icecat/ICRateLimiter.py
+import threading
+import time
+
+
+class ICRateLimiter:
+    """
+    Token bucket shared by threads: at most 'rate' acquisitions per second on average, bursts up to 'burst'.
+    Waiting threads sleep outside the lock, a non-positive rate disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(int(burst), 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Takes one token, waits until one is available."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                delay = (1 - self.tokens) / self.rate
+                self.waited += delay
+            time.sleep(delay)
@@ -0,0 +1,120 @@
+# app/jobs/icecat/ICRowBatches.py
+from itertools import islice
+from json.encoder import encode_basestring, encode_basestring_ascii
+from typing import Iterable, Iterator, List, Optional, Tuple
+import json
+import time
+
+from jobs.icecat.ICStageTimings import ICStageTimings
+from jobs.icecat.get_prod_id import get_prod_id
+
+
+class ICRowBatch:
+    """Block of CSV rows: valid rows, their columns and the counters of the block."""
+
+    def __init__(self, first: int, block: List[List[str]], rows: List[List[str]], columns: List[Tuple[str, ...]]):
+        self.first = first
+        self.block = block
+        self.rows = rows
+        self.columns = columns
+        self.processed = len(block)
+        self.bad_rows = len(block) - len(rows)
+
+
+class ICRowBatches:
+    """
+    Batched parsing of IceCat CSV rows: reads blocks of rows, validates field counts per block, transposes
+    valid rows into columns and builds product IDs and JSON payloads column by column.
+    No dict per row: payloads are rendered from a template with the keys encoded once, values are encoded
+    by the C string encoder of the json module. Output is identical to json.dumps of the row dict.
+    """
+
+    size_default = 1_000
+
+    def __init__(self, headers: List[str], size: int = size_default, id_column: str = "product_id",
+                 indent: Optional[int] = None, separators: Optional[Tuple[str, str]] = None,
+                 ensure_ascii: bool = True, timings: ICStageTimings = None):
+        self.headers = headers
+        self.size = max(int(size), 1)
+        self.expected_cols = len(headers)
+        self.id_column = id_column
+        self.timings = timings or ICStageTimings(enabled=False)
+        self.timed = self.timings.enabled
+        # Same keys as dict(zip(headers, row)): first position of a repeated header, value of the last one
+        order = {}
+        for pos, name in enumerate(headers):
+            order[name] = pos
+        self.positions = list(order.values())
+        self.id_pos = order.get(id_column)
+        self.encode = encode_basestring_ascii if ensure_ascii else encode_basestring
+        self.template = self.make_template(list(order), indent, separators, ensure_ascii)
+
+    @staticmethod
+    def make_template(keys: List[str], indent: Optional[int], separators: Optional[Tuple[str, str]],
+                      ensure_ascii: bool) -> str:
+        """Returns %-template of the JSON object rendered the same way as json.dumps."""
+        if separators is None:
+            separators = (",", ": ") if indent is not None else (", ", ": ")
+        item_sep, key_sep = separators
+        names = [json.dumps(key, ensure_ascii=ensure_ascii).replace("%", "%%") + key_sep + "%s" for key in keys]
+        if not names:
+            return "{}"
+        if indent is None:
+            return "{" + item_sep.join(names) + "}"
+        pad = "\n" + " " * indent
+        return "{" + pad + (item_sep + pad).join(names) + "\n}"
+
+    def batches(self, rows: Iterable[List[str]], first: int = 0) -> Iterator[ICRowBatch]:
+        """Yields blocks of rows, 'first' is the number (line) of the first row."""
+        it = iter(rows)
+        expected_cols = self.expected_cols
+        while True:
+            started = time.perf_counter_ns()
+            block = list(islice(it, self.size))
+            if not block:
+                return
+            if self.timed:
+                self.timings.add("parse", started)
+            started = time.perf_counter_ns()
+            valid = [row for row in block if len(row) == expected_cols]
+            columns = list(zip(*valid)) if valid else [() for _ in range(expected_cols)]
+            if self.timed:
+                self.timings.add("row", started)
+            yield ICRowBatch(first, block, valid, columns)
+            first += len(block)
+
+    def int_ids(self, batch: ICRowBatch) -> List[int]:
+        """Returns product IDs of the valid rows as integers."""
+        started = time.perf_counter_ns()
+        if self.id_pos is None:
+            raise ValueError(f"Missing column: {self.id_column}")
+        ids = list(map(int, batch.columns[self.id_pos]))
+        if self.timed:
+            self.timings.add("row", started)
+        return ids
+
+    def safe_ids(self, batch: ICRowBatch) -> List[str]:
+        """Returns product IDs of the valid rows usable as file names (see get_prod_id for empty IDs)."""
+        started = time.perf_counter_ns()
+        column = batch.columns[self.id_pos] if self.id_pos is not None else ("",) * len(batch.rows)
+        ids = [prod_id.strip() for prod_id in column]
+        if not all(ids):
+            lines = [batch.first + pos for pos, row in enumerate(batch.block) if len(row) == self.expected_cols]
+            ids = [prod_id or get_prod_id({"product_id": prod_id}, line) for prod_id, line in zip(ids, lines)]
+        ids = [prod_id if prod_id.isalnum() else "".join(c for c in prod_id if c.isalnum() or c in "-_.")
+               for prod_id in ids]
+        if self.timed:
+            self.timings.add("row", started)
+        return ids
+
+    def payloads(self, batch: ICRowBatch, columns: Optional[List[Tuple[str, ...]]] = None) -> List[str]:
+        """Returns JSON objects of the valid rows (optionally of a subset of them, given as columns)."""
+        started = time.perf_counter_ns()
+        columns = batch.columns if columns is None else columns
+        encode = self.encode
+        encoded = [list(map(encode, columns[pos])) for pos in self.positions]
+        template = self.template
+        payloads = [template % values for values in zip(*encoded)]
+        if self.timed:
+            self.timings.add("encode", started)
+        return payloads
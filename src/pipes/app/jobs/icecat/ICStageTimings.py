@@ -0,0 +1,92 @@
+# app/jobs/icecat/ICStageTimings.py
+from pathlib import Path
+from typing import Dict, Optional
+import os
+import time
+
+
+class ICStageTimings:
+    """
+    Timings of the stages of IceCat parsing loops, measured block by block (see ICRowBatches) and per
+    database round trip, so no row goes through an extra generator or clock call.
+    Stages: parse (read + decompress + decode + csv.reader, which pulls the lines itself), row (validation,
+    columns, IDs), encode (JSON), write (file or COPY buffer), db (COPY / merge / function calls, incl. commit).
+    """
+
+    stages = ("parse", "row", "encode", "write", "db")
+    bounds = {"parse": "cpu", "row": "cpu", "encode": "cpu", "write": "io", "db": "database"}
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.ns: Dict[str, int] = dict.fromkeys(self.stages, 0)
+
+    def add(self, stage: str, started: int):
+        """Adds time since 'started' (perf_counter_ns) to the stage."""
+        self.ns[stage] += time.perf_counter_ns() - started
+
+    def to_dict(self) -> dict:
+        """Returns raw counters (mergeable, e.g. from worker processes)."""
+        return {"ns": dict(self.ns)}
+
+    def merge(self, raw: Optional[dict]):
+        if not raw:
+            return
+        for stage, ns in raw["ns"].items():
+            self.ns[stage] = self.ns.get(stage, 0) + ns
+
+    def seconds(self) -> Dict[str, float]:
+        """Returns time of each stage in seconds (summed over workers)."""
+        return {stage: round(ns / 1e9, 3) for stage, ns in self.ns.items()}
+
+    def bound_by(self) -> Optional[str]:
+        """Returns what the loop is bound by: 'io', 'cpu' or 'database'."""
+        totals: Dict[str, float] = {}
+        for stage, seconds in self.seconds().items():
+            totals[self.bounds[stage]] = totals.get(self.bounds[stage], 0.0) + seconds
+        if not any(totals.values()):
+            return None
+        return max(totals, key=totals.get)
+
+    def to_meta(self, rows: int) -> dict:
+        """Returns metadata, 'rows' is the number of rows processed by the op."""
+        seconds = self.seconds()
+        return {
+            "stage_seconds": seconds,
+            "stage_us_per_row": {stage: round(value / max(rows, 1) * 1e6, 2) for stage, value in seconds.items()},
+            "bound_by": self.bound_by(),
+        }
+
+    @staticmethod
+    def descriptions() -> dict:
+        return {
+            "stage_seconds": "Time of the stages: parse, row, encode, write, db (timed block by block, "
+                             "summed over workers)",
+            "stage_us_per_row": "Time of the stages per row in microseconds",
+            "bound_by": "Dominant kind of work of the loop: 'io', 'cpu' or 'database'",
+        }
+
+    def to_prometheus(self, op: str, rows: int, elapsed: float) -> str:
+        """Returns metrics in Prometheus text exposition format."""
+        lines = [
+            "# HELP icecat_stage_seconds Time spent in a stage of the IceCat parsing loop.",
+            "# TYPE icecat_stage_seconds gauge",
+        ]
+        for stage, seconds in self.seconds().items():
+            lines.append(f'icecat_stage_seconds{{op="{op}",stage="{stage}"}} {seconds}')
+        lines += [
+            "# HELP icecat_rows Rows processed by the IceCat parsing loop.",
+            "# TYPE icecat_rows gauge",
+            f'icecat_rows{{op="{op}"}} {rows}',
+            "# HELP icecat_elapsed_seconds Duration of the IceCat parsing loop.",
+            "# TYPE icecat_elapsed_seconds gauge",
+            f'icecat_elapsed_seconds{{op="{op}"}} {round(elapsed, 3)}',
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str, op: str, rows: int, elapsed: float):
+        """Writes metrics file atomically (e.g. for the node_exporter textfile collector)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(self.to_prometheus(op, rows, elapsed), encoding="utf-8")
+        os.replace(tmp_path, path)
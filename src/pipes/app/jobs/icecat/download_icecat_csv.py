@@ -1,7 +1,8 @@
 # app/jobs/download_icecat_csv.py
 from pathlib import Path
-from dagster import job, op, get_dagster_logger, Output, build_asset_context
+from dagster import job, op, get_dagster_logger, Output, build_asset_context, AssetMaterialization
 
+from assets.icecat.IceCatCsv import IceCatCsv
 from assets.icecat_csv import icecat_csv
 from resources.icecat_creds import icecat_creds
 
@@ -11,6 +12,7 @@ class ICCsvMeta:
     path: str
     success: bool
     size_mb: str
+    fingerprint: dict = {}
 
     def update(self):
         """Updates the metadata based on the current state of the CSV file."""
@@ -24,7 +26,8 @@ class ICCsvMeta:
         return Output(
             {"path": self.path,
              "success": self.success,
-             "size_mb": self.size_mb}
+             "size_mb": self.size_mb,
+             **self.fingerprint}
         )
 
     @staticmethod
@@ -33,7 +36,11 @@ class ICCsvMeta:
         return {
             "path": "Path of CSV file",
             "success": "True if CSV file exists",
-            "size_mb": "Size of CSV file in MB"
+            "size_mb": "Size of CSV file in MB",
+            "size_bytes": "Size of CSV file in bytes",
+            "content_hash": "Hash of the uncompressed content (unchanged file has the same hash)",
+            "content_bytes": "Size of the uncompressed content in bytes",
+            "rows": "Number of data rows (without header)",
         }
 
 
@@ -43,6 +50,13 @@ def dnl_icecat_csv(context) -> Output:
     asset_context = build_asset_context(resources={"icecat_creds": context.resources.icecat_creds})
     mt = ICCsvMeta()
     mt.path = str(icecat_csv(asset_context))
+    # Content fingerprint (cached until the archive changes), icecat_csv_downloaded sensor starts parsing
+    # only if the content changed
+    mt.fingerprint = IceCatCsv.fingerprint(mt.path)
+    context.log.info(f"IceCat CSV fingerprint: {mt.fingerprint['content_hash']} "
+                     f"({mt.fingerprint['rows']:,} rows)")
+    context.log_event(AssetMaterialization(asset_key="icecat_csv", description="Downloaded IceCat CSV",
+                                           metadata=mt.fingerprint))
     return mt.to_meta()
 
 
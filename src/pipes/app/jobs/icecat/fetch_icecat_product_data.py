@@ -0,0 +1,211 @@
+# app/jobs/icecat/fetch_icecat_product_data.py
+from typing import Iterator, Optional, Tuple
+import time
+
+from dagster import job, op, get_dagster_logger, Output, Config
+from pydantic import Field
+
+from jobs.icecat.ICDataCache import ICDataCache
+from jobs.icecat.ICDataFetcher import ICDataFetcher
+from jobs.icecat.ICDataWriter import ICDataWriter
+from resources.pg.PgPool import PgPool
+from resources.pg.PgStorageRs import PgStorageRs
+
+
+class ICFetchConf(Config):
+    """Configuration for the ic_data_fetch op."""
+    url: str = Field(
+        default=ICDataFetcher.url_default,
+        description="URL of the product document, placeholders: {lang}, {product_id}, {path} (path column "
+                    "of the index, e.g. 'https://data.icecat.biz/{path}')"
+    )
+    lang: str = Field(
+        default="EN",
+        description="Language of the product data (IceCat language code)"
+    )
+    workers: int = Field(
+        default=16,
+        description="Number of concurrent HTTP requests (threads, each with its own keep-alive connection)"
+    )
+    rate: float = Field(
+        default=50.0,
+        description="Maximum number of requests per second over all workers, 0 disables the limit"
+    )
+    timeout: float = Field(
+        default=30.0,
+        description="Timeout of one HTTP request in seconds"
+    )
+    retries: int = Field(
+        default=3,
+        description="Number of retries of throttled (429) or failed (5xx) requests"
+    )
+    batch_size: int = Field(
+        default=500,
+        description="Number of product documents stored by one database call"
+    )
+    limit: int = Field(
+        default=0,
+        description="Maximum number of products to fetch in one run, 0 fetches all missing or outdated"
+    )
+    cache_dir: str = Field(
+        default=ICDataCache.dir_default,
+        description="Directory of the raw product documents cache (by product ID and version), "
+                    "empty disables the cache"
+    )
+
+
+class ICFetchMeta:
+    """Metadata for the product data fetching job."""
+    lang: str = "EN"
+    workers: int = 16
+    selected: int = 0
+    fetched: int = 0
+    cached: int = 0
+    missing: int = 0
+    failed: int = 0
+    failed_example: Optional[str] = None
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    requests: int = 0
+    retried: int = 0
+    rate_wait: float = 0.0
+    elapsed: float = 0.0
+    db_pool: Optional[dict] = None
+    error: Optional[str] = None
+
+    def per_min(self) -> float:
+        return round(self.selected / self.elapsed * 60, 1) if self.elapsed > 0 else 0.0
+
+    def to_meta(self):
+        return {
+            "lang": self.lang,
+            "workers": self.workers,
+            "products_selected": self.selected,
+            "products_fetched": self.fetched,
+            "products_cached": self.cached,
+            "products_missing": self.missing,
+            "products_failed": self.failed,
+            "failed_example": self.failed_example,
+            "rows_inserted": self.inserted,
+            "rows_updated": self.updated,
+            "rows_unchanged": self.unchanged,
+            "http_requests": self.requests,
+            "http_retries": self.retried,
+            "rate_wait_sec": round(self.rate_wait, 2),
+            "elapsed_sec": round(self.elapsed, 2),
+            "products_per_min": self.per_min(),
+            "db_pool": self.db_pool,
+            "error": self.error,
+        }
+
+    @staticmethod
+    def descriptions():
+        return {
+            "lang": "Language of the product data",
+            "workers": "Number of concurrent HTTP requests",
+            "products_selected": "Number of products whose data was missing or fetched for another metadata version",
+            "products_fetched": "Number of product documents downloaded from IceCat",
+            "products_cached": "Number of product documents read from the local cache",
+            "products_missing": "Number of products without a document (404), stored as empty data",
+            "products_failed": "Number of products whose document could not be fetched or parsed",
+            "failed_example": "Errors of some failed products",
+            "rows_inserted": "Number of product data records inserted into the database",
+            "rows_updated": "Number of product data records updated in the database",
+            "rows_unchanged": "Number of product data records which did not change",
+            "http_requests": "Number of HTTP requests sent (including retries)",
+            "http_retries": "Number of retried HTTP requests (throttled or server errors)",
+            "rate_wait_sec": "Time the workers waited for the rate limiter, summed over workers",
+            "elapsed_sec": "Duration of the fetching and loading in seconds",
+            "products_per_min": "Throughput of the fetching and loading (products per minute)",
+            "db_pool": "Connection pool of the storage database used by the op: size, idle, checkouts, waits for "
+                       "a free connection, creations, closures, failed checks",
+            "error": "Error message if any"}
+
+
+def select_products(cn, lang: str, limit: int) -> Iterator[Tuple[int, str, Optional[str], Optional[str]]]:
+    """Streams (product ID, UUID, path, version) of products to fetch, by a server-side cursor."""
+    with cn.cursor(name="ic_data_to_fetch") as cur:
+        cur.itersize = 10_000
+        cur.execute('select * from "listIceCatDataToFetch"(%s, %s)', (lang, limit if limit > 0 else None))
+        yield from cur
+
+
+@op(description="Fetches IceCat product documents and stores them into a database.",
+    required_resource_keys={"db_storage", "icecat_creds"},
+    tags={"group": "icecat"})
+def ic_data_fetch(context, config: ICFetchConf) -> Output:
+    """Fetches documents of products with missing or outdated data and stores them into a database."""
+    mt = ICFetchMeta()
+    mt.lang = config.lang.upper()
+    mt.workers = config.workers
+    db: PgStorageRs = context.resources.db_storage
+    creds = context.resources.icecat_creds
+    auth = (creds.username, creds.password) if creds and creds.get("username") else None
+    cache = ICDataCache(config.cache_dir, lang=mt.lang) if config.cache_dir else None
+    fetcher = ICDataFetcher(url=config.url, lang=mt.lang, auth=auth, workers=config.workers, rate=config.rate,
+                            cache=cache, timeout=config.timeout, retries=config.retries)
+
+    context.log.info(f"Fetching IceCat product data ({mt.lang}, {mt.workers} workers, "
+                     f"{config.rate:g} requests/sec)...")
+    started = time.perf_counter()
+    writer: Optional[ICDataWriter] = None
+    try:
+        # Products are streamed by one connection, documents stored by another
+        with db.conf() as cn_read, db.conf() as cn_write:
+            writer = ICDataWriter(cn_write, lang=mt.lang, batch_size=config.batch_size)
+            for doc in fetcher.fetch_many(select_products(cn_read, mt.lang, config.limit)):
+                mt.selected += 1
+                if doc.data is not None:
+                    mt.cached += doc.cached
+                    mt.fetched += not doc.cached
+                    writer.add(doc.prod_uuid, doc.data, doc.version)
+                elif doc.error == "Not found":
+                    # Stored empty, so it is requested again only once its metadata changes
+                    mt.missing += 1
+                    writer.add(doc.prod_uuid, {}, doc.version)
+                else:
+                    mt.failed += 1
+                    if mt.failed <= 20:
+                        context.log.warning(f"Product {doc.prod_id}: {doc.error}")
+                        mt.failed_example = f"{mt.failed_example or ''}{doc.prod_id}: {doc.error}\n"
+
+                # Progress reporting
+                if mt.selected % 10_000 == 0:
+                    elapsed = time.perf_counter() - started
+                    context.log.info(f"Processed {mt.selected:,} products "
+                                     f"({mt.selected / elapsed * 60:,.0f} products/min)")
+            writer.flush()
+            writer.close()
+    except Exception as e:
+        mt.error = f"{str(e)}"
+    finally:
+        fetcher.close()
+        mt.requests, mt.retried, mt.rate_wait = fetcher.requests, fetcher.retried, fetcher.limiter.waited
+        if writer is not None:
+            mt.inserted, mt.updated, mt.unchanged = writer.inserted, writer.updated, writer.unchanged
+        mt.elapsed = time.perf_counter() - started
+        mt.db_pool = PgPool.stats_of(db)
+    if mt.error is not None:
+        return Output(value="Failed to store data", metadata=mt.to_meta())
+
+    context.log.info(f"Fetched {mt.fetched:,} and cached {mt.cached:,} products, {mt.missing:,} missing, "
+                     f"{mt.failed:,} failed in {mt.elapsed:.1f}s ({mt.per_min():,.0f} products/min)")
+    context.log.info(f"Connection pool: {mt.db_pool}")
+    return Output(
+        value=f"Added/updated {mt.inserted + mt.updated:,} rows.",
+        metadata=mt.to_meta(),
+    )
+
+
+@job(description="Fetches IceCat product documents of products in the database and stores them.",
+     tags={"group": "icecat"},
+     metadata=ICFetchMeta.descriptions(), )
+def fetch_icecat_product_data():
+    """Fetches IceCat product documents and stores them into a database."""
+    logger = get_dagster_logger()
+    logger.info("Starting IceCat product data fetching...")
+    ic_data_fetch()
+
+
+__all__ = ["fetch_icecat_product_data"]
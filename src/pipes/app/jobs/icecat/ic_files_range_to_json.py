@@ -0,0 +1,43 @@
+# app/jobs/icecat/ic_files_range_to_json.py
+from pathlib import Path
+
+from dagster import get_dagster_logger
+
+from assets.icecat.IceCatCsvReader import IceCatCsvReader
+from jobs.icecat.ICFilesWriter import ICFilesWriter
+from jobs.icecat.ICRowBatches import ICRowBatches
+from jobs.icecat.ICStageTimings import ICStageTimings
+
+
+def ic_files_range_to_json(args: dict) -> dict:
+    """Parses a byte range of uncompressed IceCat CSV into JSON files (runs in a worker process)."""
+    logger = get_dagster_logger()
+    headers = args["headers"]
+    timings = ICStageTimings(enabled=args["stage_timings"])
+    # Each worker writes its own shards and partial index, tagged by range start
+    writer = ICFilesWriter(Path(args["output_dir"]), layout=args["layout"], compact=args["compact"],
+                           shard_size=args["shard_size"], tag=f"{args['start']:012d}", timings=timings,
+                           threads=args["write_threads"], durability=args["durability"])
+    batches = ICRowBatches(headers, size=args["parse_batch"], timings=timings, **writer.json_options())
+    counters = {"processed": 0, "bad_rows": 0, "files_count": 0, "shards_count": 0, "example_file": None}
+    rows = IceCatCsvReader.read_range(args["path"], args["start"], args["end"])
+
+    def written(file_path, failed):
+        if counters["example_file"] is None:
+            counters["example_file"] = file_path
+        for safe_id, error in failed:
+            logger.warning(f"Product {safe_id} failed: {error}")
+
+    # Line numbers are unknown inside a range, byte offset + row index is unique across ranges
+    for batch in batches.batches(rows, args["start"]):
+        counters["processed"] += batch.processed
+        counters["bad_rows"] += batch.bad_rows  # skip broken rows
+        if not batch.rows:
+            continue
+        written(*writer.write_many(batches.safe_ids(batch), batches.payloads(batch)))
+    written(*writer.drain())
+    writer.close()
+    counters["files_count"] = writer.files_count
+    counters["shards_count"] = writer.shards_count
+    counters["timings"] = timings.to_dict()
+    return counters
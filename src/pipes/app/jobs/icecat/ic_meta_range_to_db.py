@@ -0,0 +1,38 @@
+# app/jobs/icecat/ic_meta_range_to_db.py
+import json
+import os
+
+from assets.icecat.IceCatCsvReader import IceCatCsvReader
+from jobs.icecat.ICMetaWriter import ICMetaWriter
+from jobs.icecat.ICRowBatches import ICRowBatches
+from jobs.icecat.ICStageTimings import ICStageTimings
+from resources.pg.PgPool import PgPool
+from resources.pg.PgStorageRs import PgStorageRs
+
+
+def ic_meta_range_to_db(args: dict) -> dict:
+    """Parses a byte range of uncompressed IceCat CSV and stores it into the database (runs in a worker process)."""
+    headers = args["headers"]
+    counters = {"processed": 0, "bad_rows": 0, "inserted": 0, "unchanged": 0, "example": None}
+    timings = ICStageTimings(enabled=args["stage_timings"])
+    batches = ICRowBatches(headers, size=args["parse_batch"], timings=timings)
+    db = PgStorageRs(**args["db"])
+    with db.conf() as cn:
+        writer = ICMetaWriter(cn, mode=args["mode"], copy_batch=args["copy_batch"], batch_size=args["batch_size"],
+                              timings=timings)
+        rows = IceCatCsvReader.read_range(args["path"], args["start"], args["end"])
+        for batch in batches.batches(rows):
+            counters["processed"] += batch.processed
+            counters["bad_rows"] += batch.bad_rows  # Skip bad rows
+            if not batch.rows:
+                continue
+            if counters["example"] is None:
+                counters["example"] = json.dumps(dict(zip(headers, batch.rows[0])), indent=4)
+            writer.add_many(batches.int_ids(batch), batches.payloads(batch))
+        writer.flush()
+        writer.close()
+        counters["inserted"] = writer.inserted
+        counters["unchanged"] = writer.unchanged
+    counters["timings"] = timings.to_dict()
+    counters["db_pool"] = (os.getpid(), PgPool.stats_of(db))
+    return counters
@@ -1,27 +1,115 @@
 # app/jobs/icecat/parse_icecat_csv_into_db.py
-from typing import Optional
+from typing import Iterator, List, Optional, Tuple
 
-from dagster import job, get_dagster_logger, Output, op
-from psycopg2.extras import Json
-import csv
+from dagster import job, get_dagster_logger, Failure, Output, op, Config
+from concurrent.futures import as_completed
+from pydantic import Field
 import json
+import time
 
+from assets.icecat.IceCatCsv import IceCatCsv
+from assets.icecat.IceCatCsvReader import IceCatCsvReader
 from assets.icecat_csv import icecat_csv
-from jobs.icecat.count_rows_in_file import count_rows_in_file
+from jobs.icecat.ICCheckpoint import ICCheckpoint
+from jobs.icecat.ICDeltaIndex import ICDeltaIndex
+from jobs.icecat.ICMetaPipeline import ICMetaPipeline
+from jobs.icecat.ICMetaWriter import ICMetaWriter
+from jobs.icecat.ICRowBatches import ICRowBatches
+from jobs.icecat.ICStageTimings import ICStageTimings
+from jobs.icecat.ic_meta_range_to_db import ic_meta_range_to_db
+from jobs.icecat.worker_pool import worker_pool
+from resources.pg.PgPool import PgPool
 from resources.pg.PgStorageRs import PgStorageRs
 
 
+class ICToDbConf(Config):
+    """Configuration for the ic_meta_to_db op."""
+    mode: str = Field(
+        default="copy",
+        description="Loading mode: 'copy' (COPY into staging table + set-based merge), "
+                    "'batch' (saveIceCatProductMetaBatch per batch, unchanged products are skipped) "
+                    "or 'function' (saveIceCatProductMeta per row)"
+    )
+    copy_batch: int = Field(
+        default=50_000,
+        description="Number of rows streamed by one COPY before merging (mode 'copy')"
+    )
+    delta: bool = Field(
+        default=False,
+        description="Sends only new or changed products, based on content hashes of the previous load"
+    )
+    delta_index: str = Field(
+        default=ICDeltaIndex.path_default,
+        description="Path of the local index with content hashes of loaded products (delta mode)"
+    )
+    workers: int = Field(
+        default=1,
+        description="Number of worker processes parsing byte ranges of the uncompressed CSV in parallel "
+                    "(each with its own database connection)"
+    )
+    writers: int = Field(
+        default=0,
+        description="Number of concurrent database writers fed by a bounded queue while parsing continues "
+                    "(each with its own connection, at most DGS_PG_POOL_MAX), 0 parses and writes in turn"
+    )
+    queue_size: int = Field(
+        default=8,
+        description="Number of parsed batches waiting for the writers before parsing blocks (writers > 0)"
+    )
+    parse_batch: int = Field(
+        default=ICRowBatches.size_default,
+        description="Number of CSV rows parsed together as columns (field counts, IDs and JSON per block)"
+    )
+    resume: bool = Field(
+        default=True,
+        description="Resumes after the last committed batch of a failed run on the same file "
+                    "(sequential loading without delta mode)"
+    )
+    checkpoint_rows: int = Field(
+        default=500_000,
+        description="Commits and stores the position (checkpoint) at least every N rows, 0 disables checkpoints"
+    )
+    checkpoint_dir: str = Field(
+        default=ICCheckpoint.dir_default,
+        description="Directory of the checkpoints of interrupted loads"
+    )
+    stage_timings: bool = Field(
+        default=True,
+        description="Times the stages (parse, row, encode, write, db) block by block, costs no per-row work"
+    )
+    metrics_file: Optional[str] = Field(
+        default=None,
+        description="File to write stage timings into, in Prometheus text format (e.g. node_exporter textfile)"
+    )
+
+
 class ICToDbMeta:
     """Metadata for the CSV file parsing job."""
     bad_rows: int = 0
     batch_size: int = 1000
+    workers: int = 1
+    writers: int = 0
+    resumed: int = 0
+    parser_wait: float = 0.0
+    writers_wait: float = 0.0
+    delta: bool = False
+    deleted: int = 0
+    deleted_example: Optional[str] = None
+    elapsed: float = 0.0
     error: Optional[str] = None
     example: Optional[str] = None
     found: int = 0
     id_column: str = "product_id"
     inserted: int = 0
+    mode: str = "copy"
     prg_interval: int = 100_000
     processed: int = 0
+    unchanged: int = 0
+    db_pool: Optional[dict] = None
+    timings: Optional[ICStageTimings] = None
+
+    def rows_per_sec(self) -> float:
+        return round(self.processed / self.elapsed, 1) if self.elapsed > 0 else 0.0
 
     def to_meta(self):
         return {
@@ -32,85 +120,180 @@ class ICToDbMeta:
             "data_example": self.example,
             "id_column": "product_id",
             "progress_interval": self.prg_interval,
+            "load_mode": self.mode,
+            "elapsed_sec": round(self.elapsed, 2),
+            "rows_per_sec": self.rows_per_sec(),
+            "delta": self.delta,
+            "rows_unchanged": self.unchanged,
+            "rows_deleted": self.deleted,
+            "deleted_example": self.deleted_example,
+            "workers": self.workers,
+            "writers": self.writers,
+            "resumed_from_row": self.resumed,
+            "queue_wait_sec": {"parser": round(self.parser_wait, 2), "writers": round(self.writers_wait, 2)},
+            "db_pool": self.db_pool,
+            **(self.timings.to_meta(rows=self.processed) if self.timings is not None else {}),
+            "error": self.error,
         }
 
     @staticmethod
     def descriptions():
         return {
-            "rows_found": "Total number of rows found in the CSV file",
+            "rows_found": "Total number of rows found in the CSV file (counted while parsing)",
             "rows_processed": "Total number of rows processed from the CSV file",
             "rows_skipped": "Number of rows skipped due to incorrect number of fields",
             "rows_inserted": "Number of rows inserted into the database",
             "data_example": "An example row from the CSV file",
             "id_column": "Name of the column used as product ID",
             "progress_interval": "Number of rows processed between progress reports",
+            "load_mode": "Loading mode used ('copy', 'batch' or 'function')",
+            "elapsed_sec": "Duration of the parsing and loading in seconds",
+            "rows_per_sec": "Throughput of the parsing and loading (rows per second)",
+            "delta": "True if only new or changed products were sent to the database",
+            "rows_unchanged": "Number of products which did not change: not sent to the database (delta) "
+                              "or not updated by the database (mode 'batch')",
+            "rows_deleted": "Number of products missing from the CSV file since the previous load (delta)",
+            "deleted_example": "IDs of some products missing from the CSV file since the previous load (delta)",
+            "workers": "Number of worker processes used for parsing and loading",
+            "writers": "Number of concurrent database writers of the pipelined loading (0: not pipelined)",
+            "resumed_from_row": "Number of rows skipped because a previous run committed them (checkpoint)",
+            "queue_wait_sec": "Time the parser waited for a free place in the queue (database is slower) and "
+                              "the writers waited for batches (parsing is slower), summed over writers",
+            "db_pool": "Connection pool of the storage database used by the op: size, idle, checkouts, waits for "
+                       "a free connection, creations, closures, failed checks (summed over worker processes)",
+            **ICStageTimings.descriptions(),
             "error": "Error message if any"}
 
 
 @op(description="Parses CSV file and stores data into a database.",
     required_resource_keys={"db_storage"},
     tags={"group": "icecat"})
-def ic_meta_to_db(context, csv_path: str) -> Output:
+def ic_meta_to_db(context, config: ICToDbConf, csv_path: str) -> Output:
     """Parses CSV file and stores into a database."""
     mt = ICToDbMeta()
+    mt.mode = config.mode
+    mt.delta = config.delta
+    mt.timings = ICStageTimings(enabled=config.stage_timings)
     db: PgStorageRs = context.resources.db_storage
+    if mt.mode not in ("copy", "batch", "function"):
+        mt.error = f"Unknown loading mode: {mt.mode}"
+        return Output(value="Invalid configuration", metadata=mt.to_meta())
 
-    # 2. Count total rows (physical lines - header)
-    context.log.info("Detecting total number of rows...")
-    mt.found = count_rows_in_file(csv_path)
-    if mt.found <= 0:
-        mt.error = "No rows to process"
-        return Output(value="No data to process", metadata=mt.to_meta())
+    # 1. Load content hashes of the previous load (delta mode)
+    delta: Optional[ICDeltaIndex] = None
+    if mt.delta:
+        delta = ICDeltaIndex.make(path=config.delta_index, scope=f"{db.host}:{db.port}/{db.database}")
+        context.log.info(f"Delta mode: {len(delta.ids):,} products known from the previous load")
+
+    # Parallel processing of byte ranges (delta index is kept by a single process)
+    if config.workers > 1:
+        if delta is None:
+            return ic_meta_to_db_parallel(context, config, mt, db, csv_path)
+        context.log.warning("Delta mode is processed by a single process, 'workers' is ignored")
 
-    # 3. Process data with progress reporting
-    context.log.info(f"Starting processing of {mt.found:,} rows...")
-    with open(csv_path, "r", encoding="utf-8", errors="replace", newline="") as f:
-        reader = csv.reader(f, delimiter="\t", quoting=3)  # Value 3 is equal to csv.QUOTE_NONE
+    # 2. Process data in a single pass, progress is based on consumed bytes
+    context.log.info(f"Starting processing of {csv_path} (mode: {mt.mode})...")
+    started = time.perf_counter()
+    with IceCatCsv.reader(csv_path) as reader:
 
         # Read CSV header
-        try:
-            headers = next(reader)
-            expected_cols = len(headers)
-        except StopIteration:
+        headers = reader.headers
+        if headers is None:
             mt.error = "No header found in CSV file."
             return Output(value="Invalid header", metadata=mt.to_meta())
 
+        # Resume after the last committed batch of a failed run on the same file
+        checkpoint: Optional[ICCheckpoint] = None
+        inserted_before = 0
+        if config.checkpoint_rows > 0 and delta is None and config.writers <= 0:
+            checkpoint = ICCheckpoint.make(csv_path, scope=f"{db.host}:{db.port}/{db.database}",
+                                           path_dir=config.checkpoint_dir)
+            if config.resume and checkpoint.rows > 0:
+                mt.resumed = reader.skip(checkpoint.rows, checkpoint.offset)
+                mt.processed = mt.resumed
+                mt.bad_rows = checkpoint.counters.get("bad_rows", 0)
+                inserted_before = checkpoint.counters.get("inserted", 0)
+                mt.unchanged = checkpoint.counters.get("unchanged", 0)
+                context.log.info(f"Resuming after {mt.resumed:,} rows committed by a previous run "
+                                 f"(checkpoint {checkpoint.path})")
+
+        writer: Optional[ICMetaWriter] = None
+        pipeline: Optional[ICMetaPipeline] = None
         try:
-            with db.conf() as cn:
-                with cn.cursor() as cur:
-                    context.log.info(f"Processed {0:5.1f}%  |  {0:,} rows")
-                    batch = []
-                    for i, row_list in enumerate(reader, 2):  # line numbers starting from 2 (after header)
-                        mt.processed += 1
-
-                        if len(row_list) != expected_cols:
-                            mt.bad_rows += 1
-                            continue  # Skip bad rows
-
-                        # Store product row
-                        row: dict = dict(zip(headers, row_list))
-                        prod_id: int = int(row.get("product_id", ""))
-                        data: Json = Json(row)
-                        batch.append((prod_id, data))
-
-                        if mt.example is None:
-                            mt.example = json.dumps(row, indent=4)
-
-                        # Process queries batch if full or at the end
-                        if len(batch) >= mt.batch_size or mt.processed == mt.found:
-                            cur.executemany('select "saveIceCatProductMeta"(%s, %s)', batch)
-                            cn.commit()
-                            mt.inserted += len(batch)
-                            batch = []
-
-                        # Progress reporting
-                        if mt.processed % mt.prg_interval == 0 or mt.processed == mt.found:
-                            percent = (mt.processed / mt.found) * 100
-                            context.log.info(f"Processed {percent:5.1f}%  |  {mt.processed:,} rows")
+            context.log.info(f"Processed {0:5.1f}%  |  {0:,} rows")
+            rows = parse_batches(context, config, mt, reader, delta)
+            if config.writers > 0:
+                # Parsing overlaps with N concurrent writers, bounded queue in between
+                pipeline = ICMetaPipeline(db, writers=config.writers, queue_size=config.queue_size, mode=mt.mode,
+                                          copy_batch=config.copy_batch, batch_size=mt.batch_size,
+                                          timings=mt.timings)
+                mt.writers = pipeline.writers
+                try:
+                    mt.inserted = pipeline.run(rows)
+                finally:
+                    mt.unchanged += pipeline.unchanged
+                    mt.parser_wait, mt.writers_wait = pipeline.parser_wait, pipeline.writers_wait
+            else:
+                with db.conf() as cn:
+                    writer = ICMetaWriter(cn, mode=mt.mode, copy_batch=config.copy_batch, batch_size=mt.batch_size,
+                                          timings=mt.timings)
+                    for prod_ids, payloads in rows:
+                        writer.add_many(prod_ids, payloads)
+
+                        # Position after a commit (COPY batch merged, or forced every checkpoint_rows rows);
+                        # other modes commit every batch, so they are checkpointed by rows only
+                        merged = writer.mode == "copy" and writer.pending == 0
+                        if checkpoint is not None and (merged or
+                                                       mt.processed - checkpoint.rows >= config.checkpoint_rows):
+                            writer.flush()
+                            checkpoint.save(mt.processed, reader.offset_of(mt.processed), bad_rows=mt.bad_rows,
+                                            inserted=inserted_before + writer.inserted,
+                                            unchanged=mt.unchanged + writer.unchanged)
+
+                    # Store remaining rows
+                    writer.flush()
+                    writer.close()
+                    mt.inserted = inserted_before + writer.inserted
+                    mt.unchanged += writer.unchanged
+                    if checkpoint is not None:
+                        checkpoint.clear()
 
         except Exception as e:
             mt.error = f"{str(e)}"
-            return Output(value="Failed to store data", metadata=mt.to_meta())
+            mt.inserted = writer.inserted if writer is not None else pipeline.inserted if pipeline is not None else 0
+            mt.inserted += inserted_before
+            mt.unchanged += writer.unchanged if writer is not None else 0
+            if checkpoint is not None and checkpoint.rows > 0:
+                context.log.warning(f"Checkpoint kept after {checkpoint.rows:,} committed rows, "
+                                    f"next run on the same file resumes there")
+            mt.found = mt.processed
+            mt.elapsed = time.perf_counter() - started
+            mt.db_pool = PgPool.stats_of(db)
+            write_metrics(config, mt)
+            # Failed run: the sensor does not count the file as loaded and loads it again
+            raise Failure(description=f"Failed to store data: {mt.error}", metadata=mt.to_meta()) from e
+
+    mt.found = mt.processed
+    mt.elapsed = time.perf_counter() - started
+    mt.db_pool = PgPool.stats_of(db)
+    context.log.info(f"Connection pool: {mt.db_pool}")
+    write_metrics(config, mt)
+    if mt.found <= 0:
+        mt.error = "No rows to process"
+        return Output(value="No data to process", metadata=mt.to_meta())
+    if delta is not None:
+        deleted = delta.deleted()
+        mt.deleted = len(deleted)
+        mt.deleted_example = ", ".join(str(prod_id) for prod_id in deleted[:20]) or None
+        delta.save()
+        context.log.info(f"Delta: {delta.added:,} new, {delta.changed:,} changed, "
+                         f"{mt.unchanged:,} unchanged, {mt.deleted:,} deleted products")
+    context.log.info(f"Processed {100:5.1f}%  |  {mt.processed:,} rows")
+    context.log.info(f"Loaded {mt.processed:,} rows in {mt.elapsed:.1f}s ({mt.rows_per_sec():,.0f} rows/sec)")
+    context.log.info(f"Stage timings (bound by {mt.timings.bound_by()}): {mt.timings.seconds()}")
+    if mt.writers:
+        context.log.info(f"Pipeline: parser waited {mt.parser_wait:.1f}s for {mt.writers} writers, "
+                         f"writers waited {mt.writers_wait:.1f}s for batches")
 
     return Output(
         value=f"Added/updated {mt.inserted:,} rows.",
@@ -118,6 +301,115 @@ def ic_meta_to_db(context, csv_path: str) -> Output:
     )
 
 
+def parse_batches(context, config: ICToDbConf, mt: ICToDbMeta, reader: IceCatCsvReader,
+                  delta: Optional[ICDeltaIndex]) -> Iterator[Tuple[List[int], List[str]]]:
+    """Parses the CSV in blocks of rows, yields IDs and JSON payloads of the products to store."""
+    headers = reader.headers
+    batches = ICRowBatches(headers, size=config.parse_batch, timings=mt.timings)
+    # line numbers starting from 2 (after header)
+    for batch in batches.batches(reader, 2):
+        mt.processed += batch.processed
+        mt.bad_rows += batch.bad_rows  # Skip bad rows
+        if not batch.rows:
+            continue
+
+        # Store product rows
+        prod_ids = batches.int_ids(batch)
+        if mt.example is None:
+            mt.example = json.dumps(dict(zip(headers, batch.rows[0])), indent=4)
+
+        # Skip products which did not change since the previous load
+        columns = None
+        if delta is not None:
+            changed = [pos for pos, (prod_id, row_list) in enumerate(zip(prod_ids, batch.rows))
+                       if delta.is_changed(prod_id, row_list)]
+            mt.unchanged += len(prod_ids) - len(changed)
+            if not changed:
+                continue
+            if len(changed) < len(prod_ids):
+                prod_ids = [prod_ids[pos] for pos in changed]
+                columns = list(zip(*[batch.rows[pos] for pos in changed]))
+
+        yield prod_ids, batches.payloads(batch, columns)
+
+        # Progress reporting
+        if mt.processed // mt.prg_interval > (mt.processed - batch.processed) // mt.prg_interval:
+            context.log.info(f"Processed {reader.percent():5.1f}%  |  {mt.processed:,} rows")
+
+
+def ic_meta_to_db_parallel(context, config: ICToDbConf, mt: ICToDbMeta, db: PgStorageRs, csv_path: str) -> Output:
+    """Parses newline-aligned byte ranges of uncompressed CSV file in worker processes."""
+    mt.workers = config.workers
+    started = time.perf_counter()
+    plain_path = IceCatCsv.unzip(csv_path)
+    with IceCatCsv.reader(plain_path) as reader:
+        headers = reader.headers
+    if headers is None:
+        mt.error = "No header found in CSV file."
+        return Output(value="Invalid header", metadata=mt.to_meta())
+
+    # More ranges than workers balance the load and give finer progress reports
+    ranges = IceCatCsvReader.split(plain_path, parts=config.workers * 4)
+    total = sum(end - start for start, end in ranges) or 1
+    done = 0
+    pools = {}
+    db_cnf = {"host": db.host, "port": db.port, "user": db.user, "password": db.password,
+              "database": db.database, "db_schema": db.db_schema}
+    context.log.info(f"Starting processing of {plain_path} with {mt.workers} workers ({len(ranges)} ranges)...")
+    try:
+        with worker_pool(mt.workers) as pool:
+            futures = {
+                pool.submit(ic_meta_range_to_db, {
+                    "path": plain_path, "start": start, "end": end, "headers": headers, "db": db_cnf,
+                    "mode": mt.mode, "copy_batch": config.copy_batch, "batch_size": mt.batch_size,
+                    "parse_batch": config.parse_batch, "stage_timings": config.stage_timings,
+                }): end - start
+                for start, end in ranges
+            }
+            for future in as_completed(futures):
+                counters = future.result()
+                mt.processed += counters["processed"]
+                mt.bad_rows += counters["bad_rows"]
+                mt.inserted += counters["inserted"]
+                mt.unchanged += counters["unchanged"]
+                mt.timings.merge(counters["timings"])
+                # Statistics of a pool are cumulative, the last ones of each worker process count
+                pid, pool_stats = counters["db_pool"]
+                pools[pid] = pool_stats
+                if mt.example is None:
+                    mt.example = counters["example"]
+                done += futures[future]
+                context.log.info(f"Processed {done / total * 100:5.1f}%  |  {mt.processed:,} rows")
+    except Exception as e:
+        mt.error = f"{str(e)}"
+        mt.found = mt.processed
+        mt.elapsed = time.perf_counter() - started
+        mt.db_pool = PgPool.sum_stats(pools.values())
+        write_metrics(config, mt)
+        raise Failure(description=f"Failed to store data: {mt.error}", metadata=mt.to_meta()) from e
+
+    mt.found = mt.processed
+    mt.elapsed = time.perf_counter() - started
+    mt.db_pool = PgPool.sum_stats(pools.values())
+    write_metrics(config, mt)
+    if mt.found <= 0:
+        mt.error = "No rows to process"
+        return Output(value="No data to process", metadata=mt.to_meta())
+    context.log.info(f"Loaded {mt.processed:,} rows in {mt.elapsed:.1f}s ({mt.rows_per_sec():,.0f} rows/sec)")
+    context.log.info(f"Stage timings (bound by {mt.timings.bound_by()}): {mt.timings.seconds()}")
+    context.log.info(f"Connection pools of the workers: {mt.db_pool}")
+    return Output(
+        value=f"Added/updated {mt.inserted:,} rows.",
+        metadata=mt.to_meta(),
+    )
+
+
+def write_metrics(config: ICToDbConf, mt: ICToDbMeta):
+    """Exports stage timings in Prometheus text format, if configured."""
+    if config.metrics_file:
+        mt.timings.write_prometheus(config.metrics_file, op="ic_meta_to_db", rows=mt.processed, elapsed=mt.elapsed)
+
+
 @job(description="Parses IceCat CSV file and stores into a database.",
      tags={"group": "icecat"},
      metadata=ICToDbMeta.descriptions(), )
@@ -2,15 +2,20 @@
 import shutil
 from typing import Optional
 
+from concurrent.futures import as_completed
+import time
 from dagster import job, op, get_dagster_logger, Output, Config
 from pydantic import Field
 from pathlib import Path
-import csv
-import json
 
+from assets.icecat.IceCatCsv import IceCatCsv
+from assets.icecat.IceCatCsvReader import IceCatCsvReader
 from assets.icecat_csv import icecat_csv
-from jobs.icecat.count_rows_in_file import count_rows_in_file
-from jobs.icecat.get_prod_id import get_prod_id
+from jobs.icecat.ICFilesWriter import ICFilesWriter
+from jobs.icecat.ICRowBatches import ICRowBatches
+from jobs.icecat.ICStageTimings import ICStageTimings
+from jobs.icecat.ic_files_range_to_json import ic_files_range_to_json
+from jobs.icecat.worker_pool import worker_pool
 
 
 class ParserConf(Config):
@@ -23,6 +28,45 @@ class ParserConf(Config):
         default=True,
         description="Whether to remove the previous JSON files before parsing"
     )
+    workers: int = Field(
+        default=1,
+        description="Number of worker processes parsing byte ranges of the uncompressed CSV in parallel"
+    )
+    layout: str = Field(
+        default="flat",
+        description="Output layout: 'flat' (one JSON per product), 'hashed' (one JSON per product in "
+                    "hash-prefix subdirectories) or 'ndjson' (packed JSONL shards + offset index)"
+    )
+    shard_size: int = Field(
+        default=100_000,
+        description="Number of products per JSONL shard (layout 'ndjson')"
+    )
+    parse_batch: int = Field(
+        default=ICRowBatches.size_default,
+        description="Number of CSV rows parsed together as columns (field counts, IDs and JSON per block)"
+    )
+    compact: bool = Field(
+        default=False,
+        description="Whether to write compact (non-indented) JSON"
+    )
+    write_threads: int = Field(
+        default=4,
+        description="Number of threads writing the JSON files of parsed blocks (layouts 'flat' and 'hashed'), "
+                    "0 writes them on the parsing thread"
+    )
+    durability: str = Field(
+        default="none",
+        description="When written files are fsynced: 'none' (left to the OS), 'batch' (every parsed block) "
+                    "or 'end' (once, when all files are written)"
+    )
+    stage_timings: bool = Field(
+        default=True,
+        description="Times the stages (parse, row, encode, write, db) block by block, costs no per-row work"
+    )
+    metrics_file: Optional[str] = Field(
+        default=None,
+        description="File to write stage timings into, in Prometheus text format (e.g. node_exporter textfile)"
+    )
 
 
 class ICToFilesMeta:
@@ -35,6 +79,13 @@ class ICToFilesMeta:
     example_file: Optional[str] = "None"
     id_column: str = "product_id"
     prg_interval: int = 200_000
+    workers: int = 1
+    layout: str = "flat"
+    shards_count: int = 0
+    write_threads: int = 0
+    durability: str = "none"
+    elapsed: float = 0.0
+    timings: Optional[ICStageTimings] = None
 
     def to_meta(self):
         return Output(
@@ -48,6 +99,13 @@ class ICToFilesMeta:
                 "example_file": self.example_file,
                 "id_column": self.id_column,
                 "progress_interval": self.prg_interval,
+                "workers": self.workers,
+                "layout": self.layout,
+                "shards_count": self.shards_count,
+                "write_threads": self.write_threads,
+                "durability": self.durability,
+                "elapsed_sec": round(self.elapsed, 2),
+                **(self.timings.to_meta(rows=self.rows_processed) if self.timings is not None else {}),
             }
         )
 
@@ -55,13 +113,20 @@ class ICToFilesMeta:
     def descriptions():
         return {
             "output_dir": "Directory where JSON files will be written",
-            "rows_found": "Total number of rows found in the CSV file",
+            "rows_found": "Total number of rows found in the CSV file (counted while parsing)",
             "rows_processed": "Total number of rows processed from the CSV file",
             "rows_skipped": "Number of rows skipped due to incorrect number of fields",
             "files_generated": "Number of JSON files generated",
             "example_file": "Path to an example JSON file generated",
             "id_column": "Name of the column used as product ID",
             "progress_interval": "Number of rows processed between progress reports",
+            "workers": "Number of worker processes used for parsing",
+            "layout": "Output layout ('flat', 'hashed' or 'ndjson')",
+            "shards_count": "Number of JSONL shards written (layout 'ndjson')",
+            "write_threads": "Number of threads writing JSON files (per worker process)",
+            "durability": "When written files were fsynced: 'none', 'batch' or 'end'",
+            "elapsed_sec": "Duration of the parsing in seconds",
+            **ICStageTimings.descriptions(),
         }
 
 
@@ -80,66 +145,72 @@ def make_output_dir(config: ParserConf) -> Path:
 def parse_csv_to_json(config: ParserConf, csv_path: str) -> Output:
     """
     Parses large IceCat CSV → one JSON per product.
-    Two-pass version: first counts total rows, then processes with percentage progress.
+    Single-pass version: percentage progress is based on bytes consumed from the file.
     Uses csv.reader to avoid silent row dropping on bad quoting.
     """
     logger = get_dagster_logger()
     mt = ICToFilesMeta()
     mt.output_dir = config.output_dir
+    mt.layout = config.layout
+    mt.write_threads = config.write_threads
+    mt.durability = config.durability
+    mt.timings = ICStageTimings(enabled=config.stage_timings)
     path_output = make_output_dir(config=config)
 
-    # 2. Count total rows (physical lines - header)
-    logger.info("Detecting total number of rows...")
-    rows_found = count_rows_in_file(csv_path)
-    if rows_found <= 0:
-        return Output(value="No data to process", metadata={"rows_found": 0})
+    # Parallel processing of byte ranges
+    if config.workers > 1:
+        return parse_csv_to_json_parallel(config, mt, csv_path)
 
-    # 3. Process data with progress reporting
-    logger.info(f"Starting processing of {rows_found:,} rows...")
+    # 2. Process data in a single pass with progress reporting
+    logger.info(f"Starting processing of {csv_path}...")
     logger.info(f"Storing JSON files into: {mt.output_dir}")
 
-    with open(csv_path, "r", encoding="utf-8", errors="replace", newline="") as f:
-        reader = csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+    started = time.perf_counter()
+    with IceCatCsv.reader(csv_path) as reader:
 
         # Read header
-        try:
-            headers = next(reader)
-            expected_cols = len(headers)
-        except StopIteration:
+        headers = reader.headers
+        if headers is None:
             return Output(value="No data to process", metadata={"rows_found": 0})
 
+        writer = ICFilesWriter(path_output, layout=mt.layout, compact=config.compact, shard_size=config.shard_size,
+                               timings=mt.timings, threads=config.write_threads, durability=config.durability)
+        batches = ICRowBatches(headers, size=config.parse_batch, timings=mt.timings, **writer.json_options())
+
+        # Files are written by writer threads, results arrive for the blocks completed meanwhile
+        def written(file_path: Optional[str], failed: list):
+            if mt.example_file in (None, "None"):
+                mt.example_file = file_path
+            for safe_id, error in failed:
+                logger.warning(f"Product {safe_id} failed: {error}")
+
         logger.info(f"Processed {0:5.1f}%  |  {0:,} rows")
-        for i, row_list in enumerate(reader, 2):  # line numbers starting from 2 (after header)
-            mt.rows_processed += 1
-
-            if len(row_list) != expected_cols:
-                mt.bad_rows += 1
-                continue  # skip broken rows
-
-            row = dict(zip(headers, row_list))
-            prod_id = get_prod_id(row, i)
-
-            # File name and path
-            safe_id = "".join(c for c in prod_id if c.isalnum() or c in "-_.")
-            file_path = path_output / f"icecat_{safe_id}.json"
-
-            # Parse and store
-            try:
-                with open(file_path, "w", encoding="utf-8") as jf:
-                    json.dump(row, jf, ensure_ascii=False, indent=2)
-                mt.files_count += 1
-                if mt.example_file is None:
-                    mt.example_file = str(file_path)
-
-                # Progress reporting
-                if mt.rows_processed % mt.prg_interval == 0 or mt.rows_processed == rows_found:
-                    percent = (mt.rows_processed / rows_found) * 100
-                    logger.info(f"Processed {percent:5.1f}%  |  {mt.rows_processed:,} rows")
-
-            except Exception as e:
-                logger.warning(f"Row {i} ({safe_id}) failed: {e}")
+        # line numbers starting from 2 (after header)
+        for batch in batches.batches(reader, 2):
+            mt.rows_processed += batch.processed
+            mt.bad_rows += batch.bad_rows  # skip broken rows
+            if not batch.rows:
                 continue
 
+            # File names and JSON of the whole block
+            written(*writer.write_many(batches.safe_ids(batch), batches.payloads(batch)))
+
+            # Progress reporting
+            if mt.rows_processed // mt.prg_interval > (mt.rows_processed - batch.processed) // mt.prg_interval:
+                logger.info(f"Processed {reader.percent():5.1f}%  |  {mt.rows_processed:,} rows")
+
+        written(*writer.drain())
+        writer.close()
+        mt.files_count = writer.files_count
+        mt.shards_count = writer.shards_count
+
+    mt.rows_found = mt.rows_processed
+    mt.elapsed = time.perf_counter() - started
+    write_metrics(config, mt)
+    if mt.rows_found <= 0:
+        return Output(value="No data to process", metadata={"rows_found": 0})
+    logger.info(f"Processed {100:5.1f}%  |  {mt.rows_processed:,} rows")
+    logger.info(f"Stage timings (bound by {mt.timings.bound_by()}): {mt.timings.seconds()}")
     logger.info(f"Completed! Created {mt.files_count:,} JSON files in {mt.output_dir}")
     if mt.bad_rows > 0:
         logger.info(f"Skipped {mt.bad_rows:,} rows due to incorrect number of fields")
@@ -147,6 +218,64 @@ def parse_csv_to_json(config: ParserConf, csv_path: str) -> Output:
     return mt.to_meta()
 
 
+def parse_csv_to_json_parallel(config: ParserConf, mt: ICToFilesMeta, csv_path: str) -> Output:
+    """Parses newline-aligned byte ranges of uncompressed CSV file in worker processes."""
+    logger = get_dagster_logger()
+    mt.workers = config.workers
+    started = time.perf_counter()
+    plain_path = IceCatCsv.unzip(csv_path)
+    with IceCatCsv.reader(plain_path) as reader:
+        headers = reader.headers
+    if headers is None:
+        return Output(value="No data to process", metadata={"rows_found": 0})
+
+    # More ranges than workers balance the load and give finer progress reports
+    ranges = IceCatCsvReader.split(plain_path, parts=config.workers * 4)
+    total = sum(end - start for start, end in ranges) or 1
+    done = 0
+    logger.info(f"Starting processing of {plain_path} with {mt.workers} workers ({len(ranges)} ranges)...")
+    logger.info(f"Storing JSON files into: {mt.output_dir}")
+    with worker_pool(mt.workers) as pool:
+        futures = {
+            pool.submit(ic_files_range_to_json, {
+                "path": plain_path, "start": start, "end": end, "headers": headers, "output_dir": mt.output_dir,
+                "layout": mt.layout, "compact": config.compact, "shard_size": config.shard_size,
+                "parse_batch": config.parse_batch, "stage_timings": config.stage_timings,
+                "write_threads": config.write_threads, "durability": config.durability,
+            }): end - start
+            for start, end in ranges
+        }
+        for future in as_completed(futures):
+            counters = future.result()
+            mt.rows_processed += counters["processed"]
+            mt.bad_rows += counters["bad_rows"]
+            mt.files_count += counters["files_count"]
+            mt.shards_count += counters["shards_count"]
+            mt.timings.merge(counters["timings"])
+            if mt.example_file in (None, "None"):
+                mt.example_file = counters["example_file"]
+            done += futures[future]
+            logger.info(f"Processed {done / total * 100:5.1f}%  |  {mt.rows_processed:,} rows")
+
+    ICFilesWriter.merge_indexes(Path(mt.output_dir), durability=config.durability)
+    mt.rows_found = mt.rows_processed
+    mt.elapsed = time.perf_counter() - started
+    write_metrics(config, mt)
+    if mt.rows_found <= 0:
+        return Output(value="No data to process", metadata={"rows_found": 0})
+    logger.info(f"Completed! Created {mt.files_count:,} JSON files in {mt.output_dir}")
+    if mt.bad_rows > 0:
+        logger.info(f"Skipped {mt.bad_rows:,} rows due to incorrect number of fields")
+    return mt.to_meta()
+
+
+def write_metrics(config: ParserConf, mt: ICToFilesMeta):
+    """Exports stage timings in Prometheus text format, if configured."""
+    if config.metrics_file:
+        mt.timings.write_prometheus(config.metrics_file, op="parse_csv_to_json", rows=mt.rows_processed,
+                                    elapsed=mt.elapsed)
+
+
 @job(description="Parses IceCat CSV file into JSON files.",
      tags={"group": "icecat"},
      metadata=ICToFilesMeta.descriptions(),
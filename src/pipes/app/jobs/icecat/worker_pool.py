@@ -0,0 +1,17 @@
+# app/jobs/icecat/worker_pool.py
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import multiprocessing
+import site
+
+APP_DIR = str(Path(__file__).resolve().parents[2])
+
+
+def worker_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Returns pool of spawned worker processes able to import the code location (jobs.icecat.*).
+    Dagster does not keep the app directory in sys.path after loading the definitions, so the workers
+    add it themselves (the initializer is a stdlib function, importable before sys.path is extended).
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=site.addsitedir, initargs=(APP_DIR,))
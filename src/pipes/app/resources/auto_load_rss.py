@@ -1,20 +1,14 @@
 # app/resources/auto_load_rss.py
-import importlib
-import pkgutil
 from typing import Dict, Any
 
 from dagster import ResourceDefinition
 
+from auto_load.DefsManifest import DefsManifest
+
 
 def auto_load_rss(package_name: str = "resources") -> Dict[str, Any]:
     resources = {}
-    package = importlib.import_module(package_name)
-
-    for _, module_name, _ in pkgutil.walk_packages(package.__path__, prefix=f"{package_name}."):
-        try:
-            module = importlib.import_module(module_name)
-        except ImportError:
-            continue
+    for module in DefsManifest.load(package_name, "resource", skip_import_errors=True):
         if hasattr(module, '__all__') and len(module.__all__) > 0:
             exported_name = module.__all__[0]
             res = getattr(module, exported_name, None)
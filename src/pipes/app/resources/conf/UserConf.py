@@ -3,12 +3,14 @@ from contextlib import contextmanager
 from box import Box
 from psycopg2.extras import Json
 
+from resources.conf.UserConfCache import UserConfCache
 from resources.pg.DagsterDb import DagsterDb
 
 
 class UserConf:
     """
     Simple persistent key-value configuration storage using Box (dot-notation-friendly).
+    Loaded configurations are cached in-process (see UserConfCache).
     """
 
     @staticmethod
@@ -32,15 +34,27 @@ class UserConf:
         with UserConf._get_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("select set_user_conf(%s, %s)", (name, Json(value)))
+            conn.commit()
+        UserConfCache.invalidate(name)
 
     @staticmethod
     def load(name: str) -> Box:
         """
-        Load configuration by name
+        Load configuration by name (cached)
 
         Returns:
             Box object with dot-notation access
 
+        Raises:
+            ValueError: if configuration doesn't exist or is null
+        """
+        return Box(UserConfCache.get(name, lambda: UserConf.fetch(name)))
+
+    @staticmethod
+    def fetch(name: str) -> dict:
+        """
+        Fetch configuration by name from the database, bypassing the cache
+
         Raises:
             ValueError: if configuration doesn't exist or is null
         """
@@ -50,4 +64,4 @@ class UserConf:
                 row = cur.fetchone()
                 if row is None or row[0] is None:
                     raise ValueError(f"Configuration '{name}' not found")
-                return Box(row[0])
+                return row[0]
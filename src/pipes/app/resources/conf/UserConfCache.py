@@ -0,0 +1,105 @@
+# app/resources/conf/UserConfCache.py
+from threading import Lock, Thread
+from typing import Callable, Dict, Optional, Tuple
+import copy
+import multiprocessing
+import os
+import select
+import time
+
+from dagster import get_dagster_logger
+
+from resources.pg.DagsterDb import DagsterDb
+
+
+class UserConfCache:
+    """
+    In-process cache of user configurations.
+    Entries expire after DGS_CONF_TTL seconds (default 300). Processes reading configurations repeatedly
+    (code server, daemon, long runs) also listen on channel 'user_conf_changed', where set_user_conf()
+    sends NOTIFY, and invalidate changed entries right away. The listener (one extra connection) is started
+    on the first reuse of a cached entry, never in worker processes, and can be disabled by DGS_CONF_LISTEN=0.
+    """
+
+    ttl = float(os.getenv("DGS_CONF_TTL", "300"))
+    channel = "user_conf_changed"
+    _entries: Dict[str, Tuple[dict, float]] = {}
+    _generation = 0
+    _lock = Lock()
+    _listener: Optional[Thread] = None
+
+    @staticmethod
+    def get(name: str, loader: Callable[[], dict]) -> dict:
+        """Returns cached configuration, loading it when missing or expired."""
+        key = name.strip()
+        with UserConfCache._lock:
+            entry = UserConfCache._entries.get(key)
+            generation = UserConfCache._generation
+        if entry is not None and entry[1] > time.monotonic():
+            UserConfCache.start_listener()
+            return copy.deepcopy(entry[0])
+        value = loader()
+        with UserConfCache._lock:
+            # Not cached if invalidated while loading, the loaded value may predate the change
+            if generation == UserConfCache._generation:
+                UserConfCache._entries[key] = (value, time.monotonic() + UserConfCache.ttl)
+        return copy.deepcopy(value)
+
+    @staticmethod
+    def invalidate(name: Optional[str] = None):
+        """Removes given configuration (or all of them) from the cache."""
+        with UserConfCache._lock:
+            UserConfCache._generation += 1
+            if name is None:
+                UserConfCache._entries.clear()
+            else:
+                UserConfCache._entries.pop(name.strip(), None)
+
+    @staticmethod
+    def listening() -> bool:
+        """Whether the process should listen for changes (not in worker processes, not disabled)."""
+        return os.getenv("DGS_CONF_LISTEN", "1") != "0" and multiprocessing.parent_process() is None
+
+    @staticmethod
+    def start_listener():
+        """Starts background thread listening for configuration changes (once per process)."""
+        if UserConfCache._listener is not None and UserConfCache._listener.is_alive():
+            return
+        if not UserConfCache.listening():
+            return
+        with UserConfCache._lock:
+            if UserConfCache._listener is None or not UserConfCache._listener.is_alive():
+                UserConfCache._listener = Thread(target=UserConfCache.listen, name="user-conf-listener", daemon=True)
+                UserConfCache._listener.start()
+
+    @staticmethod
+    def listen():
+        """Invalidates cached entries on notifications, reconnecting with backoff on failures."""
+        logger = get_dagster_logger()
+        delay = 1
+        connected = False
+        while True:
+            conn = None
+            try:
+                conn = DagsterDb.connect()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {UserConfCache.channel}")
+                if connected:
+                    # Changes made while reconnecting are unknown (before the first connect, TTL applies)
+                    UserConfCache.invalidate()
+                connected = True
+                delay = 1
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        UserConfCache.invalidate(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.warning(f"User configuration listener failed, retrying in {delay}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 60)
+            finally:
+                if conn is not None:
+                    conn.close()
@@ -1,9 +1,11 @@
 # app/resources/defs.py
+from auto_load.StartupProfile import StartupProfile
 from .pg.PgDynamicRs import PgDynamicRs
 from .auto_load_rss import auto_load_rss
 
 # Hardcoded resources
-db_dynamic_rs = PgDynamicRs.configure_at_launch()
+with StartupProfile.section("PgDynamicRs.configure_at_launch", definitions=["db_dynamic"], kind="resource"):
+    db_dynamic_rs = PgDynamicRs.configure_at_launch()
 RSS_MANUAL = {"db_dynamic": db_dynamic_rs}
 
 # Dynamically loaded resources
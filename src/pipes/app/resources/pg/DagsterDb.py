@@ -2,6 +2,7 @@
 from contextlib import contextmanager
 from functools import lru_cache
 from resources.pg.PgConnCnf import PgConnCnf
+from resources.pg.PgPool import PgPool
 import os
 import psycopg2
 
@@ -25,9 +26,15 @@ class DagsterDb:
     @staticmethod
     @contextmanager
     def conn():
-        """Returns the PostgreSQL connection."""
+        """Returns the PostgreSQL connection (pooled)."""
+        with PgPool.connection(DagsterDb.conf()) as conn:
+            yield conn
+
+    @staticmethod
+    def connect():
+        """Opens dedicated (not pooled) PostgreSQL connection, e.g. for long-lived LISTEN."""
         cnf = DagsterDb.conf()
-        conn = psycopg2.connect(
+        return psycopg2.connect(
             host=cnf.host,
             user=cnf.user,
             password=cnf.password,
@@ -35,7 +42,3 @@ class DagsterDb:
             port=cnf.port,
             options=f"-c search_path={cnf.db_schema}"
         )
-        try:
-            yield conn
-        finally:
-            conn.close()
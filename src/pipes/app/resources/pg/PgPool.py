@@ -0,0 +1,205 @@
+# app/resources/pg/PgPool.py
+from contextlib import contextmanager
+from threading import Condition, Lock
+from typing import Dict, Iterable, List, Tuple
+import os
+import time
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class PgPool:
+    """
+    Process-wide pool of PostgreSQL connections, keyed by connection configuration.
+    Shared by DagsterDb, PgStorageRs and PgDynamicRs. Sizes and timeouts are configured by environment:
+      - DGS_PG_POOL_MIN:     connections kept open even when idle (default 0)
+      - DGS_PG_POOL_MAX:     maximum number of connections per configuration (default 10)
+      - DGS_PG_POOL_IDLE:    seconds after which idle connections are closed (default 300)
+      - DGS_PG_POOL_CHECK:   seconds of idleness after which a connection is checked before use (default 30)
+      - DGS_PG_POOL_TIMEOUT: seconds to wait for a free connection (default 30)
+    """
+
+    min_size = int(os.getenv("DGS_PG_POOL_MIN", "0"))
+    max_size = int(os.getenv("DGS_PG_POOL_MAX", "10"))
+    idle_timeout = float(os.getenv("DGS_PG_POOL_IDLE", "300"))
+    check_after = float(os.getenv("DGS_PG_POOL_CHECK", "30"))
+    wait_timeout = float(os.getenv("DGS_PG_POOL_TIMEOUT", "30"))
+
+    _pools: Dict[tuple, 'PgPool'] = {}
+    _pid = os.getpid()
+    _lock = Lock()
+
+    def __init__(self, params: dict):
+        self.params = params
+        self.label = f"{params['user']}@{params['host']}:{params['port']}/{params['dbname']}"
+        self.idle: List[Tuple[object, float]] = []
+        self.size = 0
+        self.cond = Condition()
+        self.checkouts = 0
+        self.waits = 0
+        self.creations = 0
+        self.closures = 0
+        self.failed_checks = 0
+
+    @staticmethod
+    def get(cnf) -> 'PgPool':
+        """Returns the pool of given connection configuration (PgConnCnf or resource based on it)."""
+        key = (cnf.host, cnf.port, cnf.user, cnf.password, cnf.database, cnf.db_schema)
+        with PgPool._lock:
+            # Connections must not be shared with forked processes
+            if PgPool._pid != os.getpid():
+                PgPool._pools = {}
+                PgPool._pid = os.getpid()
+            pool = PgPool._pools.get(key)
+            if pool is None:
+                pool = PgPool({
+                    "host": cnf.host,
+                    "user": cnf.user,
+                    "password": cnf.password,
+                    "dbname": cnf.database,
+                    "port": cnf.port,
+                    "options": f"-c search_path={cnf.db_schema}",
+                })
+                PgPool._pools[key] = pool
+            return pool
+
+    @staticmethod
+    @contextmanager
+    def connection(cnf):
+        """Checks out pooled connection for the duration of the context."""
+        pool = PgPool.get(cnf)
+        conn = pool.acquire()
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+
+    @staticmethod
+    def stats() -> Dict[str, dict]:
+        """Returns statistics of all pools of the process."""
+        with PgPool._lock:
+            pools = list(PgPool._pools.values())
+        return {pool.label: pool.pool_stats() for pool in pools}
+
+    @staticmethod
+    def stats_of(cnf) -> dict:
+        """Returns statistics of the pool of given connection configuration (e.g. as op metadata)."""
+        return PgPool.get(cnf).pool_stats()
+
+    @staticmethod
+    def sum_stats(stats: Iterable[dict]) -> dict:
+        """Sums statistics of pools of several processes (e.g. worker processes of an op)."""
+        total: Dict[str, int] = {}
+        for values in stats:
+            for name, value in values.items():
+                total[name] = total.get(name, 0) + value
+        return total
+
+    def pool_stats(self) -> dict:
+        with self.cond:
+            return {
+                "size": self.size,
+                "idle": len(self.idle),
+                "in_use": self.size - len(self.idle),
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "creations": self.creations,
+                "closures": self.closures,
+                "failed_checks": self.failed_checks,
+            }
+
+    def acquire(self):
+        """Returns healthy idle connection or opens a new one, waiting while the pool is exhausted."""
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            conn, idle_since = None, 0.0
+            with self.cond:
+                self.evict_idle()
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No free connection in pool {self.label} ({self.max_size} in use)")
+                    self.waits += 1
+                    self.cond.wait(remaining)
+                if self.idle:
+                    conn, idle_since = self.idle.pop()
+                else:
+                    self.size += 1
+                self.checkouts += 1
+            if conn is None:
+                return self.create()
+            if self.is_healthy(conn, idle_since):
+                return conn
+            self.discard(conn)
+
+    def create(self):
+        try:
+            conn = psycopg2.connect(**self.params)
+        except Exception:
+            with self.cond:
+                self.size -= 1
+                self.cond.notify()
+            raise
+        with self.cond:
+            self.creations += 1
+        return conn
+
+    def is_healthy(self, conn, idle_since: float) -> bool:
+        """Checks connection state, connections idle for a while are also pinged."""
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("select 1")
+            conn.rollback()
+            return True
+        except Exception:
+            with self.cond:
+                self.failed_checks += 1
+            return False
+
+    def release(self, conn):
+        """Returns connection into the pool, resetting any open transaction."""
+        try:
+            if not conn.closed and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if not conn.closed and conn.autocommit:
+                conn.autocommit = False
+        except Exception:
+            pass
+        if conn.closed:
+            self.discard(conn)
+            return
+        with self.cond:
+            self.idle.append((conn, time.monotonic()))
+            self.evict_idle()
+            self.cond.notify()
+
+    def discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self.cond:
+            self.size -= 1
+            self.closures += 1
+            self.cond.notify()
+
+    def evict_idle(self):
+        """Closes connections idle longer than the idle timeout, keeping minimum size (called under lock)."""
+        now = time.monotonic()
+        keep = []
+        for conn, idle_since in self.idle:
+            if now - idle_since > self.idle_timeout and self.size > self.min_size:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                self.size -= 1
+                self.closures += 1
+            else:
+                keep.append((conn, idle_since))
+        self.idle = keep
@@ -1,16 +1,14 @@
-import importlib
-import pkgutil
 from dagster import SensorDefinition
 from typing import List
 
+from auto_load.DefsManifest import DefsManifest
+
 
 # noinspection DuplicatedCode
 def auto_load_sensors(package_name: str = "sensors") -> List[SensorDefinition]:
     """Loads sensors automatically."""
     sensors: List[SensorDefinition] = []
-    package = importlib.import_module(package_name)
-    for _, module_name, _ in pkgutil.walk_packages(package.__path__, prefix=f"{package_name}."):
-        module = importlib.import_module(module_name)
+    for module in DefsManifest.load(package_name, "sensor"):
         exported_names = getattr(module, '__all__', dir(module))
         for name in exported_names:
             obj = getattr(module, name)
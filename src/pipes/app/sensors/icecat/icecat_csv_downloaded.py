@@ -1,23 +1,92 @@
-from dagster import run_status_sensor, DagsterRunStatus, RunRequest, RunsFilter, SkipReason
+import json
+
+from typing import Optional
+
+from dagster import (sensor, AssetKey, AssetRecordsFilter, DagsterEventType, DagsterRunStatus, RunRequest, RunsFilter,
+                     SkipReason)
 
-from jobs.icecat.download_icecat_csv import download_icecat_csv
 from jobs.icecat.parse_icecat_csv_into_db import parse_icecat_csv_into_db
 
+ICECAT_CSV = AssetKey("icecat_csv")
+FINISHED_STATUSES = (DagsterRunStatus.SUCCESS, DagsterRunStatus.FAILURE, DagsterRunStatus.CANCELED)
+
+
+def load_failed(instance, run_id: str) -> bool:
+    """
+    Whether an op of the run reported an error in its 'error' output metadata (e.g. invalid header);
+    failed loads raise Failure, their runs are not successful.
+    """
+    for record in instance.all_logs(run_id, of_type=DagsterEventType.STEP_OUTPUT):
+        error = record.dagster_event.step_output_data.metadata.get("error")
+        if error is not None and error.value:
+            return True
+    return False
+
 
-@run_status_sensor(
-    run_status=DagsterRunStatus.SUCCESS,
-    monitored_jobs=[download_icecat_csv],
-    request_job=parse_icecat_csv_into_db,
+def latest_download(instance, after_storage_id: int) -> Optional[tuple]:
+    """
+    Returns storage ID of the newest materialization of icecat_csv and the newest download
+    (record with content hash) after the given storage ID, None if there is none.
+    Materializations without content hash (UI, asset graph) are skipped, they did not download anything.
+    """
+    newest, found, page = None, None, None
+    records_filter = AssetRecordsFilter(asset_key=ICECAT_CSV, after_storage_id=after_storage_id)
+    while found is None:
+        result = instance.fetch_materializations(records_filter, limit=100, cursor=page)
+        for record in result.records:
+            newest = newest or record.storage_id
+            metadata = record.asset_materialization.metadata if record.asset_materialization else {}
+            if "content_hash" in metadata:
+                found = record
+                break
+        if not result.has_more:
+            break
+        page = result.cursor
+    return (newest, found) if newest is not None else None
+
+
+@sensor(
+    job=parse_icecat_csv_into_db,
     tags={"group": "icecat"},
     minimum_interval_seconds=60,
+    description="Starts parsing when a downloaded IceCat CSV differs from the last loaded one (content hash).",
 )
 def icecat_csv_downloaded(context):
-    """Sensor that triggers downstream when the CSV download job completes successfully."""
+    """
+    Sensor that triggers downstream when a newly downloaded CSV file has changed content.
+    Cursor: storage ID of the last seen download (materialization of icecat_csv), content hash
+    of the last successfully loaded file and the run loading a new one (pending).
+    """
+    cursor = json.loads(context.cursor) if context.cursor else {}
     instance = context.instance
-    in_progress_statuses = [DagsterRunStatus.STARTED, DagsterRunStatus.QUEUED, DagsterRunStatus.STARTING, ]
-    runs_filter = RunsFilter(job_name=parse_icecat_csv_into_db.name, statuses=in_progress_statuses)
-    active_runs = instance.get_runs(filters=runs_filter, limit=1)
-    if len(active_runs) > 0:
-        return SkipReason(f"Job {parse_icecat_csv_into_db.name} is already active")
-    run_id = context.dagster_run.run_id
-    return RunRequest(run_key=run_id, tags={"parent_run_id": run_id})
+
+    # A load is pending: the file counts as loaded only once the run succeeded
+    pending = cursor.get("pending")
+    if pending:
+        runs = instance.get_runs(filters=RunsFilter(tags={"dagster/run_key": pending["run_key"]}), limit=1)
+        if runs and runs[0].status not in FINISHED_STATUSES:
+            return SkipReason(f"Job {parse_icecat_csv_into_db.name} is loading {pending['content_hash']}")
+        if runs and runs[0].status == DagsterRunStatus.SUCCESS and not load_failed(instance, runs[0].run_id):
+            cursor["loaded"] = pending["content_hash"]
+        # Failed (or missing) run or load: the same content is loaded again by the next download
+        cursor.pop("pending")
+        context.update_cursor(json.dumps(cursor))
+
+    # Latest download only, older ones are superseded
+    latest = latest_download(instance, cursor.get("storage_id", 0))
+    if latest is None:
+        return SkipReason("No new download of IceCat CSV")
+    cursor["storage_id"], record = latest
+    if record is None:
+        context.update_cursor(json.dumps(cursor))
+        return SkipReason("No new download of IceCat CSV (materializations without content hash ignored)")
+    content_hash = record.asset_materialization.metadata["content_hash"].value
+    if content_hash == cursor.get("loaded"):
+        context.update_cursor(json.dumps(cursor))
+        return SkipReason(f"IceCat CSV did not change since the last load ({content_hash})")
+
+    run_key = f"icecat_csv:{record.storage_id}"
+    cursor["pending"] = {"run_key": run_key, "content_hash": content_hash}
+    context.update_cursor(json.dumps(cursor))
+    return RunRequest(run_key=run_key,
+                      tags={"parent_run_id": record.run_id, "icecat/content_hash": str(content_hash)})
@@ -0,0 +1,107 @@
+# bench/ThrowawayPg.py
+from pathlib import Path
+from typing import Optional
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import uuid
+
+import psycopg2
+from psycopg2.extensions import parse_dsn
+
+SQL_ICECAT = Path(__file__).resolve().parents[3] / "_scripts" / "sql" / "icecat" / "icecat--1.0.sql"
+
+
+class ThrowawayPg:
+    """
+    Disposable PostgreSQL database with the IceCat schema, used by the DB benchmark stage.
+    Either a temporary cluster (initdb + pg_ctl, found in pg_bin or PATH) or a temporary database
+    on an existing server (dsn of a user allowed to create databases). Everything is dropped on exit.
+    The schema uses uuidv7(), so the server must be PostgreSQL 18 or later.
+    """
+
+    def __init__(self, dsn: Optional[str] = None, pg_bin: Optional[str] = None):
+        self.dsn = dsn
+        self.pg_bin = pg_bin
+        self.data_dir: Optional[str] = None
+        self.params: dict = parse_dsn(dsn) if dsn else {}
+        self.admin_db = self.params.get("dbname", "postgres")
+        self.database = f"icecat_bench_{uuid.uuid4().hex[:8]}"
+
+    def binary(self, name: str) -> str:
+        path = shutil.which(name, path=self.pg_bin) if self.pg_bin else shutil.which(name)
+        if path is None:
+            raise RuntimeError(f"'{name}' not found, pass --pg-bin or --pg-dsn")
+        return path
+
+    @staticmethod
+    def free_port() -> int:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            return s.getsockname()[1]
+
+    def start_cluster(self):
+        """Creates and starts temporary cluster, listening on a free local port."""
+        self.data_dir = tempfile.mkdtemp(prefix="icecat_bench_pg_")
+        port = self.free_port()
+        subprocess.run([self.binary("initdb"), "-D", self.data_dir, "-U", "postgres", "-A", "trust",
+                        "-E", "UTF8", "--locale=C"], check=True, stdout=subprocess.DEVNULL)
+        # Durability is irrelevant for a benchmark database, it would only add noise
+        options = f"-p {port} -k {self.data_dir} -c listen_addresses='' -c fsync=off -c synchronous_commit=off"
+        subprocess.run([self.binary("pg_ctl"), "-D", self.data_dir, "-o", options, "-w", "-s",
+                        "-l", os.path.join(self.data_dir, "server.log"), "start"], check=True)
+        self.params = {"host": self.data_dir, "port": port, "user": "postgres", "password": "", "dbname": "postgres"}
+
+    def stop_cluster(self):
+        if self.data_dir is None:
+            return
+        subprocess.run([self.binary("pg_ctl"), "-D", self.data_dir, "-m", "immediate", "-w", "-s", "stop"],
+                       check=False)
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+        self.data_dir = None
+
+    def admin(self):
+        cn = psycopg2.connect(**{**self.params, "dbname": self.admin_db})
+        cn.autocommit = True
+        return cn
+
+    def __enter__(self) -> 'ThrowawayPg':
+        if self.dsn is None:
+            self.start_cluster()
+        try:
+            cn = self.admin()
+            with cn.cursor() as cur:
+                cur.execute(f'create database "{self.database}" encoding \'UTF8\' locale \'C\' template template0')
+                # Role granted by the schema script
+                cur.execute("do $$ begin create role dbu_storage nologin; "
+                            "exception when duplicate_object then null; end $$")
+            cn.close()
+            self.params["dbname"] = self.database
+            with psycopg2.connect(**self.params) as cn, cn.cursor() as cur:
+                cur.execute(SQL_ICECAT.read_text(encoding="utf-8"))
+            cn.close()
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.dsn is not None:
+            cn = self.admin()
+            with cn.cursor() as cur:
+                cur.execute(f'drop database if exists "{self.database}" with (force)')
+            cn.close()
+        self.stop_cluster()
+
+    def storage_conf(self) -> dict:
+        """Returns configuration of PgStorageRs pointing to the throwaway database."""
+        return {
+            "host": self.params.get("host", "localhost"),
+            "port": int(self.params.get("port", 5432)),
+            "user": self.params.get("user", "postgres"),
+            "password": self.params.get("password", ""),
+            "database": self.database,
+            "db_schema": "public",
+        }
@@ -0,0 +1,88 @@
+# bench/gen_icecat_csv.py
+"""Generates synthetic, IceCat-shaped (files.index.csv) tab-separated files for benchmarks."""
+import argparse
+import gzip
+import random
+
+COLUMNS = [
+    "path", "product_id", "updated", "quality", "supplier_id", "prod_id", "catid", "m_prod_id", "ean_upc",
+    "on_market", "country_market", "model_name", "product_view", "high_pic", "high_pic_size", "high_pic_width",
+    "high_pic_height", "m_supplier_id", "m_supplier_name", "ean_upcs", "Date_Added", "Limited",
+]
+QUALITIES = ["ICECAT", "SUPPLIER", "NOEDITOR"]
+MARKETS = ["NL;BE;DE", "US", "GB;IE", "FR", "DE;AT;CH", ""]
+
+
+def make_row(rnd: random.Random, product_id: int) -> list:
+    """Returns one well-formed row."""
+    supplier = rnd.randint(1, 5000)
+    return [
+        f"export/freexml.int/INT/{product_id}.xml",
+        str(product_id),
+        f"2024{rnd.randint(1, 12):02d}{rnd.randint(1, 28):02d}{rnd.randint(0, 23):02d}0000",
+        rnd.choice(QUALITIES),
+        str(supplier),
+        f"PN-{rnd.getrandbits(32):08X}",
+        str(rnd.randint(100, 3000)),
+        "",
+        str(rnd.randint(10 ** 12, 10 ** 13 - 1)),
+        rnd.choice(["0", "1"]),
+        rnd.choice(MARKETS),
+        f"Model {rnd.getrandbits(24):06x} \"Pro\" ü",
+        str(rnd.randint(0, 100000)),
+        f"https://images.icecat.biz/img/norm/high/{product_id}-{supplier}.jpg",
+        str(rnd.randint(1000, 900000)),
+        "800",
+        "600",
+        "",
+        "",
+        str(rnd.randint(10 ** 12, 10 ** 13 - 1)),
+        "20200101",
+        rnd.choice(["Yes", "No"]),
+    ]
+
+
+def make_malformed(rnd: random.Random, row: list) -> bytes:
+    """Returns malformed variant of the row: missing fields, extra fields or invalid UTF-8."""
+    kind = rnd.randint(0, 2)
+    if kind == 0:
+        return "\t".join(row[:rnd.randint(1, len(row) - 1)]).encode("utf-8")
+    if kind == 1:
+        return "\t".join(row + ["extra"]).encode("utf-8")
+    data = "\t".join(row).encode("utf-8")
+    return data.replace(b"Model", b"Mod\xff\xfeel", 1)
+
+
+def generate(path: str, rows: int, malformed: float = 0.001, seed: int = 42) -> str:
+    """Writes the file (gzip-compressed if path ends with .gz) and returns its path."""
+    rnd = random.Random(seed)
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "wb") as f:
+        f.write("\t".join(COLUMNS).encode("utf-8") + b"\n")
+        lines = []
+        for product_id in range(1, rows + 1):
+            row = make_row(rnd, product_id)
+            if rnd.random() < malformed:
+                lines.append(make_malformed(rnd, row))
+            else:
+                lines.append("\t".join(row).encode("utf-8"))
+            if len(lines) >= 10_000:
+                f.write(b"\n".join(lines) + b"\n")
+                lines = []
+        if lines:
+            f.write(b"\n".join(lines) + b"\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="Output file (*.gz for gzip-compressed)")
+    parser.add_argument("--rows", type=int, default=10_000, help="Number of data rows")
+    parser.add_argument("--malformed", type=float, default=0.001, help="Share of malformed rows")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+    generate(args.path, args.rows, args.malformed, args.seed)
+
+
+if __name__ == "__main__":
+    main()
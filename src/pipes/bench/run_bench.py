@@ -0,0 +1,309 @@
+# bench/run_bench.py
+"""
+Benchmarks of the IceCat ingestion stages on synthetic data.
+
+Each stage runs in its own process, so peak RSS is measured per stage. Results are compared with the
+stored baseline (bench/baseline.json), a stage is reported as regression if its throughput drops
+or its peak memory grows more than the tolerance.
+
+    python bench/run_bench.py --rows 10k,1M,10M
+    python bench/run_bench.py --rows 10k --stages files,db --save-baseline
+    python bench/run_bench.py --rows 1M --stages db --pg-dsn "host=localhost user=postgres dbname=postgres"
+"""
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent / "app"
+BASELINE_DEFAULT = BENCH_DIR / "baseline.json"
+
+# Stage → input formats it is measured with
+STAGES: Dict[str, tuple] = {
+    "count": ("csv",),        # count_rows_in_file (plain files only)
+    "download": ("gz",),      # IceCatCsv.download_and_unzip from a local HTTP server
+    "files": ("csv", "gz"),   # parse_csv_to_json
+    "db": ("csv", "gz"),      # ic_meta_to_db into a throwaway PostgreSQL
+}
+
+
+def parse_count(value: str) -> int:
+    """Parses row count with optional k/M suffix (10k, 1M)."""
+    value = value.strip()
+    factor = {"k": 1_000, "m": 1_000_000}.get(value[-1:].lower(), 1)
+    return int(float(value[:-1] if factor > 1 else value) * factor)
+
+
+def dir_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def peak_rss_mb() -> float:
+    """Returns peak RSS of the process and its finished children (worker processes) in MiB."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / 1024, 1)
+
+
+def input_path(data_dir: Path, rows: int, fmt: str, malformed: float, seed: int) -> Path:
+    """Returns synthetic input file, generated on first use."""
+    from gen_icecat_csv import generate
+    path = data_dir / f"icecat_{rows}_{seed}_{malformed}.csv{'.gz' if fmt == 'gz' else ''}"
+    if not path.exists():
+        print(f"Generating {path.name}...", flush=True)
+        part = path.with_name(f"part_{path.name}")
+        generate(str(part), rows, malformed=malformed, seed=seed)
+        os.replace(part, path)
+    return path
+
+
+# -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -
+# Stages (executed in child processes)
+
+class Stopwatch:
+    """Measures the timed part of a stage (imports and setup are excluded)."""
+    seconds: float = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.seconds = time.perf_counter() - self.started
+
+
+def stage_count(args, path: Path, out_dir: Path, timer: Stopwatch) -> dict:
+    from jobs.icecat.count_rows_in_file import count_rows_in_file
+    path.with_name(f"{path.name}.idx").unlink(missing_ok=True)  # Measures the scan, not the cached index
+    with timer:
+        rows = count_rows_in_file(str(path))
+    return {"rows_counted": rows}
+
+
+def stage_download(args, path: Path, out_dir: Path, timer: Stopwatch) -> dict:
+    from assets.icecat.IceCatCsv import IceCatCsv
+
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *a, **kw):
+            super().__init__(*a, directory=str(path.parent), **kw)
+
+        def log_message(self, *a):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        IceCatCsv.url = f"http://127.0.0.1:{server.server_port}/{path.name}"
+        IceCatCsv.dir = str(out_dir)
+        with timer:
+            csv_path = IceCatCsv.make("bench", "bench").download_and_unzip()
+    finally:
+        server.shutdown()
+    return {"csv_path": csv_path}
+
+
+def stage_files(args, path: Path, out_dir: Path, timer: Stopwatch) -> dict:
+    from dagster import build_op_context
+    from jobs.icecat.parse_icecat_csv_into_files import parse_csv_to_json, ParserConf
+    config = ParserConf(output_dir=str(out_dir), cleanup=True, workers=args.workers, layout=args.layout)
+    context = build_op_context()
+    with timer:
+        out = parse_csv_to_json(context, config, str(path))
+    return {"rows_processed": out.metadata["rows_processed"].value,
+            "files_generated": out.metadata["files_generated"].value}
+
+
+def stage_db(args, path: Path, out_dir: Path, timer: Stopwatch) -> dict:
+    from dagster import build_op_context
+    from jobs.icecat.parse_icecat_csv_into_db import ic_meta_to_db, ICToDbConf
+    from resources.pg.PgStorageRs import PgStorageRs
+    db = PgStorageRs(**json.loads(args.db))
+    config = ICToDbConf(mode=args.mode, workers=args.workers)
+    context = build_op_context(resources={"db_storage": db})
+    with timer:
+        out = ic_meta_to_db(context, config, str(path))
+    with db.conf() as cn, cn.cursor() as cur:
+        cur.execute('select pg_total_relation_size(\'"IceCatProductsMeta"\')')
+        size = cur.fetchone()[0]
+    if out.value.startswith("Failed"):
+        raise RuntimeError(out.value)
+    return {"rows_processed": out.metadata["rows_processed"].value,
+            "rows_inserted": out.metadata["rows_inserted"].value,
+            "table_bytes": size}
+
+
+STAGE_RUNNERS = {"count": stage_count, "download": stage_download, "files": stage_files, "db": stage_db}
+
+
+def run_child(args):
+    """Runs single stage and prints its measurements as the last line of stdout."""
+    sys.path.insert(0, str(APP_DIR))
+    path = Path(args.input)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    timer = Stopwatch()
+    result = STAGE_RUNNERS[args.child](args, path, out_dir, timer)
+    written = result.pop("table_bytes") if args.child == "db" else dir_size(out_dir)
+    print(json.dumps({"seconds": round(timer.seconds, 3), "peak_rss_mb": peak_rss_mb(),
+                      "bytes_written": written, "result": result}))
+
+
+# -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -  -
+
+def truncate_products(conf: dict):
+    """Empties the products table, so every run measures inserts (not updates) into an empty table."""
+    import psycopg2
+    with psycopg2.connect(host=conf["host"], port=conf["port"], user=conf["user"], password=conf["password"],
+                          dbname=conf["database"]) as cn, cn.cursor() as cur:
+        cur.execute('truncate "IceCatProductsMeta", "IceCatProductsMetaStage"')
+    cn.close()
+
+
+def measure(args, stage: str, rows: int, fmt: str, path: Path, work_dir: Path, log,
+            db_conf: Optional[dict]) -> dict:
+    out_dir = work_dir / "out" / f"{stage}_{fmt}_{rows}"
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--child", stage, "--input", str(path),
+           "--out-dir", str(out_dir), "--workers", str(args.workers), "--layout", args.layout, "--mode", args.mode]
+    if db_conf is not None:
+        truncate_products(db_conf)
+        cmd += ["--db", json.dumps(db_conf)]
+    proc = subprocess.run(cmd, cwd=str(APP_DIR), stdout=subprocess.PIPE, stderr=log, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Stage {stage} ({fmt}, {rows:,} rows) failed, see {log.name}")
+    measured = json.loads(proc.stdout.strip().splitlines()[-1])
+    if not args.keep:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    seconds = measured["seconds"]
+    return {
+        "stage": stage,
+        "format": fmt,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else 0.0,
+        "peak_rss_mb": measured["peak_rss_mb"],
+        "bytes_written": measured["bytes_written"],
+        "input_bytes": path.stat().st_size,
+        "result": measured["result"],
+    }
+
+
+def compare(results: List[dict], baseline: dict, tolerance: float) -> int:
+    """Prints results next to the baseline and returns number of regressions."""
+    known = {(b["stage"], b["format"], b["rows"]): b for b in baseline.get("results", [])}
+    regressions = 0
+    print(f"\n{'stage':<10}{'format':<8}{'rows':>12}{'seconds':>10}{'rows/sec':>13}{'peak MiB':>10}"
+          f"{'written MiB':>13}{'Δ rows/sec':>12}{'Δ peak':>9}")
+    for r in results:
+        line = (f"{r['stage']:<10}{r['format']:<8}{r['rows']:>12,}{r['seconds']:>10.3f}{r['rows_per_sec']:>13,.0f}"
+                f"{r['peak_rss_mb']:>10.1f}{r['bytes_written'] / 1024 / 1024:>13.1f}")
+        base = known.get((r["stage"], r["format"], r["rows"]))
+        if base is not None and base["rows_per_sec"] > 0 and base["peak_rss_mb"] > 0:
+            speed = r["rows_per_sec"] / base["rows_per_sec"] - 1
+            memory = r["peak_rss_mb"] / base["peak_rss_mb"] - 1
+            line += f"{speed * 100:>+11.1f}%{memory * 100:>+8.1f}%"
+            if speed < -tolerance or memory > tolerance:
+                regressions += 1
+                line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of the IceCat ingestion pipeline.")
+    parser.add_argument("--rows", default="10k", help="Comma-separated data sizes, e.g. 10k,1M,10M")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated stages: {', '.join(STAGES)}")
+    parser.add_argument("--formats", default="csv,gz", help="Comma-separated input formats: csv, gz")
+    parser.add_argument("--malformed", type=float, default=0.001, help="Share of malformed rows")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the data generator")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes of the files and db stages")
+    parser.add_argument("--layout", default="flat", help="Output layout of the files stage")
+    parser.add_argument("--mode", default="copy", help="Loading mode of the db stage")
+    parser.add_argument("--work-dir", help="Directory for generated data and outputs (default: temporary)")
+    parser.add_argument("--keep", action="store_true", help="Keep stage outputs")
+    parser.add_argument("--pg-dsn", help="Existing server to create the throwaway database on")
+    parser.add_argument("--pg-bin", help="Directory with initdb and pg_ctl for the throwaway cluster")
+    parser.add_argument("--baseline", default=str(BASELINE_DEFAULT), help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative deviation from baseline")
+    parser.add_argument("--output", help="File to store results into (JSON)")
+    # Internal: execution of a single stage in a child process
+    parser.add_argument("--child", choices=list(STAGES), help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    parser.add_argument("--out-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return run_child(args)
+
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+    sizes = [parse_count(s) for s in args.rows.split(",") if s]
+    formats = [f for f in args.formats.split(",") if f]
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="icecat_bench_"))
+    data_dir = work_dir / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    pg = None
+    db_conf = None
+    if "db" in stages:
+        from ThrowawayPg import ThrowawayPg
+        pg = ThrowawayPg(dsn=args.pg_dsn, pg_bin=args.pg_bin).__enter__()
+        db_conf = pg.storage_conf()
+
+    results = []
+    log_path = work_dir / "bench.log"
+    try:
+        with open(log_path, "a") as log:
+            for rows in sizes:
+                for stage in stages:
+                    for fmt in (f for f in STAGES[stage] if f in formats):
+                        path = input_path(data_dir, rows, fmt, args.malformed, args.seed)
+                        print(f"Running {stage} ({fmt}, {rows:,} rows)...", flush=True)
+                        results.append(measure(args, stage, rows, fmt, path, work_dir, log,
+                                               db_conf if stage == "db" else None))
+    finally:
+        if pg is not None:
+            pg.__exit__(None, None, None)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "malformed": args.malformed,
+        "seed": args.seed,
+        "results": results,
+    }
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    regressions = compare(results, baseline, args.tolerance)
+    if not baseline:
+        print(f"\nNo baseline found ({baseline_path}), run with --save-baseline to store one.")
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline stored: {baseline_path}")
+    print(f"\nWork directory: {work_dir}")
+    if regressions and not args.save_baseline:
+        print(f"{regressions} regression(s) above {args.tolerance:.0%} tolerance")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
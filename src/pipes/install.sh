@@ -14,7 +14,9 @@ cd "${DAGSTER_WD}" || exit 1
 pip install -q --no-cache-dir \
     dagster \
     dagster-postgres \
+    isal \
     psycopg2-binary \
+    pyarrow \
     python-box
 
 rm -f install.sh
\ No newline at end of file
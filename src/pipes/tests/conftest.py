@@ -0,0 +1,45 @@
+# tests/conftest.py
+"""
+Tests of the pipes code location. Run from src/pipes with the pipes dependencies installed:
+
+    python -m pytest tests
+    ICECAT_TEST_PG_DSN="host=localhost user=postgres dbname=postgres" python -m pytest tests
+
+Database tests run in a throwaway database (see bench/ThrowawayPg.py) on the server of ICECAT_TEST_PG_DSN
+and are skipped without it.
+"""
+from pathlib import Path
+import os
+import sys
+
+import pytest
+
+PIPES_DIR = Path(__file__).resolve().parents[1]
+for path in (PIPES_DIR / "app", PIPES_DIR / "bench"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+@pytest.fixture
+def icecat_db():
+    """Throwaway database with the IceCat schema, yields its PgStorageRs configuration."""
+    dsn = os.getenv("ICECAT_TEST_PG_DSN")
+    if not dsn:
+        pytest.skip("ICECAT_TEST_PG_DSN is not set")
+    from ThrowawayPg import ThrowawayPg
+    with ThrowawayPg(dsn=dsn) as pg:
+        yield pg.storage_conf()
+
+
+@pytest.fixture
+def without_app_path(monkeypatch):
+    """sys.path without the app directory, as Dagster leaves it after loading the code location."""
+    app_dir = PIPES_DIR / "app"
+    monkeypatch.setattr(sys, "path", [path for path in sys.path if Path(path or ".").resolve() != app_dir])
+
+
+@pytest.fixture
+def icecat_csv_file(tmp_path):
+    """Generated IceCat CSV file (2,000 products, some malformed rows)."""
+    from gen_icecat_csv import generate
+    return generate(str(tmp_path / "icecat.csv"), rows=2_000, malformed=0.01)
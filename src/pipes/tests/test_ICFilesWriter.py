@@ -0,0 +1,25 @@
+# tests/test_ICFilesWriter.py
+import os
+
+import pytest
+
+from jobs.icecat.ICFilesWriter import ICFilesWriter
+
+
+@pytest.mark.parametrize("layout, threads", [("flat", 0), ("hashed", 2), ("ndjson", 0)])
+def test_end_durability_syncs_only_what_was_written(tmp_path, monkeypatch, layout, threads):
+    synced = []
+    monkeypatch.setattr(ICFilesWriter, "sync_path", staticmethod(synced.append))
+    monkeypatch.setattr(os, "sync", lambda: pytest.fail("os.sync syncs every filesystem of the host"))
+    (tmp_path / "foreign.json").write_text("{}")
+
+    writer = ICFilesWriter(tmp_path, layout=layout, shard_size=3, threads=threads, durability="end")
+    for first in (0, 5):
+        safe_ids = [str(prod_id) for prod_id in range(first, first + 5)]
+        writer.write_many(safe_ids, [f'{{"id": {prod_id}}}' for prod_id in safe_ids])
+    writer.drain()
+    writer.close()
+
+    written = {path for path in tmp_path.rglob("*") if path.name != "foreign.json"}
+    assert set(synced) == written | {tmp_path}
+    assert len(synced) == len(set(synced))
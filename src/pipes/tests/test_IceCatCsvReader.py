@@ -0,0 +1,40 @@
+# tests/test_IceCatCsvReader.py
+import gzip
+
+import pytest
+
+from assets.icecat.IceCatCsvReader import IceCatCsvReader
+
+# Bare '\r' ends a row for the csv reader, as '\n' and '\r\n' do
+CONTENT = b"h1\th2\na\tb\rc\td\ne\tf\r\ng\th\n\ni\tj"
+
+
+@pytest.fixture(params=["csv", "csv.gz"])
+def csv_file(request, tmp_path):
+    path = tmp_path / f"icecat.{request.param}"
+    path.write_bytes(gzip.compress(CONTENT) if request.param.endswith(".gz") else CONTENT)
+    return str(path)
+
+
+def test_resume_continues_at_the_next_row(csv_file):
+    with IceCatCsvReader(csv_file) as reader:
+        rows = list(reader)
+    assert rows == [["a", "b"], ["c", "d"], ["e", "f"], ["g", "h"], [], ["i", "j"]]
+    for done in range(len(rows) + 1):
+        with IceCatCsvReader(csv_file) as reader:
+            offset = reader.offset_of(done)
+        with IceCatCsvReader(csv_file) as reader:
+            assert reader.skip(done, offset) == done
+            assert list(reader) == rows[done:]
+
+
+def test_offsets_of_successive_checkpoints_match_fresh_scans(tmp_path):
+    path = tmp_path / "icecat.csv"
+    path.write_bytes(CONTENT)
+    with IceCatCsvReader(str(path)) as reader:
+        successive = [reader.offset_of(done) for done in range(7)]
+    fresh = []
+    for done in range(7):
+        with IceCatCsvReader(str(path)) as reader:
+            fresh.append(reader.offset_of(done))
+    assert successive == fresh == [6, 10, 14, 19, 23, 24, len(CONTENT)]
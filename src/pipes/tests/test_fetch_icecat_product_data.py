@@ -0,0 +1,82 @@
+# tests/test_fetch_icecat_product_data.py
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+
+import pytest
+from box import Box
+from dagster import build_op_context
+
+from jobs.icecat.fetch_icecat_product_data import ic_data_fetch, ICFetchConf
+from resources.pg.PgStorageRs import PgStorageRs
+
+
+class ProductDocs(BaseHTTPRequestHandler):
+    """IceCat stand-in: XML document per product, products divisible by 5 have none (404)."""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        prod_id = int(self.path.rsplit("/", 1)[-1].split(".")[0])
+        if prod_id % 5 == 0:
+            code, body = 404, b"Not found"
+        else:
+            code, body = 200, f'<ICECAT-interface><Product ID="{prod_id}"/></ICECAT-interface>'.encode()
+        self.send_response(code)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def icecat_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProductDocs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/{{lang}}/{{product_id}}.xml"
+    server.shutdown()
+
+
+def fetch(db: PgStorageRs, url: str) -> dict:
+    context = build_op_context(resources={"db_storage": db, "icecat_creds": Box()})
+    out = ic_data_fetch(context, ICFetchConf(url=url, workers=4, rate=0, cache_dir=""))
+    return {key: value.value for key, value in out.metadata.items()}
+
+
+def to_fetch(db: PgStorageRs) -> list:
+    with db.conf() as cn, cn.cursor() as cur:
+        cur.execute('select "outProductId" from "listIceCatDataToFetch"(%s)', ("EN",))
+        return [prod_id for prod_id, in cur.fetchall()]
+
+
+def test_second_fetch_has_nothing_to_do(icecat_db, icecat_url):
+    db = PgStorageRs(**icecat_db)
+    with db.conf() as cn, cn.cursor() as cur:
+        cur.execute('select count(*) from "saveIceCatProductMetaBatch"(%s, %s::jsonb)',
+                    (list(range(1, 21)), "[" + ",".join(f'{{"updated": "2024010{i % 9 + 1}"}}'
+                                                          for i in range(1, 21)) + "]"))
+        cn.commit()
+
+    first = fetch(db, icecat_url)
+    assert first["error"] is None
+    assert first["products_selected"] == 20
+    assert (first["products_fetched"], first["products_missing"]) == (16, 4)
+    assert to_fetch(db) == []
+
+    # Loading the same metadata again creates new record versions, the documents stay up to date
+    with db.conf() as cn, cn.cursor() as cur:
+        cur.execute('update "IceCatProductsMeta" set "prdMetaVersion" = uuidv7()')
+        cn.commit()
+    assert to_fetch(db) == []
+    second = fetch(db, icecat_url)
+    assert second["products_selected"] == 0
+
+    # Changed metadata is fetched again, unchanged document keeps its version
+    with db.conf() as cn, cn.cursor() as cur:
+        cur.execute('''update "IceCatProductsMeta" set "prdMeta" = '{"updated": "20250101"}' where "prdID" = 7''')
+        cn.commit()
+    assert to_fetch(db) == [7]
+    third = fetch(db, icecat_url)
+    assert (third["products_selected"], third["rows_unchanged"]) == (1, 1)
+    assert to_fetch(db) == []
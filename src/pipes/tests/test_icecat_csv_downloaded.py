@@ -0,0 +1,78 @@
+# tests/test_icecat_csv_downloaded.py
+import json
+
+from dagster import (AssetMaterialization, DagsterInstance, DagsterRunStatus, RunRequest, build_sensor_context,
+                     job, op)
+
+from jobs.icecat.parse_icecat_csv_into_db import ic_meta_to_db
+from resources.pg.PgStorageRs import PgStorageRs
+from sensors.icecat.icecat_csv_downloaded import icecat_csv_downloaded
+
+
+class SensorTicks:
+    """Evaluates the sensor on an instance, keeping its cursor between ticks."""
+
+    def __init__(self, instance: DagsterInstance):
+        self.instance = instance
+        self.cursor = None
+
+    def tick(self):
+        context = build_sensor_context(instance=self.instance, cursor=self.cursor)
+        result = icecat_csv_downloaded(context)
+        self.cursor = context.cursor
+        return result
+
+    def download(self, content_hash: str):
+        self.instance.report_runless_asset_event(
+            AssetMaterialization("icecat_csv", metadata={"content_hash": content_hash}))
+
+
+def set_merge_broken(db: PgStorageRs, broken: bool):
+    names = ('"mergeIceCatProductMetaStage"', '"mergeIceCatProductMetaStageOff"')
+    source, target = names if broken else reversed(names)
+    with db.conf() as cn, cn.cursor() as cur:
+        cur.execute(f"alter function {source}(uuid) rename to {target}")
+        cn.commit()
+
+
+def test_failed_load_is_retried_on_identical_download(icecat_db, icecat_csv_file, tmp_path):
+    db = PgStorageRs(**icecat_db)
+
+    @op
+    def csv_file() -> str:
+        return icecat_csv_file
+
+    @job(resource_defs={"db_storage": db})
+    def load():
+        ic_meta_to_db(csv_path=csv_file())
+
+    run_config = {"ops": {"ic_meta_to_db": {"config": {"checkpoint_dir": str(tmp_path), "checkpoint_rows": 0}}}}
+
+    def run(request: RunRequest) -> DagsterRunStatus:
+        result = load.execute_in_process(run_config=run_config, instance=instance, raise_on_error=False,
+                                         tags={"dagster/run_key": request.run_key})
+        return instance.get_run_by_id(result.run_id).status
+
+    with DagsterInstance.ephemeral() as instance:
+        sensor = SensorTicks(instance)
+        sensor.download("A")
+        request = sensor.tick()
+        assert isinstance(request, RunRequest)
+
+        # Load breaks mid-way: the run fails and the file does not count as loaded
+        set_merge_broken(db, True)
+        assert run(request) == DagsterRunStatus.FAILURE
+        set_merge_broken(db, False)
+        sensor.tick()
+        assert "loaded" not in json.loads(sensor.cursor)
+
+        # Identical download loads the file again
+        sensor.download("A")
+        request = sensor.tick()
+        assert isinstance(request, RunRequest)
+        assert run(request) == DagsterRunStatus.SUCCESS
+        sensor.tick()
+        assert json.loads(sensor.cursor)["loaded"] == "A"
+
+        sensor.download("A")
+        assert "did not change" in sensor.tick().skip_message
@@ -0,0 +1,18 @@
+# tests/test_parse_icecat_csv_into_db.py
+from dagster import build_op_context
+
+from jobs.icecat.parse_icecat_csv_into_db import ic_meta_to_db, ICToDbConf
+from resources.pg.PgStorageRs import PgStorageRs
+
+
+def test_parallel_workers_load_all_rows(icecat_db, icecat_csv_file, tmp_path, without_app_path):
+    db = PgStorageRs(**icecat_db)
+    context = build_op_context(resources={"db_storage": db})
+    out = ic_meta_to_db(context, ICToDbConf(workers=2, checkpoint_dir=str(tmp_path)), icecat_csv_file)
+    meta = {key: getattr(value, "value", None) for key, value in out.metadata.items()}
+    assert out.value == f"Added/updated {meta['rows_inserted']:,} rows."
+    assert meta["workers"] == 2
+    assert meta["rows_skipped"] > 0
+    with db.conf() as cn, cn.cursor() as cur:
+        cur.execute('select count(*) from "IceCatProductsMeta"')
+        assert cur.fetchone()[0] == meta["rows_processed"] - meta["rows_skipped"] == meta["rows_inserted"]
@@ -0,0 +1,23 @@
+# tests/test_parse_icecat_csv_into_files.py
+from pathlib import Path
+
+from dagster import build_op_context
+
+from jobs.icecat.parse_icecat_csv_into_files import parse_csv_to_json, ParserConf
+
+
+def parse(csv_path: str, output_dir: Path, workers: int) -> dict:
+    out = parse_csv_to_json(build_op_context(), ParserConf(output_dir=str(output_dir), workers=workers), csv_path)
+    return {key: getattr(value, "value", value) for key, value in out.metadata.items()}
+
+
+def files_of(output_dir: Path) -> dict:
+    return {path.name: path.read_text(encoding="utf-8") for path in output_dir.iterdir()}
+
+
+def test_parallel_workers_match_single_process(icecat_csv_file, tmp_path, without_app_path):
+    single = parse(icecat_csv_file, tmp_path / "single", workers=1)
+    parallel = parse(icecat_csv_file, tmp_path / "parallel", workers=2)
+    assert parallel["files_generated"] == single["files_generated"] > 0
+    assert parallel["rows_skipped"] == single["rows_skipped"] > 0
+    assert files_of(tmp_path / "parallel") == files_of(tmp_path / "single")